@@ -0,0 +1,104 @@
+"""
+Startup benchmark for the scanner CLI.
+
+Runs `python -X importtime` against the CLI entry point in a fresh interpreter,
+reports the cumulative import cost and the slowest modules, and fails if any of
+the heavy dependencies are loaded before a stage actually needs them.
+
+`--quick-path` also imports the modules the quick `--check SYMBOL` command
+loads (see CHECK_PATH_MODULES), which must stay light as well.
+
+Usage:
+    python benchmarks/startup_importtime.py [--module stock_scanner.main] [--top 15] [--max-ms 500]
+    python benchmarks/startup_importtime.py --quick-path
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# These must only load once the stage that needs them runs.
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "langgraph",
+    "langchain_core",
+    "langchain_google_genai",
+    "langsmith",
+]
+
+# Imported by `python -m stock_scanner.main --check SYMBOL` (main.check_symbol)
+CHECK_PATH_MODULES = [
+    "stock_scanner.utils.api_client",
+    "stock_scanner.nodes.volume",
+    "stock_scanner.nodes.analyst",
+]
+
+def run_importtime(module: str, extra=()):
+    """Imports `module` (then `extra`) under -X importtime and returns [(self_us, cumulative_us, name)]."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    imports = "; ".join(f"import {name}" for name in (module, *extra))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", imports],
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+def time_cli_help(module: str, repeats: int = 5) -> float:
+    """Best-of-N wall time (ms) for `python -m <module> --help`."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", module, "--help"], capture_output=True, cwd=REPO_ROOT, env=env)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup import-time benchmark")
+    parser.add_argument("--module", default="stock_scanner.main", help="Entry module to import")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to show")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if total import time exceeds this")
+    parser.add_argument("--quick-path", action="store_true",
+                        help="Also import the modules loaded by `--check SYMBOL` and measure them together")
+    args = parser.parse_args()
+
+    extra = CHECK_PATH_MODULES if args.quick_path else []
+    rows = run_importtime(args.module, extra)
+    loaded = {name for _, _, name in rows}
+    # Top-level imports only, so each module's subtree is counted once
+    total_ms = sum(cum for _, cum, name in rows if name in (args.module, *extra)) / 1000
+
+    label = f"{args.module} + --check path" if args.quick_path else args.module
+    print(f"Import of {label}: {total_ms:.1f} ms cumulative ({len(rows)} modules)")
+    print(f"`python -m {args.module} --help` wall time: {time_cli_help(args.module):.1f} ms (best of 5)")
+    print(f"\nTop {args.top} modules by cumulative import time:")
+    for self_us, cum_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {cum_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    failed = False
+    eager = [m for m in HEAVY_MODULES if m in loaded]
+    if eager:
+        print(f"\nFAIL: heavy modules imported {'on the --check path' if args.quick_path else 'at startup'}: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"\nFAIL: startup import time {total_ms:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Local read-only HTTP API over stored scan results.
+
+Serves the run snapshots written to <DATA_DIR>/runs (see storage/runs.py)
+from in-memory indexes; it never calls FMP or the LLM. Every response body
+is serialized once per reload and carries a strong ETag, so pollers sending
+`If-None-Match` get an empty 304 until a new run lands.
+
+    GET /health
+    GET /runs                        run ids with result counts, newest first
+    GET /runs/<run_id>               one run's summary and results
+    GET /results/latest              the latest daily run (?intraday=1 to include intraday runs)
+    GET /symbols/<SYMBOL>            latest result for a symbol (volume, analyst, sentiment, reports)
+    GET /symbols/<SYMBOL>/history    every stored result for a symbol, newest first
+
+Usage:
+    python -m stock_scanner.api [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from stock_scanner.config import config
+from stock_scanner.storage.runs import RunStore, is_intraday
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Response = Tuple[bytes, str] # (body, etag)
+
+def _response(payload) -> Response:
+    body = json.dumps(payload).encode()
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+class ResultIndex:
+    """
+    Pre-serialized responses for every route. RunStore appends each run id to
+    its manifest once results.json is written, so the reload check is one stat
+    of the manifest and runs on every request; a new run is loaded on its own
+    and only the routes it touches are re-serialized. Later files in a run
+    directory (stage snapshots) don't trigger a reload.
+    """
+
+    def __init__(self, store: Optional[RunStore] = None):
+        self.store = store or RunStore()
+        self._lock = threading.Lock()
+        self._offset: Optional[int] = None # Manifest bytes indexed so far; None until the first build
+        self.runs: Dict[str, dict] = {}
+        self.by_symbol: Dict[str, list] = {} # symbol -> results, oldest run first
+        self.routes: Dict[str, Response] = {}
+
+    def refresh(self):
+        size = self.store.manifest_size()
+        if size == self._offset:
+            return
+        with self._lock:
+            if self._offset is None or size < self._offset:
+                # First build (or a rewritten manifest): list the directory once, which
+                # also covers runs saved before the manifest existed
+                self.runs, self.by_symbol, self.routes = {}, {}, {}
+                self._offset = size
+                self._add(self.store.run_ids())
+            ids, self._offset = self.store.saved_since(self._offset)
+            self._add(ids)
+
+    def _add(self, run_ids):
+        runs = [run for run in (self.store.load(run_id) for run_id in run_ids if run_id not in self.runs) if run]
+        if not runs and self.routes:
+            return
+        symbols = set()
+        for run in runs:
+            self.runs[run["run_id"]] = run
+            self.routes[f"/runs/{run['run_id']}"] = _response(run)
+            for result in run["results"]:
+                symbol = result["candidate"]["symbol"].upper()
+                history = self.by_symbol.setdefault(symbol, [])
+                at = bisect.bisect_right([r["run_id"] for r in history], run["run_id"])
+                history.insert(at, {"run_id": run["run_id"], **result})
+                symbols.add(symbol)
+        ordered = sorted(self.runs)
+        self.routes["/health"] = _response({"ok": True, "runs": len(ordered)})
+        self.routes["/runs"] = _response([
+            {"run_id": run_id, "created_at": self.runs[run_id].get("created_at"),
+             "results": len(self.runs[run_id]["results"])}
+            for run_id in reversed(ordered)
+        ])
+        daily = [run_id for run_id in ordered if not is_intraday(run_id)]
+        if daily:
+            self.routes["/results/latest"] = self.routes[f"/runs/{daily[-1]}"]
+        if ordered:
+            self.routes["/results/latest?intraday"] = self.routes[f"/runs/{ordered[-1]}"]
+        for symbol in symbols:
+            history = self.by_symbol[symbol]
+            self.routes[f"/symbols/{symbol}"] = _response(history[-1])
+            self.routes[f"/symbols/{symbol}/history"] = _response(history[::-1])
+        logger.info(f"Indexed {len(runs)} new runs ({len(ordered)} total), {len(symbols)} symbols updated")
+
+    def get(self, path: str) -> Optional[Response]:
+        self.refresh()
+        path, _, query = path.partition("?")
+        path = path.rstrip("/") or "/health"
+        if path.startswith("/symbols/"):
+            parts = path.split("/")
+            parts[2] = parts[2].upper()
+            path = "/".join(parts)
+        elif path == "/results/latest" and parse_qs(query).get("intraday", ["0"])[-1].lower() in ("1", "true"):
+            path = "/results/latest?intraday"
+        return self.routes.get(path)
+
+class _Handler(BaseHTTPRequestHandler):
+    index: ResultIndex = None
+
+    def do_GET(self):
+        found = self.index.get(self.path)
+        if found is None:
+            self._send(404, *_response({"error": f"not found: {self.path}"}))
+            return
+        body, etag = found
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(200, body, etag)
+
+    def _send(self, status: int, body: bytes, etag: str):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache") # Revalidate with If-None-Match
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+def create_server(host: str = config.API_HOST, port: int = config.API_PORT,
+                  root: Optional[Path] = None) -> ThreadingHTTPServer:
+    index = ResultIndex(RunStore(root))
+    index.refresh()
+    handler = type("Handler", (_Handler,), {"index": index})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Read-only HTTP API over stored scan results')
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port)
+    logger.info(f"Serving scan results on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
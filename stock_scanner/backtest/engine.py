@@ -0,0 +1,184 @@
+"""
+Vectorized backtest of the volume-spike + analyst-upside strategy.
+
+Same semantics as the original day-by-day loop (old/backtest_scanner.py):
+- a signal fires on day D when volume / (30-day average volume of the
+  previous 30 sessions) >= the spike threshold, that average is at least the
+  minimum liquidity, and the most recent price target published on or before
+  D implies at least the upside threshold over D's close;
+- the outcome is measured over the next `holding_period` sessions: max gain
+  from the highest high, final return from the last close in the window.
+
+Everything is computed with column operations: `merge_asof` (or a stored
+`AsOfIndex`) for the as-of target, a reversed rolling max for the forward high and a shifted close for
+the exit. When a symbol's materialized daily features (storage/features.py) are
+up to date, the volume average and forward outcomes are read from them instead.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from stock_scanner.config import config
+from stock_scanner.storage.price_targets import AsOfIndex
+
+SIGNAL_COLUMNS = [
+    'Symbol', 'Date', 'Entry Price', 'Vol Ratio', 'Target', 'Max Price',
+    'Max Gain %', 'Final Return %', 'Days Observed', 'Exit Date', 'Volatility %'
+]
+
+VOLATILITY_DAYS = 20 # Window for the daily-return volatility used by portfolio sizing
+
+def prepare_prices(prices: Union[List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
+    """FMP `historical` records or a stored frame (any order) -> DataFrame sorted by date."""
+    # Shallow: a stored frame's columns (possibly views into the universe matrix) are not copied
+    df = pd.DataFrame(prices).copy(deep=False)
+    df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]')
+    if df['date'].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
+
+def prepare_targets(targets: Optional[Union[List[Dict[str, Any]], pd.DataFrame]]) -> pd.DataFrame:
+    """FMP `v4/price-target` records or a stored frame -> DataFrame sorted by normalized publish date."""
+    if targets is None or len(targets) == 0:
+        return pd.DataFrame({'publishedDate': pd.Series(dtype='datetime64[ns]'),
+                             'priceTarget': pd.Series(dtype='float64')})
+    df = pd.DataFrame(targets).copy()
+    published = pd.to_datetime(df['publishedDate'], utc=True, format='mixed')
+    df['publishedDate'] = published.dt.tz_localize(None).dt.normalize().astype('datetime64[ns]')
+    df['priceTarget'] = pd.to_numeric(df['priceTarget'], errors='coerce')
+    df = df[df['priceTarget'] > 0]
+    return df.sort_values('publishedDate', kind='stable').reset_index(drop=True)
+
+def compute_signal_frame(df: pd.DataFrame, df_targets: Union[pd.DataFrame, AsOfIndex],
+                         holding_period: int = config.BACKTEST_HOLDING_PERIOD_DAYS,
+                         ma_days: int = config.BACKTEST_VOLUME_MA_DAYS) -> pd.DataFrame:
+    """
+    Adds per-day strategy features to a prepared price frame:
+    vol_ma (previous `ma_days` sessions), vol_ratio, target (as-of), upside,
+    max_price / exit_price / days_observed over the next `holding_period` sessions.
+    `df_targets` is a prepared target frame or an `AsOfIndex` from the price-target store.
+    """
+    df = df.copy(deep=False) # Only adds columns
+
+    # Compare today's volume vs the average of the previous `ma_days` sessions
+    df['vol_ma'] = df['volume'].rolling(window=ma_days).mean().shift(1)
+    df['vol_ratio'] = df['volume'] / df['vol_ma']
+    _add_targets(df, df_targets)
+
+    df['max_price'], df['exit_price'], df['days_observed'] = forward_outcome(df, holding_period)
+    exit_idx = np.minimum(np.arange(len(df)) + holding_period, len(df) - 1)
+    df['exit_date'] = df['date'].to_numpy()[exit_idx]
+    df['volatility'] = volatility(df['close'])
+    return df
+
+def signal_frame_from_features(features: pd.DataFrame, df_targets: Union[pd.DataFrame, AsOfIndex],
+                               holding_period: int = config.BACKTEST_HOLDING_PERIOD_DAYS,
+                               ma_days: int = config.BACKTEST_VOLUME_MA_DAYS) -> pd.DataFrame:
+    """
+    `compute_signal_frame` columns read from a symbol's stored daily features
+    (all rows, date-sorted) instead of recomputed from its prices. The store
+    must have `vol_ma_<ma_days>` and the `holding_period` horizon (see
+    `storage.features.covers`).
+    """
+    df = features.reset_index(drop=True).copy()
+    df['vol_ma'] = df[f'vol_ma_{ma_days}']
+    df['vol_ratio'] = df[f'vol_ratio_{ma_days}']
+    _add_targets(df, df_targets)
+
+    entry = df['close']
+    df['max_price'] = entry * (1 + df[f'fwd_max_gain_{holding_period}'] / 100)
+    df['exit_price'] = entry * (1 + df[f'fwd_return_{holding_period}'] / 100)
+    df['days_observed'] = np.minimum(df['fwd_days'], holding_period)
+    exit_idx = np.minimum(np.arange(len(df)) + holding_period, len(df) - 1)
+    df['exit_date'] = df['date'].to_numpy()[exit_idx]
+    df['volatility'] = df[f'volatility_{VOLATILITY_DAYS}']
+    return df
+
+def volatility(close: pd.Series) -> pd.Series:
+    """Stdev (%) of daily returns over the last VOLATILITY_DAYS sessions."""
+    return close.pct_change().rolling(window=VOLATILITY_DAYS).std() * 100
+
+def _add_targets(df: pd.DataFrame, df_targets: Union[pd.DataFrame, AsOfIndex]):
+    """Adds the as-of `target` and the `upside` (%) over each day's close."""
+    # Latest target published on or before each day
+    if isinstance(df_targets, AsOfIndex):
+        df['target'] = df_targets.latest_at(df['date'])
+    elif len(df_targets):
+        merged = pd.merge_asof(
+            df[['date']], df_targets[['publishedDate', 'priceTarget']],
+            left_on='date', right_on='publishedDate', direction='backward'
+        )
+        df['target'] = merged['priceTarget'].to_numpy()
+    else:
+        df['target'] = np.nan
+    df['upside'] = (df['target'] - df['close']) / df['close'] * 100
+
+def forward_outcome(df: pd.DataFrame, holding_period: int):
+    """
+    For each row i, over the next `holding_period` rows (i+1 .. i+holding_period,
+    truncated at the end of the data): highest high, last close and the number
+    of rows actually observed.
+    """
+    n = len(df)
+    fwd_high = df['high'][::-1].rolling(window=holding_period, min_periods=1).max()[::-1]
+    idx = np.arange(n)
+    exit_idx = np.minimum(idx + holding_period, n - 1)
+    return (fwd_high.shift(-1).to_numpy(),
+            df['close'].to_numpy()[exit_idx],
+            np.minimum(holding_period, n - 1 - idx))
+
+def backtest_symbol(symbol: str, prices: Union[List[Dict[str, Any]], pd.DataFrame],
+                    targets: Optional[Union[List[Dict[str, Any]], pd.DataFrame, AsOfIndex]],
+                    volume_spike_threshold: float = config.DEFAULT_VOLUME_SPIKE_THRESHOLD,
+                    upside_threshold: float = config.DEFAULT_UPSIDE_THRESHOLD,
+                    holding_period: int = config.BACKTEST_HOLDING_PERIOD_DAYS,
+                    min_avg_volume: float = config.BACKTEST_MIN_AVG_VOLUME,
+                    lookback_days: Optional[int] = config.BACKTEST_LOOKBACK_DAYS,
+                    as_of: Optional[datetime] = None,
+                    features: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Runs the strategy for one symbol and returns one row per signal
+    (columns: SIGNAL_COLUMNS). `lookback_days=None` tests the whole history.
+    'Exit Date' and 'Volatility %' (20-day stdev of daily returns) feed the
+    portfolio simulator.
+    `features` are the symbol's stored feature rows (FeatureStore), used instead
+    of `prices` when given; the caller checks they are up to date.
+    """
+    if not isinstance(targets, AsOfIndex):
+        targets = prepare_targets(targets)
+    if features is not None:
+        if features.empty:
+            return pd.DataFrame(columns=SIGNAL_COLUMNS)
+        df = signal_frame_from_features(features, targets, holding_period)
+    elif prices is None or len(prices) == 0:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    else:
+        df = compute_signal_frame(prepare_prices(prices), targets, holding_period)
+
+    mask = (
+        (df['vol_ma'] >= min_avg_volume)
+        & (df['vol_ratio'] >= volume_spike_threshold)
+        & (df['upside'] >= upside_threshold)
+        & (df['days_observed'] > 0) # Can't verify outcome yet
+    )
+    if lookback_days is not None:
+        start_date = (as_of or datetime.now()) - timedelta(days=lookback_days)
+        mask &= df['date'] >= start_date
+
+    sig = df[mask]
+    entry = sig['close']
+    return pd.DataFrame({
+        'Symbol': symbol,
+        'Date': sig['date'].dt.strftime('%Y-%m-%d'),
+        'Entry Price': entry,
+        'Vol Ratio': sig['vol_ratio'].round(2),
+        'Target': sig['target'],
+        'Max Price': sig['max_price'],
+        'Max Gain %': ((sig['max_price'] - entry) / entry * 100).round(2),
+        'Final Return %': ((sig['exit_price'] - entry) / entry * 100).round(2),
+        'Days Observed': sig['days_observed'].astype(int),
+        'Exit Date': sig['exit_date'].dt.strftime('%Y-%m-%d'),
+        'Volatility %': sig['volatility'].round(2),
+    }, columns=SIGNAL_COLUMNS).reset_index(drop=True)
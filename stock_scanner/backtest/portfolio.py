@@ -0,0 +1,176 @@
+"""
+Event-driven portfolio simulation on top of backtest signals.
+
+Signals are taken in date order (highest volume ratio first on the same day)
+into a fixed number of position slots. Each position is bought at the
+signal's close and sold at the close at the end of the holding period
+('Exit Date'), with slippage and commission applied on both sides.
+
+The simulation walks sorted integer date arrays with a heap of open
+positions keyed by exit date, so it is O(n log slots) in the number of
+signals. Open positions are carried at cost between entry and exit (the
+signal table has no daily marks), so the equity curve and drawdown are
+computed on closed-trade P&L.
+
+Usage:
+    python -m stock_scanner.backtest.portfolio --signals backtest_results.csv --slots 10 --sizing volatility
+"""
+import argparse
+import heapq
+from typing import Any, Dict, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from stock_scanner.config import config
+
+EQUAL = "equal"
+VOLATILITY = "volatility"
+
+class PortfolioResult(NamedTuple):
+    trades: pd.DataFrame # One row per executed position
+    equity: pd.DataFrame # date, equity, drawdown_pct (one row per event date)
+    stats: Dict[str, Any]
+
+def simulate_portfolio(signals: pd.DataFrame, initial_capital: float = 100_000.0, slots: int = 10,
+                       sizing: str = EQUAL, target_volatility_pct: float = 3.0,
+                       slippage_bps: float = 10.0, commission: float = 1.0,
+                       commission_bps: float = 0.0) -> PortfolioResult:
+    """
+    Simulates trading `signals` (backtest output: Symbol, Date, Entry Price,
+    Final Return %, Exit Date, Vol Ratio and, for volatility sizing,
+    Volatility %) with limited capital.
+
+    sizing="equal" allocates equity/slots per position; sizing="volatility"
+    scales that by target_volatility_pct / the signal's daily volatility
+    (never above the equal-weight allocation).
+    """
+    if sizing not in (EQUAL, VOLATILITY):
+        raise ValueError(f"Unknown sizing '{sizing}' (expected '{EQUAL}' or '{VOLATILITY}')")
+
+    df = signals.dropna(subset=['Entry Price', 'Final Return %', 'Exit Date'])
+    df = df.assign(
+        _entry=pd.to_datetime(df['Date']).astype('datetime64[ns]'),
+        _exit=pd.to_datetime(df['Exit Date']).astype('datetime64[ns]'),
+    ).sort_values(['_entry', 'Vol Ratio'], ascending=[True, False], kind='stable')
+
+    symbols = df['Symbol'].to_numpy()
+    entry_day = df['_entry'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    exit_day = df['_exit'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    entry_px = df['Entry Price'].to_numpy(dtype=float)
+    exit_px = entry_px * (1 + df['Final Return %'].to_numpy(dtype=float) / 100)
+    vol = df['Volatility %'].to_numpy(dtype=float) if 'Volatility %' in df else np.full(len(df), np.nan)
+
+    slip = slippage_bps / 10_000
+    fee_rate = commission_bps / 10_000
+
+    cash = float(initial_capital)
+    book = 0.0 # Cost basis of open positions
+    open_heap = [] # (exit_day, seq, symbol, shares, cost, buy_fill)
+    held = set()
+    trades = []
+    eq_days, eq_values = [], []
+    skipped = 0
+
+    def close_until(day: int):
+        nonlocal cash, book
+        while open_heap and open_heap[0][0] <= day:
+            x_day, seq, symbol, shares, cost, buy_fill = heapq.heappop(open_heap)
+            sell_fill = exit_px[seq] * (1 - slip)
+            proceeds = shares * sell_fill
+            proceeds -= commission + proceeds * fee_rate
+            cash += proceeds
+            book -= cost
+            held.discard(symbol)
+            trades.append({
+                'Symbol': symbol,
+                'Entry Date': str(np.datetime64(int(entry_day[seq]), 'D')),
+                'Exit Date': str(np.datetime64(int(x_day), 'D')),
+                'Shares': shares,
+                'Entry Fill': round(buy_fill, 4),
+                'Exit Fill': round(sell_fill, 4),
+                'Cost': round(cost, 2),
+                'Proceeds': round(proceeds, 2),
+                'P&L': round(proceeds - cost, 2),
+                'Return %': round((proceeds - cost) / cost * 100, 2),
+            })
+            eq_days.append(x_day)
+            eq_values.append(cash + book)
+
+    for i in range(len(df)):
+        day = int(entry_day[i])
+        close_until(day)
+
+        if len(open_heap) >= slots or symbols[i] in held:
+            skipped += 1
+            continue
+
+        alloc = (cash + book) / slots
+        if sizing == VOLATILITY and vol[i] > 0:
+            alloc *= min(1.0, target_volatility_pct / vol[i])
+        alloc = min(alloc, cash)
+
+        buy_fill = entry_px[i] * (1 + slip)
+        shares = np.floor((alloc - commission) / (buy_fill * (1 + fee_rate)))
+        if shares <= 0:
+            skipped += 1
+            continue
+
+        gross = shares * buy_fill
+        cost = gross + commission + gross * fee_rate
+        cash -= cost
+        book += cost
+        held.add(symbols[i])
+        heapq.heappush(open_heap, (int(exit_day[i]), i, symbols[i], float(shares), cost, buy_fill))
+
+    close_until(np.iinfo(np.int64).max)
+
+    equity = pd.DataFrame({
+        'date': pd.to_datetime(np.array(eq_days, dtype='datetime64[D]')),
+        'equity': eq_values,
+    })
+    if not equity.empty:
+        # Several exits on one day -> keep the end-of-day value
+        equity = equity.groupby('date', as_index=False).last()
+        peak = np.maximum.accumulate(np.concatenate([[initial_capital], equity['equity'].to_numpy()]))[1:]
+        equity['drawdown_pct'] = (equity['equity'] / peak - 1) * 100
+    else:
+        equity['drawdown_pct'] = pd.Series(dtype=float)
+
+    trades_df = pd.DataFrame(trades)
+    final_equity = float(cash)
+    stats = {
+        'initial_capital': initial_capital,
+        'final_equity': round(final_equity, 2),
+        'total_return_pct': round((final_equity / initial_capital - 1) * 100, 2),
+        'max_drawdown_pct': round(float(equity['drawdown_pct'].min()), 2) if not equity.empty else 0.0,
+        'trades': len(trades_df),
+        'skipped_signals': skipped,
+        'win_rate_pct': round(float((trades_df['P&L'] > 0).mean() * 100), 1) if len(trades_df) else 0.0,
+        'slots': slots,
+        'sizing': sizing,
+    }
+    return PortfolioResult(trades_df, equity, stats)
+
+def main():
+    parser = argparse.ArgumentParser(description='Portfolio simulation over backtest signals')
+    parser.add_argument('--signals', default=str(config.BASE_DIR / 'backtest_results.csv'))
+    parser.add_argument('--capital', type=float, default=100_000.0)
+    parser.add_argument('--slots', type=int, default=10)
+    parser.add_argument('--sizing', choices=[EQUAL, VOLATILITY], default=EQUAL)
+    parser.add_argument('--target-vol', type=float, default=3.0, help='Target daily volatility %% for volatility sizing')
+    parser.add_argument('--slippage-bps', type=float, default=10.0)
+    parser.add_argument('--commission', type=float, default=1.0, help='Flat commission per fill')
+    parser.add_argument('--commission-bps', type=float, default=0.0)
+    parser.add_argument('--equity-output', default=str(config.BASE_DIR / 'portfolio_equity.csv'))
+    args = parser.parse_args()
+
+    result = simulate_portfolio(pd.read_csv(args.signals), args.capital, args.slots, args.sizing, args.target_vol,
+                                args.slippage_bps, args.commission, args.commission_bps)
+    for key, value in result.stats.items():
+        print(f"{key}: {value}")
+    result.equity.to_csv(args.equity_output, index=False)
+    print(f"Saved equity curve to {args.equity_output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Parallel multi-symbol backtest over the local history store.
+
+The symbol universe is split into chunks that are backtested in a
+ProcessPoolExecutor; each worker reads its symbols straight from the store
+(their precomputed daily features when up to date, otherwise prices through
+the shared memory-mapped universe matrix when one is built) and finished chunks are streamed into a single results table (and
+optionally appended to a CSV as they arrive).
+
+Usage:
+    python -m stock_scanner.backtest.runner --all --workers 8
+    python -m stock_scanner.backtest.runner --symbols-file old/small_cap_price_targets_full.csv --ingest
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from stock_scanner.backtest.engine import backtest_symbol, SIGNAL_COLUMNS
+from stock_scanner.config import config
+from stock_scanner.storage import universe
+from stock_scanner.storage.features import FeatureStore, covers
+from stock_scanner.storage.history import HistoryStore
+from stock_scanner.storage.price_targets import PriceTargetStore
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def backtest_chunk(store_root: str, symbols: List[str], params: Dict[str, Any]) -> pd.DataFrame:
+    """Worker entry point: backtests `symbols` reading prices/targets from the store."""
+    store = HistoryStore(Path(store_root))
+    targets = PriceTargetStore(store.targets_dir)
+    feature_store = FeatureStore(store.root / "features")
+    stored = {}
+    if covers([params.get('holding_period', config.BACKTEST_HOLDING_PERIOD_DAYS)]):
+        fresh = feature_store.fresh_symbols(store, symbols)
+        if fresh:
+            stored = dict(tuple(feature_store.load_universe(symbols=fresh).groupby('symbol', sort=False)))
+    frames = []
+    for symbol in symbols:
+        features = stored.get(symbol)
+        prices = universe.load_prices(store, symbol) if features is None else None
+        if features is None and (prices is None or prices.empty):
+            continue
+        try:
+            signals = backtest_symbol(symbol, prices, targets.as_of_index(symbol), features=features, **params)
+        except Exception as e:
+            logger.error(f"Backtest failed for {symbol}: {e}", extra={"symbol": symbol})
+            continue
+        if not signals.empty:
+            frames.append(signals)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+def run_backtest(symbols: List[str], store: Optional[HistoryStore] = None, workers: Optional[int] = None,
+                 chunk_size: int = 25, output_path: Optional[str] = None, **params) -> pd.DataFrame:
+    """
+    Backtests `symbols` across `workers` processes (default: all cores) and
+    returns the combined signals sorted by date. `params` are passed through to
+    `backtest_symbol` (thresholds, holding_period, lookback_days...).
+    """
+    store = store or HistoryStore()
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(symbols, max(1, chunk_size))
+    frames = []
+    wrote_header = False
+
+    start = time.perf_counter()
+    if workers == 1:
+        # Avoids process start-up cost for small universes / debugging
+        executor = None
+        completed = (backtest_chunk(str(store.root), chunk, params) for chunk in chunks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = [executor.submit(backtest_chunk, str(store.root), chunk, params) for chunk in chunks]
+        completed = (f.result() for f in as_completed(futures))
+
+    try:
+        for done, frame in enumerate(completed, start=1):
+            if not frame.empty:
+                frames.append(frame)
+                if output_path:
+                    frame.to_csv(output_path, mode='a' if wrote_header else 'w', header=not wrote_header, index=False)
+                    wrote_header = True
+            logger.info(f"Backtested chunk {done}/{len(chunks)} ({sum(len(f) for f in frames)} signals so far)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Backtested {len(symbols)} symbols in {elapsed:.2f}s with {workers} worker(s)")
+
+    if not frames:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(['Date', 'Symbol'], kind='stable').reset_index(drop=True)
+
+def summarize(df: pd.DataFrame) -> Dict[str, float]:
+    """Headline stats, as printed by the original backtest script."""
+    return {
+        "signals": len(df),
+        "avg_max_gain": df['Max Gain %'].mean(),
+        "avg_final_return": df['Final Return %'].mean(),
+        "win_rate": (df['Max Gain %'] > 5.0).mean() * 100, # Stocks that eventually popped > 5%
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel backtest over the local history store')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--all', action='store_true', help='Backtest every symbol in the history store')
+    source.add_argument('--symbols-file', help='CSV with a Symbol column')
+    parser.add_argument('--ingest', action='store_true', help='Download missing symbols into the store first')
+    parser.add_argument('--update-targets', action='store_true',
+                        help='Fetch new price-target events (past the stored watermark) for every symbol')
+    parser.add_argument('--build-universe', action='store_true',
+                        help='Rebuild the memory-mapped universe matrix the workers share')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=25, help='Symbols per worker task')
+    parser.add_argument('--lookback-days', type=int, default=config.BACKTEST_LOOKBACK_DAYS,
+                        help='Only test signals in the last N days (0 = full history)')
+    parser.add_argument('--output', default=str(config.BASE_DIR / 'backtest_results.csv'))
+    args = parser.parse_args()
+
+    store = HistoryStore()
+    if args.all:
+        symbols = store.symbols()
+    else:
+        symbols = pd.read_csv(args.symbols_file)['Symbol'].dropna().astype(str).unique().tolist()
+
+    if args.ingest:
+        from stock_scanner.utils.api_client import FMPClient
+        client = FMPClient()
+        missing = [s for s in symbols if not store.has_prices(s)]
+        logger.info(f"Ingesting {len(missing)} symbols into {store.root}...")
+        for symbol in missing:
+            try:
+                store.ingest(symbol, client)
+            except Exception as e:
+                logger.error(f"Ingest failed for {symbol}: {e}", extra={"symbol": symbol})
+
+    if args.update_targets:
+        from stock_scanner.utils.api_client import FMPClient
+        client = FMPClient()
+        target_store = PriceTargetStore(store.targets_dir)
+        for symbol in symbols:
+            try:
+                target_store.update(symbol, client)
+            except Exception as e:
+                logger.error(f"Price-target update failed for {symbol}: {e}", extra={"symbol": symbol})
+
+    if args.build_universe:
+        universe.build(store)
+
+    if not symbols:
+        print("No symbols to backtest.")
+        return
+
+    df = run_backtest(symbols, store, workers=args.workers, chunk_size=args.chunk_size,
+                      output_path=args.output, lookback_days=args.lookback_days or None)
+    if df.empty:
+        print("No signals found in the backtest period.")
+        return
+
+    # Rewrite sorted now that all chunks are in
+    df.to_csv(args.output, index=False)
+    stats = summarize(df)
+    print(f"Total Signals: {stats['signals']}")
+    print(f"Average Max Gain: {stats['avg_max_gain']:.2f}%")
+    print(f"Average Final Return: {stats['avg_final_return']:.2f}%")
+    print(f"Win Rate (>5% gain at any point): {stats['win_rate']:.0f}%")
+    print(f"Saved detailed results to {args.output}")
+
+if __name__ == "__main__":
+    main()
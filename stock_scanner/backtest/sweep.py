@@ -0,0 +1,227 @@
+"""
+Parameter sweep: evaluate a whole grid of strategy thresholds in one pass.
+
+Per-day features (volume ratio, average volume, upside, and forward max gain /
+final return for every holding period) are read from the materialized feature
+store (storage/features.py) for every symbol whose features are up to date,
+and computed once per symbol otherwise. The grid
+is then evaluated by broadcasting the threshold vectors against those feature
+columns, so a 5x5x4x3 grid costs one data pass instead of 300 backtests.
+
+Usage:
+    python -m stock_scanner.backtest.sweep --spike 1.5,2,3 --upside 10,20,40 --holding 5,10,15
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from stock_scanner.backtest.engine import compute_signal_frame, forward_outcome, prepare_prices, prepare_targets
+from stock_scanner.config import config
+from stock_scanner.storage import universe
+from stock_scanner.storage.features import FeatureStore, covers
+from stock_scanner.storage.history import HistoryStore
+from stock_scanner.storage.price_targets import AsOfIndex, PriceTargetStore
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WIN_THRESHOLD_PCT = 5.0 # Same ">5% at any point" win definition as the backtest summary
+
+# Rows per block when multiplying the grid mask against outcomes (bounds memory)
+_BLOCK_ROWS = 250_000
+
+def compute_features(symbol: str, prices: Union[List[Dict[str, Any]], pd.DataFrame],
+                     targets: Optional[Union[List[Dict[str, Any]], pd.DataFrame, AsOfIndex]],
+                     holding_periods: Sequence[int],
+                     lookback_days: Optional[int] = config.BACKTEST_LOOKBACK_DAYS,
+                     as_of: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    One row per candidate day with: vol_ratio, vol_ma, upside and, for each
+    holding period H, max_gain_H / final_return_H (in %). Days without a
+    volume average, a price target or any forward data are dropped.
+    """
+    if prices is None or len(prices) == 0:
+        return pd.DataFrame()
+
+    if not isinstance(targets, AsOfIndex):
+        targets = prepare_targets(targets)
+    df = compute_signal_frame(prepare_prices(prices), targets, max(holding_periods))
+    valid = df['vol_ma'].notna() & df['upside'].notna() & (df['days_observed'] > 0)
+    if lookback_days is not None:
+        valid &= df['date'] >= (as_of or datetime.now()) - timedelta(days=lookback_days)
+
+    out = pd.DataFrame({
+        'symbol': symbol,
+        'date': df['date'],
+        'vol_ratio': df['vol_ratio'],
+        'vol_ma': df['vol_ma'],
+        'upside': df['upside'],
+    })
+    entry = df['close'].to_numpy()
+    for h in holding_periods:
+        max_price, exit_price, _ = forward_outcome(df, h)
+        out[f'max_gain_{h}'] = (max_price - entry) / entry * 100
+        out[f'final_return_{h}'] = (exit_price - entry) / entry * 100
+    return out[valid.to_numpy()].reset_index(drop=True)
+
+def stored_features(feature_store: FeatureStore, targets: PriceTargetStore, symbols: List[str],
+                    holding_periods: Sequence[int],
+                    lookback_days: Optional[int] = config.BACKTEST_LOOKBACK_DAYS,
+                    as_of: Optional[datetime] = None) -> pd.DataFrame:
+    """`compute_features` rows for `symbols`, read from the feature store in one pass."""
+    columns = (['close', 'vol_ma_30', 'vol_ratio_30', 'fwd_days']
+               + [f'fwd_max_gain_{h}' for h in holding_periods] + [f'fwd_return_{h}' for h in holding_periods])
+    start = (as_of or datetime.now()) - timedelta(days=lookback_days) if lookback_days is not None else None
+    stored = feature_store.load_universe(columns, start=start, symbols=symbols)
+    if stored.empty:
+        return pd.DataFrame()
+
+    target = np.full(len(stored), np.nan)
+    for symbol, rows in stored.groupby('symbol', sort=False).indices.items():
+        index = targets.as_of_index(symbol)
+        if index is not None:
+            target[rows] = index.latest_at(stored['date'].to_numpy()[rows])
+    close = stored['close'].to_numpy()
+    out = pd.DataFrame({
+        'symbol': stored['symbol'],
+        'date': stored['date'],
+        'vol_ratio': stored['vol_ratio_30'],
+        'vol_ma': stored['vol_ma_30'],
+        'upside': (target - close) / close * 100,
+    })
+    for h in holding_periods:
+        out[f'max_gain_{h}'] = stored[f'fwd_max_gain_{h}']
+        out[f'final_return_{h}'] = stored[f'fwd_return_{h}']
+    valid = out['vol_ma'].notna() & out['upside'].notna() & (stored['fwd_days'] > 0)
+    return out[valid.to_numpy()].reset_index(drop=True)
+
+def sweep(features: pd.DataFrame, spike_thresholds: Sequence[float], upside_thresholds: Sequence[float],
+          holding_periods: Sequence[int], min_avg_volumes: Sequence[float] = (config.BACKTEST_MIN_AVG_VOLUME,),
+          win_threshold: float = WIN_THRESHOLD_PCT) -> pd.DataFrame:
+    """
+    Evaluates every (spike, upside, min_avg_volume, holding_period) combination.
+
+    Returns a tidy table with one row per cell: signals, win_rate (%),
+    mean_max_gain (%) and mean_final_return (%).
+    """
+    spikes = np.asarray(spike_thresholds, dtype=float)
+    ups = np.asarray(upside_thresholds, dtype=float)
+    mins = np.asarray(min_avg_volumes, dtype=float)
+    holds = list(holding_periods)
+    n_cells = len(spikes) * len(ups) * len(mins)
+
+    counts = np.zeros(n_cells)
+    sum_gain = np.zeros((n_cells, len(holds)))
+    sum_ret = np.zeros((n_cells, len(holds)))
+    wins = np.zeros((n_cells, len(holds)))
+
+    if len(features):
+        # Rows that fail even the loosest cell can never contribute
+        loose = ((features['vol_ratio'] >= spikes.min()) & (features['upside'] >= ups.min())
+                 & (features['vol_ma'] >= mins.min())).to_numpy()
+        f = features[loose]
+        vr, up, vm = f['vol_ratio'].to_numpy(), f['upside'].to_numpy(), f['vol_ma'].to_numpy()
+        gains = f[[f'max_gain_{h}' for h in holds]].to_numpy()
+        rets = f[[f'final_return_{h}' for h in holds]].to_numpy()
+        won = (gains > win_threshold).astype(float)
+
+        for lo in range(0, len(f), _BLOCK_ROWS):
+            hi = lo + _BLOCK_ROWS
+            # (spike, upside, min_vol, rows) membership via broadcasting
+            mask = ((vr[lo:hi] >= spikes[:, None, None, None])
+                    & (up[lo:hi] >= ups[None, :, None, None])
+                    & (vm[lo:hi] >= mins[None, None, :, None]))
+            flat = mask.reshape(n_cells, -1).astype(float)
+            counts += flat.sum(axis=1)
+            sum_gain += flat @ gains[lo:hi]
+            sum_ret += flat @ rets[lo:hi]
+            wins += flat @ won[lo:hi]
+
+    grid = np.array(np.meshgrid(spikes, ups, mins, indexing='ij')).reshape(3, -1).T
+    rows = []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for j, h in enumerate(holds):
+            rows.append(pd.DataFrame({
+                'spike_threshold': grid[:, 0],
+                'upside_threshold': grid[:, 1],
+                'min_avg_volume': grid[:, 2],
+                'holding_period': h,
+                'signals': counts.astype(int),
+                'win_rate': wins[:, j] / counts * 100,
+                'mean_max_gain': sum_gain[:, j] / counts,
+                'mean_final_return': sum_ret[:, j] / counts,
+            }))
+    return pd.concat(rows, ignore_index=True)
+
+def _features_chunk(store_root: str, symbols: List[str], holding_periods: List[int],
+                    lookback_days: Optional[int]) -> pd.DataFrame:
+    store = HistoryStore(Path(store_root))
+    targets = PriceTargetStore(store.targets_dir)
+    frames = [compute_features(s, universe.load_prices(store, s), targets.as_of_index(s), holding_periods, lookback_days)
+              for s in symbols if store.has_prices(s)]
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def build_features(symbols: List[str], holding_periods: List[int], store: Optional[HistoryStore] = None,
+                   lookback_days: Optional[int] = config.BACKTEST_LOOKBACK_DAYS,
+                   workers: Optional[int] = None, chunk_size: int = 50) -> pd.DataFrame:
+    """
+    Sweep features for the whole universe: read from the feature store where
+    it is up to date, computed across worker processes for the rest.
+    """
+    store = store or HistoryStore()
+    frames = []
+    if covers(holding_periods):
+        feature_store = FeatureStore(store.root / "features")
+        fresh = feature_store.fresh_symbols(store, symbols)
+        if fresh:
+            frames.append(stored_features(feature_store, PriceTargetStore(store.targets_dir), fresh,
+                                          holding_periods, lookback_days))
+            logger.info(f"Read features for {len(fresh)}/{len(symbols)} symbols from {feature_store.root}")
+            fresh = set(fresh)
+            symbols = [s for s in symbols if s not in fresh]
+
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    args = [(str(store.root), c, list(holding_periods), lookback_days) for c in chunks]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        frames += [_features_chunk(*a) for a in args]
+    elif args:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames += list(executor.map(_features_chunk, *zip(*args)))
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(',') if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest parameter sweep over the local history store')
+    parser.add_argument('--spike', type=_floats, default=[1.5, 2.0, 3.0], help='Volume spike thresholds, e.g. 1.5,2,3')
+    parser.add_argument('--upside', type=_floats, default=[10.0, 20.0, 30.0, 50.0], help='Upside thresholds in %%')
+    parser.add_argument('--holding', type=_floats, default=[5, 10, 15], help='Holding periods in sessions')
+    parser.add_argument('--min-volume', type=_floats, default=[config.BACKTEST_MIN_AVG_VOLUME], help='Min avg volume')
+    parser.add_argument('--lookback-days', type=int, default=config.BACKTEST_LOOKBACK_DAYS,
+                        help='Only test signals in the last N days (0 = full history)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=str(config.BASE_DIR / 'sweep_results.csv'))
+    args = parser.parse_args()
+
+    holding = [int(h) for h in args.holding]
+    features = build_features(HistoryStore().symbols(), holding, lookback_days=args.lookback_days or None,
+                              workers=args.workers)
+    logger.info(f"Computed {len(features)} feature rows; evaluating grid...")
+
+    cube = sweep(features, args.spike, args.upside, holding, args.min_volume)
+    cube.to_csv(args.output, index=False)
+    print(cube.sort_values('win_rate', ascending=False).head(20).to_string(index=False))
+    print(f"\nSaved {len(cube)} cells to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,18 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Export LangChain callbacks/traces from a background thread instead of the caller's
+os.environ.setdefault("LANGCHAIN_CALLBACKS_BACKGROUND", "true")
+
 class Config:
     """Application configuration."""
     
     # Base Directory
     BASE_DIR: Path = Path(__file__).parent.parent.absolute()
     
+    # Local data store (price history, targets, features, run snapshots)
+    DATA_DIR: Path = Path(os.environ.get("DATA_DIR", str(BASE_DIR / "data")))
+    
     # API Keys
     FMP_API_KEY: str = os.environ.get("FMP_API_KEY", "")
     LANGCHAIN_API_KEY: Optional[str] = os.environ.get("LANGCHAIN_API_KEY")
@@ -25,6 +31,10 @@ class Config:
     # API URLs
     FMP_BASE_URL_V3: str = "https://financialmodelingprep.com/api/v3"
     FMP_BASE_URL_V4: str = "https://financialmodelingprep.com/api/v4"
+    # Daily FMP call allowance shared across runs (0 = count calls but don't budget stages)
+    FMP_DAILY_CALL_LIMIT: int = int(os.environ.get("FMP_DAILY_CALL_LIMIT", "0"))
+    # Order screener candidates by quoted volume / average volume before the per-symbol stages
+    PRIORITIZE_CANDIDATES: bool = os.environ.get("PRIORITIZE_CANDIDATES", "true").lower() == "true"
     
     # Scanning Parameters
     DEFAULT_MIN_MARKET_CAP: int = 10_000_000
@@ -32,10 +42,68 @@ class Config:
     DEFAULT_MIN_VOLUME: int = 50_000
     DEFAULT_VOLUME_SPIKE_THRESHOLD: float = 1.5
     DEFAULT_UPSIDE_THRESHOLD: float = 20.0
+    # Multi-day spike persistence (last SPIKE_RECENT_DAYS sessions vs. the previous SPIKE_MA_DAYS average)
+    SPIKE_RECENT_DAYS: int = 5
+    SPIKE_MA_DAYS: int = 60
+    SPIKE_RATIO_THRESHOLD: float = 2.0
+    # Drop spikes with fewer persistent spike days than this (0 = rank only, don't filter)
+    VOLUME_MIN_SPIKE_DAYS: int = int(os.environ.get("VOLUME_MIN_SPIKE_DAYS", "0"))
+    # Persistent ring-buffer volume state: scores non-spikes without downloading history
+    VOLUME_STATE_ENABLED: bool = os.environ.get("VOLUME_STATE_ENABLED", "true").lower() == "true"
+    ANALYST_TREND_DAYS: int = 90 # Consensus-target trend window, read from the local price-target store
+    # Deadline-aware scans (--deadline): time kept back for the CSV/email, and the time left
+    # below which CEO reports, then company reports, then LLM sentiment are dropped
+    DEADLINE_RESERVE_SECONDS: int = int(os.environ.get("DEADLINE_RESERVE_SECONDS", "120"))
+    DEADLINE_LEVEL_SECONDS: tuple = tuple(int(s) for s in os.environ.get("DEADLINE_LEVEL_SECONDS", "900,600,300").split(","))
+    # Cost-based filter ordering from recent run summaries (stock_scanner/planner.py)
+    PLANNER_ENABLED: bool = os.environ.get("PLANNER_ENABLED", "true").lower() == "true"
+    PLANNER_HISTORY_RUNS: int = 5
+    # Delta reporting: repeat candidates reuse their last reports plus a "what changed" addendum
+    DELTA_REPORTS: bool = os.environ.get("DELTA_REPORTS", "true").lower() == "true"
+    REPORT_MAX_AGE_DAYS: int = int(os.environ.get("REPORT_MAX_AGE_DAYS", "7")) # Older reports are regenerated
+    
+    # Intraday polling (python -m stock_scanner.intraday)
+    INTRADAY_INTERVAL_MINUTES: float = float(os.environ.get("INTRADAY_INTERVAL_MINUTES", "5"))
+    INTRADAY_MIN_SESSION_FRACTION: float = 0.05 # Skip polls before ~5% of a day's volume is normally in
+    
+    # Scanner daemon (python -m stock_scanner.daemon)
+    DAEMON_SCAN_AT: str = os.environ.get("DAEMON_SCAN_AT", "22:00") # UTC, weekdays (same as the workflow cron)
+    DAEMON_SOCKET: Path = Path(os.environ.get("DAEMON_SOCKET", str(DATA_DIR / "daemon.sock")))
+    
+    # Local results API (python -m stock_scanner.api)
+    API_HOST: str = os.environ.get("API_HOST", "127.0.0.1")
+    API_PORT: int = int(os.environ.get("API_PORT", "8765"))
+    
+    # Backtesting
+    BACKTEST_HOLDING_PERIOD_DAYS: int = 15 # Check max gain within 3 weeks (15 trading days)
+    BACKTEST_LOOKBACK_DAYS: int = 180 # Backtest over last 6 months
+    BACKTEST_MIN_AVG_VOLUME: int = 50_000 # Minimum liquidity
+    BACKTEST_VOLUME_MA_DAYS: int = 30
+    BACKTEST_HISTORY_DAYS: int = 1260 # ~5 years of sessions kept in the local history store
+    
+    # LLM
+    LLM_MODEL: str = os.environ.get("LLM_MODEL", "gemini-2.0-flash")
+    LLM_MAX_ATTEMPTS: int = int(os.environ.get("LLM_MAX_ATTEMPTS", "3"))
+    # USD per 1M tokens, used for cost estimates (defaults: Gemini 2.0 Flash list price)
+    LLM_INPUT_COST_PER_1M: float = float(os.environ.get("LLM_INPUT_COST_PER_1M", "0.10"))
+    LLM_OUTPUT_COST_PER_1M: float = float(os.environ.get("LLM_OUTPUT_COST_PER_1M", "0.40"))
+    # Per-run spend cap for report generation; 0 disables the guard
+    LLM_RUN_BUDGET_USD: float = float(os.environ.get("LLM_RUN_BUDGET_USD", "0"))
+    
+    # Tracing (LangSmith). Per-category sampling: high-frequency FMP "api" spans are
+    # sampled and rolled up into one summary span per node; "llm" and "node" spans are kept.
+    TRACE_SAMPLE_RATES: str = os.environ.get("TRACE_SAMPLE_RATES", "api=0.01,llm=1.0,node=1.0")
     
     # Logging
     LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO")
     LOG_FILE: str = str(BASE_DIR / "daily_scan.log")
+    LOG_FORMAT: str = os.environ.get("LOG_FORMAT", "text") # "text" or "json" (one object per line)
+    # Per-module overrides, e.g. "stock_scanner.utils.api_client=WARNING,stock_scanner.nodes.volume=DEBUG"
+    LOG_LEVELS: str = os.environ.get("LOG_LEVELS", "")
+    
+    # Metrics
+    # Optional path for a Prometheus node_exporter textfile (e.g. /var/lib/node_exporter/stock_scanner.prom)
+    METRICS_PROMETHEUS_FILE: Optional[str] = os.environ.get("METRICS_PROMETHEUS_FILE")
     
     @classmethod
     def validate(cls):
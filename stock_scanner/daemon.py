@@ -0,0 +1,202 @@
+"""
+Long-running scanner daemon.
+
+Keeps the compiled graph, the pooled FMP session, the LLM client and the
+in-memory caches (price-target indexes, universe matrix, volume state) warm
+across scans, so only the first cycle pays for imports and connection setup.
+Scans run on a schedule (weekdays at `--at` UTC, or every `--every` minutes)
+or on demand through a local Unix control socket speaking one JSON object
+per line:
+
+    {"cmd": "scan"}     queue a scan now
+    {"cmd": "status"}   schedule, current state and recent cycle timings
+    {"cmd": "stop"}     finish the running cycle and exit
+
+Usage:
+    python -m stock_scanner.daemon [--at 22:00 | --every 60] [--no-email]
+    python -m stock_scanner.daemon --send status
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def next_scheduled(now: datetime, at: Optional[str] = None, every_minutes: Optional[float] = None) -> datetime:
+    """Next scan time after `now` (UTC): every `every_minutes`, else the next weekday at `at` (HH:MM)."""
+    if every_minutes:
+        return now + timedelta(minutes=every_minutes)
+    hour, minute = (int(part) for part in (at or config.DAEMON_SCAN_AT).split(":"))
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+class ScannerDaemon:
+    """Runs scans one at a time from a queue fed by the schedule and the control socket."""
+
+    def __init__(self, at: Optional[str] = None, every_minutes: Optional[float] = None,
+                 email: bool = True, history: int = 20):
+        self.at = at or config.DAEMON_SCAN_AT
+        self.every_minutes = every_minutes
+        self.email = email
+        self.cycles = deque(maxlen=history)
+        self.requests: "queue.Queue[str]" = queue.Queue()
+        self.stopping = threading.Event()
+        self.running: Optional[str] = None
+        self.next_run = next_scheduled(datetime.now(timezone.utc), self.at, self.every_minutes)
+        self.warm_seconds: Optional[float] = None
+
+    def warm(self):
+        """Builds the long-lived objects up front so the first scan is not a cold start either."""
+        start = time.perf_counter()
+        from stock_scanner.graph import get_app
+        from stock_scanner.planner import plan
+        from stock_scanner.utils.api_client import FMPClient
+
+        get_app(order=plan()["order"]) # The order the next scan will be planned with
+        FMPClient()
+        if config.GOOGLE_API_KEY:
+            from stock_scanner.utils.llm_client import get_llm
+            get_llm()
+        self.warm_seconds = round(time.perf_counter() - start, 3)
+        logger.info(f"Daemon warm-up took {self.warm_seconds}s")
+
+    def run_cycle(self, trigger: str) -> Dict:
+        """Runs one scan and records its timings; failures are logged and recorded, never raised."""
+        from stock_scanner.main import run_scan
+        from stock_scanner.utils.metrics import metrics
+
+        self.running = trigger
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        cycle = {"trigger": trigger, "started": started.isoformat(timespec="seconds")}
+        try:
+            cycle.update(run_scan(send_email=self.email))
+            cycle["ok"] = True
+        except Exception as e:
+            logger.error(f"Daemon scan failed: {e}", exc_info=True)
+            cycle.update({"ok": False, "error": str(e)})
+        finally:
+            self.running = None
+            from stock_scanner.utils.tracing import flush_traces
+            flush_traces()
+
+        cycle["seconds"] = round(time.perf_counter() - start, 3)
+        cycle["nodes"] = {name: round(node.get("seconds", 0.0), 3)
+                          for name, node in metrics.snapshot().get("nodes", {}).items()}
+        self.cycles.append(cycle)
+        timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in cycle["nodes"].items())
+        logger.info(f"Cycle #{len(self.cycles)} ({trigger}) took {cycle['seconds']:.2f}s: {timings}")
+        return cycle
+
+    def status(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "running": self.running,
+            "queued": self.requests.qsize(),
+            "next_run": self.next_run.isoformat(timespec="seconds"),
+            "warm_seconds": self.warm_seconds,
+            "cycles": list(self.cycles),
+        }
+
+    def handle(self, command: Dict) -> Dict:
+        """Control-socket command -> JSON reply."""
+        cmd = command.get("cmd")
+        if cmd == "scan":
+            self.requests.put("manual")
+            return {"ok": True, "queued": self.requests.qsize()}
+        if cmd == "status":
+            return {"ok": True, **self.status()}
+        if cmd == "stop":
+            self.stopping.set()
+            self.requests.put("stop")
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {cmd!r}"}
+
+    def serve(self, socket_path: Path):
+        """Main loop: control socket on a background thread, scans on this one."""
+        server = _control_server(self, socket_path)
+        threading.Thread(target=server.serve_forever, name="daemon-control", daemon=True).start()
+        logger.info(f"Scanner daemon listening on {socket_path}; next scheduled scan {self.next_run.isoformat()}")
+        try:
+            while not self.stopping.is_set():
+                timeout = (self.next_run - datetime.now(timezone.utc)).total_seconds()
+                try:
+                    trigger = self.requests.get(timeout=max(0.0, timeout))
+                except queue.Empty:
+                    trigger = "schedule"
+                    self.next_run = next_scheduled(datetime.now(timezone.utc), self.at, self.every_minutes)
+                if trigger == "stop":
+                    break
+                self.run_cycle(trigger)
+        finally:
+            server.shutdown()
+            server.server_close()
+            socket_path.unlink(missing_ok=True)
+            logger.info("Scanner daemon stopped.")
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.daemon_ref.handle(json.loads(line))
+            except ValueError as e:
+                reply = {"ok": False, "error": f"bad request: {e}"}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+def _control_server(daemon: ScannerDaemon, socket_path: Path) -> socketserver.UnixStreamServer:
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True) # Stale socket from a daemon that did not exit cleanly
+    server = socketserver.ThreadingUnixStreamServer(str(socket_path), _ControlHandler)
+    server.daemon_threads = True
+    server.daemon_ref = daemon
+    return server
+
+def send_command(socket_path: Path, cmd: str, timeout: float = 10.0) -> Dict:
+    """Sends one command to a running daemon and returns its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps({"cmd": cmd}) + "\n").encode())
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-running scanner daemon')
+    parser.add_argument('--at', default=config.DAEMON_SCAN_AT, help='Daily scan time, HH:MM UTC (weekdays)')
+    parser.add_argument('--every', type=float, help='Scan every N minutes instead of daily')
+    parser.add_argument('--no-email', action='store_true', help='Do not email scan results')
+    parser.add_argument('--socket', type=Path, default=config.DAEMON_SOCKET, help='Control socket path')
+    parser.add_argument('--send', choices=['scan', 'status', 'stop'], help='Send a command to a running daemon')
+    args = parser.parse_args()
+
+    if args.send:
+        try:
+            print(json.dumps(send_command(args.socket, args.send), indent=2))
+        except OSError as e:
+            print(f"No daemon reachable at {args.socket}: {e}")
+            sys.exit(1)
+        return
+
+    daemon = ScannerDaemon(at=args.at, every_minutes=args.every, email=not args.no_email)
+    daemon.warm()
+    daemon.serve(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,70 @@
-from langgraph.graph import StateGraph, END
-from stock_scanner.state import GraphState
-from stock_scanner.nodes.screener import screener_node
-from stock_scanner.nodes.volume import volume_node
-from stock_scanner.nodes.analyst import analyst_node
-from stock_scanner.nodes.news import news_node
-from stock_scanner.nodes.reporting import reporting_node
+from functools import partial
+from typing import List, Optional
+
 from stock_scanner.config import config
+from stock_scanner.planner import FILTER_KEYS, FILTERS, pipeline
+from stock_scanner.utils.metrics import instrument_node
+
+# Compiled graphs keyed by (entry node, filter order)
+_apps = {}
+
+PIPELINE = pipeline()
 
-def create_graph():
-    """Defines and compiles the LangGraph workflow."""
+def create_graph(start: str = "screener", order: Optional[List[str]] = None):
+    """
+    Defines and compiles the LangGraph workflow. `start` picks the entry node,
+    e.g. "analyst_filter" for a sub-graph fed with `spiked_stocks` directly.
+    `order` is the filter order chosen by the planner (default: FILTERS).
+    """
+    # Heavy imports (langgraph, langchain via the LLM nodes) are deferred until
+    # the graph is actually built so CLI startup stays fast.
+    from langgraph.graph import StateGraph, END
+    from stock_scanner.state import GraphState
+    from stock_scanner.nodes.screener import screener_node
+    from stock_scanner.nodes.volume import volume_node
+    from stock_scanner.nodes.analyst import analyst_node
+    from stock_scanner.nodes.news import news_node
+    from stock_scanner.nodes.reporting import reporting_node
+
+    order = list(order or FILTERS)
+    filters = {"volume_filter": volume_node, "analyst_filter": analyst_node}
     
+    # Instrumented with wall time and items in/out
+    nodes = {
+        "screener": instrument_node("screener", screener_node, None, "candidates"),
+        "news_analysis": instrument_node("news_analysis", news_node, "analyst_picks", "news_analyzed_stocks"),
+        "reporter": instrument_node("reporter", reporting_node, "news_analyzed_stocks", "results"),
+    }
+    # Each filter reads the previous filter's survivors, whatever the order
+    for i, name in enumerate(order):
+        in_key, out_key = FILTER_KEYS[i], FILTER_KEYS[i + 1]
+        nodes[name] = instrument_node(name, partial(filters[name], in_key=in_key, out_key=out_key), in_key, out_key)
+    steps = pipeline(order)
+    steps = steps[steps.index(start):]
+
     workflow = StateGraph(GraphState)
-    
-    # Add Nodes
-    workflow.add_node("screener", screener_node)
-    workflow.add_node("volume_filter", volume_node)
-    workflow.add_node("analyst_filter", analyst_node)
-    workflow.add_node("news_analysis", news_node)
-    workflow.add_node("reporter", reporting_node)
-    
-    # Add Edges (Linear Flow)
-    workflow.set_entry_point("screener")
-    workflow.add_edge("screener", "volume_filter")
-    workflow.add_edge("volume_filter", "analyst_filter")
-    workflow.add_edge("analyst_filter", "news_analysis")
-    workflow.add_edge("news_analysis", "reporter")
-    workflow.add_edge("reporter", END)
-    
+    for name in steps:
+        workflow.add_node(name, nodes[name])
+
+    # Linear flow from the entry node
+    workflow.set_entry_point(steps[0])
+    for current, following in zip(steps, steps[1:]):
+        workflow.add_edge(current, following)
+    workflow.add_edge(steps[-1], END)
+
     # Compile
     app = workflow.compile()
     return app
 
-app = create_graph()
+def get_app(start: str = "screener", order: Optional[List[str]] = None):
+    """Returns the compiled workflow for `start` and `order`, compiling it on first use."""
+    key = (start, tuple(order or FILTERS))
+    if key not in _apps:
+        _apps[key] = create_graph(start, order)
+    return _apps[key]
+
+def __getattr__(name):
+    # Backwards compatibility for `from stock_scanner.graph import app`
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
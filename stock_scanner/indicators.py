@@ -0,0 +1,102 @@
+"""
+Vectorized rolling indicators over (symbols x days) arrays.
+
+Every function takes a 1-D or 2-D float array with time on the last axis and
+returns an array of the same shape. Like pandas' `rolling(window)` defaults,
+a value is NaN until a full window is available or when the window contains
+a NaN. Sums are built from cumulative sums (O(days) per symbol, independent
+of the window); max and percentile rank use `sliding_window_view`.
+
+These replace per-window Python callbacks such as
+`rolling(60).apply(lambda x: (x.iloc[-1] - x.mean()) / x.std())`.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+def _window_sums(x: np.ndarray, window: int, power: int = 1):
+    """Rolling sum of x**power and the count of NaNs per window (aligned to the window end)."""
+    nan = np.isnan(x)
+    values = np.where(nan, 0.0, x) ** power
+    zero = np.zeros(x.shape[:-1] + (1,))
+    csum = np.concatenate([zero, np.cumsum(values, axis=-1)], axis=-1)
+    cnan = np.concatenate([zero, np.cumsum(nan, axis=-1)], axis=-1)
+    sums = csum[..., window:] - csum[..., :-window]
+    nans = cnan[..., window:] - cnan[..., :-window]
+    return sums, nans
+
+def _pad(values: np.ndarray, window: int) -> np.ndarray:
+    """Left-pads a window-aligned result with NaN back to the input length."""
+    pad = np.full(values.shape[:-1] + (window - 1,), np.nan)
+    return np.concatenate([pad, values], axis=-1)
+
+def shift(x, periods: int = 1) -> np.ndarray:
+    """Shifts along the time axis (positive = lag), filling with NaN."""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if periods > 0:
+        out[..., periods:] = x[..., :-periods]
+    elif periods < 0:
+        out[..., :periods] = x[..., -periods:]
+    else:
+        out[...] = x
+    return out
+
+def rolling_sum(x, window: int) -> np.ndarray:
+    x = _as_float(x)
+    if x.shape[-1] < window:
+        return np.full_like(x, np.nan)
+    sums, nans = _window_sums(x, window)
+    return _pad(np.where(nans > 0, np.nan, sums), window)
+
+def rolling_mean(x, window: int) -> np.ndarray:
+    return rolling_sum(x, window) / window
+
+def rolling_std(x, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling standard deviation (sample by default, like pandas)."""
+    x = _as_float(x)
+    if x.shape[-1] < window:
+        return np.full_like(x, np.nan)
+    # Center each series first: variance is shift-invariant and this keeps the
+    # sum-of-squares cancellation small for large values such as volumes
+    with np.errstate(invalid='ignore'):
+        center = np.nanmean(x, axis=-1, keepdims=True)
+    centered = x - np.nan_to_num(center)
+    s1, nans = _window_sums(centered, window)
+    s2, _ = _window_sums(centered, window, power=2)
+    var = (s2 - s1 * s1 / window) / (window - ddof)
+    var = np.where(nans > 0, np.nan, np.maximum(var, 0.0))
+    return _pad(np.sqrt(var), window)
+
+def rolling_zscore(x, window: int) -> np.ndarray:
+    """(last - mean) / std over each window ending at t; 0 where the window is flat."""
+    x = _as_float(x)
+    mean = rolling_mean(x, window)
+    std = rolling_std(x, window)
+    # Float noise on a constant window shouldn't turn into a huge z-score
+    flat = std <= 1e-12 * np.maximum(np.abs(mean), 1.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (x - mean) / std
+    return np.where(np.isnan(std), np.nan, np.where(flat, 0.0, z))
+
+def rolling_max(x, window: int) -> np.ndarray:
+    x = _as_float(x)
+    if x.shape[-1] < window:
+        return np.full_like(x, np.nan)
+    return _pad(sliding_window_view(x, window, axis=-1).max(axis=-1), window)
+
+def rolling_percentile_rank(x, window: int) -> np.ndarray:
+    """
+    Share (0-1] of the window's values that are <= the window's last value,
+    i.e. pandas `rolling(window).rank(method='max', pct=True)`.
+    """
+    x = _as_float(x)
+    if x.shape[-1] < window:
+        return np.full_like(x, np.nan)
+    view = sliding_window_view(x, window, axis=-1)
+    last = view[..., -1:]
+    rank = (view <= last).sum(axis=-1) / window
+    has_nan = np.isnan(view).any(axis=-1)
+    return _pad(np.where(has_nan, np.nan, rank), window)
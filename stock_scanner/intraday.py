@@ -0,0 +1,304 @@
+"""
+Intraday polling mode.
+
+Every `--interval` minutes during the US session, batched quotes for the
+whole universe are compared (vectorized) against each symbol's expected
+volume so far: its 30-session average daily volume times the share of a
+day's volume normally traded by this time of day (the volume curve, built
+from intraday bars). Symbols crossing the spike threshold for the first
+time that day are pushed straight into the analyst -> news -> report
+sub-graph on a background worker, so polling keeps its cadence while the
+LLM stages run. Polling stops at the close, and right away on weekends or
+when the first poll after the open shows no trade today (a market holiday).
+
+Usage:
+    python -m stock_scanner.intraday --build-curve        # once, or weekly
+    python -m stock_scanner.intraday --interval 5 [--email]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from stock_scanner.config import config
+from stock_scanner.models import VolumeAnalysis
+from stock_scanner.storage.rolling_state import RollingVolumeState, session_date
+from stock_scanner.storage.runs import INTRADAY_SUFFIX
+from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.quota import quota
+
+logger = get_logger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_MINUTES = 390
+
+def minute_of_session(now: Optional[datetime] = None) -> float:
+    """Minutes since the 09:30 ET open (negative before the open, >= 390 after the close)."""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.hour * 60 + now.minute + now.second / 60 - SESSION_OPEN_MINUTE
+
+def traded_today(quotes: Dict[str, Dict], today: date) -> bool:
+    """True if any quote's last trade (FMP `timestamp`, Unix seconds) is from `today` (ET)."""
+    stamps = [q.get('timestamp') for q in quotes.values() if q.get('timestamp')]
+    return any(datetime.fromtimestamp(ts, MARKET_TZ).date() == today for ts in stamps)
+
+class VolumeCurve:
+    """Cumulative share of a session's volume traded by each minute of the session."""
+
+    def __init__(self, minutes: Sequence[float], cumulative: Sequence[float]):
+        self.minutes = np.concatenate([[0.0], np.asarray(minutes, dtype=float), [SESSION_MINUTES]])
+        self.cumulative = np.concatenate([[0.0], np.asarray(cumulative, dtype=float), [1.0]])
+
+    @classmethod
+    def linear(cls) -> "VolumeCurve":
+        """Fallback when no curve has been built: volume spread evenly over the session."""
+        return cls([], [])
+
+    @classmethod
+    def from_bars(cls, bars_by_symbol: Dict[str, List[dict]], bar_minutes: int = 5) -> "VolumeCurve":
+        """
+        Averages, over every symbol-day, the cumulative share of the day's volume
+        reached at the end of each intraday bar (FMP bar timestamps mark the start).
+        """
+        import pandas as pd
+
+        frames = [pd.DataFrame(bars).assign(symbol=s) for s, bars in bars_by_symbol.items() if bars]
+        if not frames:
+            return cls.linear()
+        df = pd.concat(frames, ignore_index=True)
+        ts = pd.to_datetime(df['date'])
+        df['day'] = ts.dt.normalize()
+        df['minute'] = ts.dt.hour * 60 + ts.dt.minute - SESSION_OPEN_MINUTE + bar_minutes
+        df = df[(df['minute'] > 0) & (df['minute'] <= SESSION_MINUTES)].sort_values(['symbol', 'day', 'minute'])
+
+        groups = df.groupby(['symbol', 'day'])['volume']
+        df = df.assign(share=groups.cumsum() / groups.transform('sum')).dropna(subset=['share'])
+        curve = df.groupby('minute')['share'].mean()
+        curve = curve[curve.index < SESSION_MINUTES]
+        # Averages of cumulative shares are monotone in theory; enforce it against sparse bars
+        return cls(curve.index.to_numpy(), np.maximum.accumulate(curve.to_numpy()))
+
+    def fraction(self, minute: float) -> float:
+        return float(np.interp(minute, self.minutes, self.cumulative))
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"minutes": self.minutes[1:-1].tolist(),
+                                    "cumulative": self.cumulative[1:-1].tolist()}))
+
+    @classmethod
+    def load(cls, path: Path) -> "VolumeCurve":
+        if not path.exists():
+            logger.warning(f"No intraday volume curve at {path}; using a linear curve (run --build-curve)")
+            return cls.linear()
+        data = json.loads(path.read_text())
+        return cls(data["minutes"], data["cumulative"])
+
+def curve_path() -> Path:
+    return config.DATA_DIR / "intraday" / "volume_curve.json"
+
+def build_volume_curve(client, symbols: List[str]) -> VolumeCurve:
+    """Builds the curve from recent 5-minute bars of a sample of `symbols`."""
+    bars = {}
+    for symbol in symbols:
+        try:
+            bars[symbol] = client.get_intraday_chart(symbol) or []
+        except Exception as e:
+            logger.warning(f"No intraday bars for {symbol}: {e}", extra={"symbol": symbol})
+    return VolumeCurve.from_bars(bars)
+
+class IntradayScanner:
+    """Vectorized spike detection over the universe's cumulative day volume."""
+
+    def __init__(self, candidates: List[dict], avg_volumes: Sequence[float], curve: VolumeCurve,
+                 threshold: float = config.DEFAULT_VOLUME_SPIKE_THRESHOLD):
+        self.candidates = candidates
+        self.symbols = [c['symbol'] for c in candidates]
+        self.avg = np.asarray(avg_volumes, dtype=float)
+        self.curve = curve
+        self.threshold = threshold
+        self.alerted = np.zeros(len(candidates), dtype=bool)
+        self.last_quotes: Dict[str, Dict] = {}
+
+    def evaluate(self, volumes: np.ndarray, minute: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices of symbols crossing the threshold for the first time, and all ratios."""
+        fraction = self.curve.fraction(minute)
+        if fraction < config.INTRADAY_MIN_SESSION_FRACTION:
+            # Too early in the session for the ratio to mean anything
+            return np.array([], dtype=int), np.full(len(volumes), np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = volumes / (self.avg * fraction)
+        crossing = np.isfinite(ratio) & (ratio >= self.threshold) & ~self.alerted
+        self.alerted |= crossing
+        return np.flatnonzero(crossing), ratio
+
+    def poll(self, client, minute: float) -> List[Dict]:
+        """One cycle: batched quotes -> newly spiking symbols in the pipeline's `spiked_stocks` shape."""
+        quotes = self.last_quotes = client.get_quotes(self.symbols)
+        volumes = np.array([quotes.get(s, {}).get('volume') or np.nan for s in self.symbols], dtype=float)
+        crossing, ratio = self.evaluate(volumes, minute)
+
+        spiked = []
+        for i in crossing:
+            symbol = self.symbols[i]
+            quote = quotes[symbol]
+            candidate = {**self.candidates[i], 'price': quote.get('price', self.candidates[i].get('price')),
+                         'volume': int(volumes[i])}
+            analysis = VolumeAnalysis(symbol=symbol, current_volume=int(volumes[i]), avg_volume=int(self.avg[i]),
+                                      ratio=float(ratio[i]), is_spike=True)
+            spiked.append({"candidate": candidate, "volume_analysis": analysis.model_dump()})
+            logger.info(f"Intraday spike: {symbol} ({ratio[i]:.2f}x expected volume by now)", extra={"symbol": symbol})
+        return spiked
+
+def baseline_volumes(client, symbols: List[str]) -> np.ndarray:
+    """
+    30-session average volumes from the rolling state, then the feature store;
+    the remaining symbols are seeded from history fetched in batched requests.
+    """
+    from stock_scanner.storage.features import FeatureStore
+
+    state = RollingVolumeState()
+    features = FeatureStore()
+    today = session_date()
+    averages = np.full(len(symbols), np.nan)
+    missing = []
+    for i, symbol in enumerate(symbols):
+        baseline = state.baseline(symbol, today)
+        if baseline:
+            averages[i] = baseline[0]
+        elif (stored := features.volume_baseline(symbol, today)) is not None:
+            averages[i] = stored
+        else:
+            missing.append(i)
+
+    if missing:
+        logger.info(f"Fetching history for {len(missing)} symbols without a volume baseline")
+        try:
+            histories = client.get_historical_prices([symbols[i] for i in missing])
+        except Exception as e:
+            logger.error(f"Baseline history fetch failed: {e}")
+            histories = {}
+        for i in missing:
+            history = histories.get(symbols[i])
+            if not history:
+                continue
+            state.seed(symbols[i], history)
+            baseline = state.baseline(symbols[i], today)
+            if baseline:
+                averages[i] = baseline[0]
+    state.flush()
+    return averages
+
+def run_pipeline(spiked: List[Dict], email: bool):
+    """
+    Runs the analyst -> news -> report sub-graph for newly spiking symbols and
+    saves the results. Each call is its own run: the shared metrics and stage
+    recorders are reset first, as run_scan does, so a day of polling neither
+    grows them nor carries earlier cycles into this run's snapshots.
+    """
+    from stock_scanner.graph import get_app
+    from stock_scanner.main import save_results, save_run_results, save_stage_snapshots
+    from stock_scanner.storage.snapshots import snapshots
+    from stock_scanner.utils.metrics import metrics
+
+    metrics.reset()
+    snapshots.reset()
+    try:
+        final_state = get_app("analyst_filter").invoke({
+            "candidates": [], "spiked_stocks": spiked, "analyst_picks": [],
+            "news_analyzed_stocks": [], "results": [], "errors": [],
+        })
+        results = final_state.get("results", [])
+        logger.info(f"Intraday pipeline: {len(results)}/{len(spiked)} spikes passed all stages")
+        if not results:
+            return
+        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+        csv_filename = save_results(results, f"intraday_{timestamp}")
+        if email:
+            from stock_scanner.utils.email_client import EmailClient
+            EmailClient().send_report(results, csv_filename)
+        run_id = f"{timestamp}{INTRADAY_SUFFIX}" # Suffix keeps run ids sorting by time
+        save_run_results(run_id, final_state)
+        save_stage_snapshots(run_id, final_state)
+    except Exception as e:
+        logger.error(f"Intraday pipeline failed: {e}", exc_info=True)
+
+def run_intraday(interval_minutes: float = config.INTRADAY_INTERVAL_MINUTES, once: bool = False,
+                 email: bool = False):
+    from stock_scanner.utils.api_client import FMPClient
+
+    today = datetime.now(MARKET_TZ).date()
+    if today.weekday() >= 5:
+        logger.info("Market closed today (weekend); nothing to poll.")
+        return
+
+    client = FMPClient()
+    # Today's volume is still small early in the session, so liquidity is judged
+    # on the 30-session average instead of the screener's volume filter
+    candidates = client.get_stock_screener(config.DEFAULT_MIN_MARKET_CAP, config.DEFAULT_MAX_MARKET_CAP, 0) or []
+    averages = baseline_volumes(client, [c['symbol'] for c in candidates])
+    liquid = np.flatnonzero(averages >= config.DEFAULT_MIN_VOLUME)
+    scanner = IntradayScanner([candidates[i] for i in liquid], averages[liquid], VolumeCurve.load(curve_path()))
+    logger.info(f"Intraday universe: {len(liquid)} symbols, polling every {interval_minutes} min")
+
+    # One background worker: LLM stages never delay the next poll
+    pipeline = ThreadPoolExecutor(max_workers=1)
+    try:
+        while True:
+            minute = minute_of_session()
+            if minute >= SESSION_MINUTES:
+                logger.info("Market closed; stopping intraday polling.")
+                break
+            if minute < 0 and not once:
+                time.sleep(min(-minute * 60, interval_minutes * 60))
+                continue
+
+            start = time.perf_counter()
+            spiked = scanner.poll(client, minute)
+            elapsed = time.perf_counter() - start
+            if minute >= 1 and scanner.last_quotes and not traded_today(scanner.last_quotes, today):
+                logger.info("No trades today after the open (market holiday); stopping intraday polling.")
+                break
+            logger.info(f"Poll: {len(scanner.symbols)} symbols in {elapsed:.2f}s, {len(spiked)} new spikes")
+            if elapsed > interval_minutes * 60 / 2:
+                logger.warning(f"Poll took {elapsed:.1f}s, more than half the {interval_minutes} min interval")
+            if spiked:
+                pipeline.submit(run_pipeline, spiked, email)
+            quota.flush()
+
+            if once:
+                break
+            time.sleep(max(0.0, interval_minutes * 60 - elapsed))
+    finally:
+        pipeline.shutdown(wait=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Intraday volume-spike polling')
+    parser.add_argument('--interval', type=float, default=config.INTRADAY_INTERVAL_MINUTES, help='Minutes between polls')
+    parser.add_argument('--once', action='store_true', help='Run a single poll cycle and exit')
+    parser.add_argument('--email', action='store_true', help='Email results for new spikes')
+    parser.add_argument('--build-curve', action='store_true', help='Build the time-of-day volume curve and exit')
+    parser.add_argument('--curve-symbols', type=int, default=50, help='Screener symbols sampled for --build-curve')
+    args = parser.parse_args()
+
+    if args.build_curve:
+        from stock_scanner.utils.api_client import FMPClient
+        client = FMPClient()
+        candidates = client.get_stock_screener(config.DEFAULT_MIN_MARKET_CAP, config.DEFAULT_MAX_MARKET_CAP,
+                                               config.DEFAULT_MIN_VOLUME) or []
+        curve = build_volume_curve(client, [c['symbol'] for c in candidates[:args.curve_symbols]])
+        curve.save(curve_path())
+        print(f"Saved volume curve ({len(curve.minutes) - 2} points) to {curve_path()}")
+        return
+
+    run_intraday(args.interval, args.once, args.email)
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,293 @@
 import argparse
+import re
 import sys
-import pandas as pd
+import time
 from datetime import datetime
-from stock_scanner.graph import app
+from typing import List, Optional
 from stock_scanner.config import config
-from stock_scanner.utils.logger import get_logger
-from stock_scanner.utils.email_client import EmailClient
+from stock_scanner.utils.logger import get_logger, current_run_id
+from stock_scanner.utils.metrics import metrics, write_run_summary, write_prometheus_textfile
+from stock_scanner.utils.llm_accounting import usage
+from stock_scanner.utils.tracing import flush_traces
+from stock_scanner.storage.snapshots import snapshots
+from stock_scanner.utils.quota import quota
+from stock_scanner.utils.deadline import LEVEL_NAMES, parse_deadline
 import os
 
+# pandas, langgraph and langchain are imported inside the functions that need
+# them so quick commands (e.g. --check) start without loading them.
+
 logger = get_logger("stock_scanner.main")
 
+def check_symbol(symbol: str):
+    """Quick single-symbol volume / upside check without building the graph."""
+    from stock_scanner.utils.api_client import FMPClient
+    from stock_scanner.nodes.volume import average_volume
+    from stock_scanner.nodes.analyst import target_price_from
+    
+    client = FMPClient()
+    symbol = symbol.upper()
+    
+    hist_data = client.get_historical_price(symbol)
+    history = hist_data.get('historical', []) if hist_data else []
+    if not history:
+        print(f"{symbol}: no price history available.")
+        return
+    
+    current_volume = history[0]['volume']
+    price = history[0]['close']
+    avg_vol = average_volume(history)
+    ratio = current_volume / avg_vol if avg_vol else 0
+    spike = ratio >= config.DEFAULT_VOLUME_SPIKE_THRESHOLD
+    print(f"{symbol}: price ${price} | volume {current_volume:,} | 30d avg {avg_vol:,.0f} | "
+          f"ratio {ratio:.2f}x ({'SPIKE' if spike else 'no spike'})")
+    
+    pt_data_list = client.get_price_target(symbol)
+    target_price = target_price_from(pt_data_list[0]) if pt_data_list else 0
+    if target_price and price:
+        upside = ((target_price - price) / price) * 100
+        passes = upside >= config.DEFAULT_UPSIDE_THRESHOLD
+        print(f"{symbol}: target ${target_price} | upside {upside:.1f}% ({'PASS' if passes else 'below threshold'})")
+    else:
+        print(f"{symbol}: no analyst price target.")
+
+def save_run_summary(timestamp: str, final_state: dict, plan: Optional[dict] = None):
+    """Writes the run's performance summary under DATA_DIR, where the planner reads it next run."""
+    try:
+        from stock_scanner.planner import stage_counts, summaries_dir
+        summaries_dir().mkdir(parents=True, exist_ok=True)
+        summary_filename = str(summaries_dir() / f"run_summary_{timestamp}.json")
+        write_run_summary(summary_filename, extra={
+            "run_id": timestamp,
+            "stages": stage_counts(final_state, plan["order"] if plan else None),
+            "results": len(final_state.get("results", [])),
+            "errors": final_state.get("errors", []),
+            "llm": usage.snapshot(),
+            "plan": plan,
+            "fmp_quota": quota.snapshot(),
+            "deadline": final_state.get("deadline"),
+            "degradation": {"level": final_state.get("degradation_level") or 0,
+                            "mode": LEVEL_NAMES[final_state.get("degradation_level") or 0]},
+        })
+        if config.METRICS_PROMETHEUS_FILE:
+            write_prometheus_textfile(config.METRICS_PROMETHEUS_FILE)
+    except Exception as e:
+        # Metrics must never fail the scan itself
+        logger.error(f"Failed to write run summary: {e}")
+
+def save_run_results(run_id: str, final_state: dict, order: Optional[List[str]] = None):
+    """
+    Persists the run's results under data/runs/<run_id>/ for local readers
+    (see stock_scanner.api) and appends them to the results database.
+    `order` is the filter order the run used, for the per-stage counts.
+    """
+    results = final_state.get("results", [])
+    try:
+        from stock_scanner.planner import stage_counts
+        from stock_scanner.storage.runs import RunStore
+        RunStore().save(run_id, results, summary={
+            "stages": stage_counts(final_state, order),
+            "results": len(results),
+        })
+    except Exception as e:
+        # Like the metrics summary, this must never fail the scan itself
+        logger.error(f"Failed to save run results: {e}")
+    try:
+        from stock_scanner.storage.results_db import ResultsDB
+        from stock_scanner.storage.runs import is_intraday
+        db = ResultsDB()
+        db.record_run(run_id, results, source="intraday" if is_intraday(run_id) else "scan")
+        db.close()
+    except Exception as e:
+        logger.error(f"Failed to record run in the results database: {e}")
+
+def save_stage_snapshots(run_id: str, final_state: dict, order: Optional[List[str]] = None):
+    """Saves the run's stage inputs and filter order for offline `--replay` (see stock_scanner.replay)."""
+    try:
+        from stock_scanner.storage.runs import RunStore
+        snapshots.extend("universe", final_state.get("candidates", []))
+        snapshots.save(RunStore().run_dir(run_id), order)
+    except Exception as e:
+        logger.error(f"Failed to save stage snapshots: {e}")
+
+CSV_COLUMNS = ["Symbol", "Company", "Price", "Vol Ratio", "Avg Vol", "Spike Days", "Upside %", "Sentiment", "First Seen"]
+
+def save_results(results: list, timestamp: str, degradation_level: int = 0) -> str:
+    """
+    Writes the CSV summary and the markdown report for `results` (headers and
+    the degradation note even when empty); returns the CSV path.
+    """
+    import pandas as pd
+    
+    first_seen = {}
+    try:
+        from stock_scanner.storage.results_db import ResultsDB
+        db = ResultsDB()
+        first_seen = db.first_seen(r.candidate.symbol for r in results)
+        db.close()
+        # This run is recorded after the CSV goes out; symbols not seen before are new today
+        run_date = re.search(r"\d{4}-\d{2}-\d{2}", timestamp)
+        if run_date:
+            first_seen = {**{r.candidate.symbol.upper(): run_date.group(0) for r in results}, **first_seen}
+    except Exception as e:
+        logger.warning(f"First-seen dates unavailable: {e}")
+    
+    # 1. CSV Summary (Basic data)
+    csv_data = []
+    for r in results:
+        csv_data.append({
+            "Symbol": r.candidate.symbol,
+            "Company": r.candidate.company_name,
+            "Price": r.candidate.price,
+            "Vol Ratio": f"{r.volume_analysis.ratio:.2f}x",
+            "Avg Vol": r.volume_analysis.avg_volume,
+            "Spike Days": r.volume_analysis.spike_days,
+            # Unrated: scored after the deadline without a stored price target
+            "Upside %": f"{r.analyst_rating.upside_percent:.1f}%" if r.analyst_rating.upside_percent is not None else "n/a",
+            "Sentiment": "Negative" if r.news_sentiment.is_negative else "Neutral/Positive",
+            "First Seen": first_seen.get(r.candidate.symbol.upper(), "")
+        })
+        
+    df = pd.DataFrame(csv_data, columns=CSV_COLUMNS)
+    csv_filename = str(config.BASE_DIR / f"scan_results_{timestamp}.csv")
+    df.to_csv(csv_filename, index=False)
+    logger.info(f"Saved CSV summary to {csv_filename}")
+    
+    # 2. Detailed Markdown Report
+    md_filename = str(config.BASE_DIR / f"scan_report_{timestamp}.md")
+    with open(md_filename, 'w') as f:
+        f.write(f"# High Potential Stock Scan Report - {timestamp}\n\n")
+        if degradation_level:
+            f.write(f"> **Degraded to meet the deadline (level {degradation_level}):** {LEVEL_NAMES[degradation_level]}\n\n")
+        if not results:
+            f.write("No stocks matched the criteria.\n")
+        for r in results:
+            f.write(f"## {r.candidate.company_name} ({r.candidate.symbol})\n")
+            f.write(f"**Price:** ${r.candidate.price} | **Market Cap:** ${r.candidate.market_cap:,.0f}\n")
+            f.write(f"**Volume Spike:** {r.volume_analysis.ratio:.2f}x (Avg: {r.volume_analysis.avg_volume:,})\n")
+            if r.volume_analysis.spike_days is not None:
+                f.write(f"**Spike Persistence:** {r.volume_analysis.spike_days} of the last {config.SPIKE_RECENT_DAYS} sessions "
+                        f"(max {r.volume_analysis.max_spike_ratio:.2f}x, trend {r.volume_analysis.accumulation_trend:+.2f}/day)\n")
+            if r.analyst_rating.upside_percent is None:
+                f.write("**Analyst Upside:** not rated (deadline reached before the price-target check)\n")
+            else:
+                f.write(f"**Analyst Upside:** {r.analyst_rating.upside_percent:.1f}% (Target: ${r.analyst_rating.target_consensus})\n")
+            if r.analyst_rating.consensus_change_percent is not None:
+                f.write(f"**Consensus Trend ({config.ANALYST_TREND_DAYS}d):** {r.analyst_rating.consensus_change_percent:+.1f}% "
+                        f"({r.analyst_rating.analyst_count} analysts)\n")
+            f.write("\n")
+            
+            f.write("### News Sentiment\n")
+            f.write(f"**Summary:** {r.news_sentiment.summary}\n")
+            f.write(f"**Reasoning:** {r.news_sentiment.reasoning}\n\n")
+            
+            if r.reports:
+                if r.reports.changes:
+                    f.write(f"### What Changed (reports from {r.reports.generated_on})\n")
+                    f.write(r.reports.changes + "\n\n")
+                if r.reports.company_report:
+                    f.write("### Company Analysis\n")
+                    f.write(r.reports.company_report + "\n\n")
+                if r.reports.ceo_report:
+                    f.write("### CEO Report\n")
+                    f.write(r.reports.ceo_report + "\n\n")
+            
+            f.write("---\n\n")
+            
+    logger.info(f"Saved detailed report to {md_filename}")
+    return csv_filename
+
+def run_scan(send_email: bool = True, deadline: Optional[float] = None) -> dict:
+    """
+    Runs one full scan (graph, summary, CSV/markdown, email) and returns a
+    short summary. Reusable by long-running callers such as the daemon,
+    which keep the compiled graph and clients warm between calls.
+    `deadline` (Unix timestamp) lets the nodes degrade to finish on time.
+    """
+    start = time.perf_counter()
+    
+    # Initial State
+    initial_state = {
+        "candidates": [],
+        "spiked_stocks": [],
+        "analyst_picks": [],
+        "news_analyzed_stocks": [],
+        "results": [],
+        "errors": [],
+        "deadline": deadline,
+    }
+    
+    timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+    current_run_id.set(timestamp) # Stamped on every log record (see LOG_FORMAT=json)
+    metrics.reset()
+    usage.reset()
+    snapshots.reset()
+    
+    # Cheap filters in the order recent runs say is cheapest
+    from stock_scanner.planner import plan as plan_filters
+    plan = plan_filters()
+    logger.info(f"Filter order ({plan['source']}): {' -> '.join(plan['order'])}")
+    quota.start_run(order=plan["order"]) # Budgets follow the filter positions
+    
+    # Invoke Graph (compiled on first use)
+    from stock_scanner.graph import get_app
+    try:
+        final_state = get_app(order=plan["order"]).invoke(initial_state)
+    finally:
+        quota.flush() # Calls made count against today even if the run fails
+    
+    results = final_state.get("results", [])
+    level = final_state.get("degradation_level") or 0
+    if deadline is not None:
+        logger.info(f"Deadline {datetime.fromtimestamp(deadline).isoformat(timespec='seconds')}: "
+                    f"degradation level {level} ({LEVEL_NAMES[level]})")
+    summary = {"run_id": timestamp, "results": len(results), "csv": None, "degradation_level": level}
+    
+    try:
+        if not results:
+            logger.info("No high potential candidates found.")
+        else:
+            logger.info(f"Scan Complete. Found {len(results)} candidates.")
+        # Written even when empty, so a deadline run always leaves its CSV and degradation note
+        summary["csv"] = save_results(results, timestamp, degradation_level=level)
+        
+        if send_email and (results or deadline is not None):
+            # 3. Send Email (a deadline run reports "no candidates" too, so the recipient knows it ran)
+            logger.info("Sending Email Report...")
+            from stock_scanner.utils.email_client import EmailClient
+            email_client = EmailClient()
+            email_client.send_report(results, summary["csv"], degradation_level=level)
+    finally:
+        # Bookkeeping after the deliverables, so a deadline run spends its reserve on the CSV and email
+        save_run_summary(timestamp, final_state, plan)
+        save_run_results(timestamp, final_state, plan["order"])
+        save_stage_snapshots(timestamp, final_state, plan["order"])
+    
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
 def main():
     parser = argparse.ArgumentParser(description='High Potential Stock Scanner (LangGraph)')
     parser.add_argument('--full', action='store_true', help='Run full scan (default limits apply)')
+    parser.add_argument('--check', metavar='SYMBOL', help='Quick volume/upside check for a single symbol')
+    parser.add_argument('--replay', metavar='RUN_ID', help='Re-run the volume/upside filters offline on a stored run')
+    parser.add_argument('--spike', type=float, help='Volume spike threshold for --replay (default: the run\'s)')
+    parser.add_argument('--min-gain', type=float, help='Minimum analyst upside %% for --replay (default: the run\'s)')
+    parser.add_argument('--run-llm', action='store_true', help='With --replay, run news/report stages for newly admitted symbols')
+    parser.add_argument('--deadline', help='Finish by this time, degrading LLM work as needed (e.g. 45m, 1h30m, 22:30)')
     # Add other args if needed to override config, but config is env based mainly.
     
     args = parser.parse_args()
     
+    if args.check:
+        check_symbol(args.check)
+        return
+    
+    if args.replay:
+        from stock_scanner.replay import run_replay
+        run_replay(args.replay, args.spike, args.min_gain, args.run_llm)
+        return
+    
     logger.info("Starting Stock Scanner Workflow...")
     
     try:
@@ -28,82 +299,13 @@ def main():
         else:
             logger.warning("LANGCHAIN_API_KEY is not set. Tracing will be disabled.")
         
-        # Initial State
-        initial_state = {
-            "candidates": [],
-            "spiked_stocks": [],
-            "analyst_picks": [],
-            "news_analyzed_stocks": [],
-            "results": [],
-            "errors": []
-        }
-        
-        # Invoke Graph
-        final_state = app.invoke(initial_state)
-        
-        results = final_state.get("results", [])
-        
-        if not results:
-            logger.info("No high potential candidates found.")
-            return
-            
-        logger.info(f"Scan Complete. Found {len(results)} candidates.")
-        
-        # Save Results
-        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        
-        # 1. CSV Summary (Basic data)
-        csv_data = []
-        for r in results:
-            csv_data.append({
-                "Symbol": r.candidate.symbol,
-                "Company": r.candidate.company_name,
-                "Price": r.candidate.price,
-                "Vol Ratio": f"{r.volume_analysis.ratio:.2f}x",
-                "Avg Vol": r.volume_analysis.avg_volume,
-                "Upside %": f"{r.analyst_rating.upside_percent:.1f}%",
-                "Sentiment": "Negative" if r.news_sentiment.is_negative else "Neutral/Positive"
-            })
-            
-        df = pd.DataFrame(csv_data)
-        csv_filename = str(config.BASE_DIR / f"scan_results_{timestamp}.csv")
-        df.to_csv(csv_filename, index=False)
-        logger.info(f"Saved CSV summary to {csv_filename}")
-        
-        # 2. Detailed Markdown Report
-        md_filename = str(config.BASE_DIR / f"scan_report_{timestamp}.md")
-        with open(md_filename, 'w') as f:
-            f.write(f"# High Potential Stock Scan Report - {timestamp}\n\n")
-            for r in results:
-                f.write(f"## {r.candidate.company_name} ({r.candidate.symbol})\n")
-                f.write(f"**Price:** ${r.candidate.price} | **Market Cap:** ${r.candidate.market_cap:,.0f}\n")
-                f.write(f"**Volume Spike:** {r.volume_analysis.ratio:.2f}x (Avg: {r.volume_analysis.avg_volume:,})\n")
-                f.write(f"**Analyst Upside:** {r.analyst_rating.upside_percent:.1f}% (Target: ${r.analyst_rating.target_consensus})\n\n")
-                
-                f.write("### News Sentiment\n")
-                f.write(f"**Summary:** {r.news_sentiment.summary}\n")
-                f.write(f"**Reasoning:** {r.news_sentiment.reasoning}\n\n")
-                
-                if r.reports:
-                    if r.reports.company_report:
-                        f.write("### Company Analysis\n")
-                        f.write(r.reports.company_report + "\n\n")
-                    if r.reports.ceo_report:
-                        f.write("### CEO Report\n")
-                        f.write(r.reports.ceo_report + "\n\n")
-                
-                f.write("---\n\n")
-                
-        logger.info(f"Saved detailed report to {md_filename}")
-        
-        # 3. Send Email
-        logger.info("Sending Email Report...")
-        email_client = EmailClient()
-        email_client.send_report(results, csv_filename)
+        run_scan(deadline=parse_deadline(args.deadline) if args.deadline else None)
         
     except Exception as e:
         logger.error(f"Workflow failed: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        flush_traces()
 
 if __name__ == "__main__":
     main()
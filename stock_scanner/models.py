@@ -19,12 +19,21 @@ class VolumeAnalysis(BaseModel):
     ratio: float
     is_spike: bool
     history_snippet: List[dict] = Field(default_factory=list)
+    volume_zscore: Optional[float] = None # vs. the previous 30 sessions, from the rolling volume state
+    # Spike persistence over the last SPIKE_RECENT_DAYS sessions (None without enough history)
+    spike_days: Optional[int] = None
+    max_spike_ratio: Optional[float] = None
+    days_since_first_spike: Optional[int] = None
+    accumulation_trend: Optional[float] = None
 
 class AnalystRating(BaseModel):
     """Analyst rating and price target data."""
     symbol: str
     target_consensus: Optional[float] = None
     upside_percent: Optional[float] = None
+    # Trend context from the local price-target store (None when the symbol isn't stored)
+    consensus_change_percent: Optional[float] = None
+    analyst_count: Optional[int] = None
 
 class NewsItem(BaseModel):
     """Represents a news item."""
@@ -44,6 +53,9 @@ class ReportContent(BaseModel):
     """Content for the final report."""
     company_report: Optional[str] = None
     ceo_report: Optional[str] = None
+    # Delta reporting: date the reports were written, and the "what changed" addendum when reused
+    generated_on: Optional[str] = None
+    changes: Optional[str] = None
 
 class StockResult(BaseModel):
     """Final aggregated result for a stock."""
@@ -1,45 +1,123 @@
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 from stock_scanner.state import GraphState
 from stock_scanner.utils.api_client import FMPClient
 from stock_scanner.models import AnalystRating
 from stock_scanner.config import config
+from stock_scanner.storage.snapshots import snapshots
 from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.quota import quota
+from stock_scanner.utils.deadline import FILTERS_TRUNCATED, expired
+
+if TYPE_CHECKING:
+    from stock_scanner.storage.price_targets import PriceTargetStore
+
+# pandas and the price-target store are imported where they are used, so the
+# quick --check path (target_price_from) starts without loading them.
 
 logger = get_logger(__name__)
 
-def analyst_node(state: GraphState) -> Dict[str, Any]:
+def target_price_from(pt_data: Dict[str, Any]) -> float:
+    """Picks the consensus target from a price-target-summary record."""
+    return pt_data.get('targetConsensus') or pt_data.get('lastMonthAvgPriceTarget') or 0
+
+def target_trend(store: "PriceTargetStore", symbol: str,
+                 days: int = config.ANALYST_TREND_DAYS) -> Tuple[Optional[float], Optional[int]]:
+    """
+    (% change of the stored consensus target over the last `days`, analyst count)
+    from the local price-target store; (None, None) if the symbol has no history.
+    """
+    import pandas as pd
+
+    index = store.as_of_index(symbol)
+    if index is None:
+        return None, None
+    today = pd.Timestamp.now().normalize()
+    _, now, analysts = index.lookup(today)
+    _, before, _ = index.lookup(today - pd.Timedelta(days=days))
+    if now is None:
+        return None, None
+    change = (now - before) / before * 100 if before else None
+    return change, analysts
+
+def stored_rating(store: "PriceTargetStore", symbol: str, price: float) -> Optional[AnalystRating]:
+    """
+    Rating from the local price-target store alone (no FMP call), for picks
+    scored after the deadline. None if the stored consensus misses the upside
+    threshold; an unrated AnalystRating if the symbol isn't stored.
+    """
+    import pandas as pd
+
+    index = store.as_of_index(symbol)
+    _, consensus, analysts = index.lookup(pd.Timestamp.now().normalize()) if index is not None else (None, None, None)
+    if not consensus or not price:
+        return AnalystRating(symbol=symbol)
+    upside = (consensus - price) / price * 100
+    if upside < config.DEFAULT_UPSIDE_THRESHOLD:
+        return None
+    trend, _ = target_trend(store, symbol)
+    return AnalystRating(symbol=symbol, target_consensus=consensus, upside_percent=upside,
+                         consensus_change_percent=trend, analyst_count=analysts)
+
+def analyst_node(state: GraphState, in_key: str = "spiked_stocks", out_key: str = "analyst_picks") -> Dict[str, Any]:
     """
     Step 3: Check Analyst Ratings and Upside.
+    `in_key` / `out_key` follow the planned filter order (see stock_scanner.planner);
+    input items are screener dicts or items already wrapped as {"candidate": ...}.
     """
+    from stock_scanner.storage.price_targets import default_store
+
     client = FMPClient()
-    spiked_stocks = state.get("spiked_stocks", [])
+    target_store = default_store()
+    spiked_stocks = state.get(in_key, [])
     valid_picks = []
     
-    logger.info(f"Checking analyst ratings for {len(spiked_stocks)} volume spikes...")
+    logger.info(f"Checking analyst ratings for {len(spiked_stocks)} candidates...")
     
-    for item in spiked_stocks:
+    truncated = False
+    for i, entry in enumerate(spiked_stocks):
+        item = entry if 'candidate' in entry else {"candidate": entry}
         candidate = item['candidate']
         symbol = candidate.get('symbol')
         price = candidate.get('price', 0)
         
+        if expired(state.get("deadline")):
+            if not truncated:
+                logger.warning(f"Deadline reached: scoring the remaining {len(spiked_stocks) - i} candidates "
+                               f"from stored price targets")
+                truncated = True
+            # Volume survivors already cost a history download each: keep them, scored
+            # from the local store (or unrated) rather than dropping them
+            if 'volume_analysis' in item:
+                rating = stored_rating(target_store, symbol, price)
+                if rating:
+                    valid_picks.append({**item, 'analyst_rating': rating.model_dump()})
+            continue
+        
+        if quota.budget_exhausted("analyst_filter"):
+            quota.skip_for_budget("analyst_filter", symbol)
+            continue
+        
         try:
             pt_data_list = client.get_price_target(symbol)
             if not pt_data_list:
                 continue
             
-            pt_data = pt_data_list[0]
-            target_price = pt_data.get('targetConsensus') or pt_data.get('lastMonthAvgPriceTarget') or 0
+            target_price = target_price_from(pt_data_list[0])
             
             if price > 0 and target_price > 0:
                 upside = ((target_price - price) / price) * 100
+                snapshots.record("targets", {"symbol": symbol, "price": price, "target": target_price, "upside": upside})
                 
                 if upside >= config.DEFAULT_UPSIDE_THRESHOLD:
-                    logger.info(f"High Potential: {symbol} (+{upside:.1f}%)")
+                    logger.info(f"High Potential: {symbol} (+{upside:.1f}%)", extra={"symbol": symbol})
                     
+                    trend, analysts = target_trend(target_store, symbol)
                     rating = AnalystRating(
                         symbol=symbol,
                         target_consensus=target_price,
-                        upside_percent=upside
+                        upside_percent=upside,
+                        consensus_change_percent=trend,
+                        analyst_count=analysts
                     )
                     
                     # Carry forward previous data
@@ -48,7 +126,9 @@ def analyst_node(state: GraphState) -> Dict[str, Any]:
                     valid_picks.append(new_item)
                     
         except Exception as e:
-            logger.error(f"Error checking analyst rating for {symbol}: {e}")
+            logger.error(f"Error checking analyst rating for {symbol}: {e}", extra={"symbol": symbol})
             continue
             
-    return {"analyst_picks": valid_picks}
+    if truncated:
+        return {out_key: valid_picks, "degradation_level": FILTERS_TRUNCATED}
+    return {out_key: valid_picks}
@@ -3,9 +3,12 @@ import json
 from stock_scanner.state import GraphState
 from stock_scanner.utils.api_client import FMPClient
 from stock_scanner.utils.llm_client import get_llm
+from stock_scanner.utils.llm_accounting import llm_run_config, SENTIMENT
 from stock_scanner.prompts import SENTIMENT_PROMPT
 from stock_scanner.models import SentimentAnalysis, NewsItem
 from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.quota import quota
+from stock_scanner.utils.deadline import RULES_SENTIMENT, degradation_level, rules_sentiment
 from langchain_core.output_parsers import JsonOutputParser
 
 logger = get_logger(__name__)
@@ -22,6 +25,7 @@ def news_node(state: GraphState) -> Dict[str, Any]:
     
     analyst_picks = state.get("analyst_picks", [])
     analyzed_stocks = []
+    applied_level = 0
     
     logger.info(f"Analyzing news for {len(analyst_picks)} picks...")
     
@@ -30,12 +34,21 @@ def news_node(state: GraphState) -> Dict[str, Any]:
         symbol = candidate.get('symbol')
         company_name = candidate.get('companyName')
         
+        if quota.budget_exhausted("news_analysis"):
+            quota.skip_for_budget("news_analysis", symbol)
+            continue
+        
         try:
             # Get News (last 3-5 days is roughly covered by limit=10 most recent usually)
             # A more robust impl would filter by date.
             news_data = client.get_stock_news(symbol, limit=8)
             
-            if not news_data:
+            level = degradation_level(state.get("deadline"))
+            if level >= RULES_SENTIMENT:
+                # Deadline pressure: keyword screen instead of an LLM call
+                applied_level = max(applied_level, level)
+                sentiment = SentimentAnalysis(**rules_sentiment(news_data or []))
+            elif not news_data:
                 # No news is generally "no bad news"
                 sentiment = SentimentAnalysis(is_negative=False, reasoning="No recent news found.", summary="No news.")
             else:
@@ -58,13 +71,13 @@ def news_node(state: GraphState) -> Dict[str, Any]:
                         "company_name": company_name,
                         "symbol": symbol,
                         "news_context": news_text
-                    })
+                    }, config=llm_run_config(SENTIMENT, symbol))
                     # res should be a dict matching SentimentAnalysis 
                     # (is_negative, reasoning, summary)
                     # The ** is the dictionary unpacking operator (sometimes called "splat" or "double star")
                     sentiment = SentimentAnalysis(**res)
                 except Exception as e:
-                    logger.error(f"LLM Sentiment Analysis failed for {symbol}: {e}")
+                    logger.error(f"LLM Sentiment Analysis failed for {symbol}: {e}", extra={"symbol": symbol})
                     # Log the raw output if possible (though chain.invoke error might not have it)
                     sentiment = SentimentAnalysis(
                         is_negative=False, 
@@ -77,7 +90,9 @@ def news_node(state: GraphState) -> Dict[str, Any]:
             analyzed_stocks.append(item)
             
         except Exception as e:
-            logger.error(f"Error processing news for {symbol}: {e}")
+            logger.error(f"Error processing news for {symbol}: {e}", extra={"symbol": symbol})
             continue
             
+    if applied_level:
+        return {"news_analyzed_stocks": analyzed_stocks, "degradation_level": applied_level}
     return {"news_analyzed_stocks": analyzed_stocks}
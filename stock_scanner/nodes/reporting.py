@@ -1,13 +1,74 @@
-from typing import Dict, Any, List
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from stock_scanner.state import GraphState
 from stock_scanner.utils.llm_client import get_llm
+from stock_scanner.utils.llm_accounting import usage, llm_run_config, COMPANY_REPORT, CEO_REPORT
 from stock_scanner.prompts import COMPANY_REPORT_PROMPT, CEO_REPORT_PROMPT
 from stock_scanner.models import ReportContent, StockResult, StockCandidate, VolumeAnalysis, AnalystRating, SentimentAnalysis
+from stock_scanner.config import config
 from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.metrics import metrics
+from stock_scanner.utils.deadline import NO_CEO_REPORTS, NO_REPORTS, degradation_level
 from langchain_core.output_parsers import StrOutputParser
 
 logger = get_logger(__name__)
 
+def _delta(label: str, before: Optional[float], after: Optional[float], fmt: str) -> Optional[str]:
+    if before is None or after is None:
+        return None
+    line = f"{label}: {fmt.format(before)} -> {fmt.format(after)}"
+    if label == "Price" and before:
+        line += f" ({(after - before) / before * 100:+.1f}%)"
+    return line
+
+def what_changed(prior: dict, item: dict, since: str) -> str:
+    """Deterministic addendum comparing today's metrics and news with the prior result's."""
+    prior_volume = prior.get('volume_analysis') or {}
+    prior_rating = prior.get('analyst_rating') or {}
+    prior_news = prior.get('news_sentiment') or {}
+    news = item.get('news_sentiment') or {}
+    
+    lines = [
+        _delta("Price", (prior.get('candidate') or {}).get('price'), item['candidate'].get('price'), "${:.2f}"),
+        _delta("Volume ratio", prior_volume.get('ratio'), item['volume_analysis'].get('ratio'), "{:.2f}x"),
+        _delta("Analyst upside", prior_rating.get('upside_percent'), item['analyst_rating'].get('upside_percent'), "{:.1f}%"),
+    ]
+    if prior_rating.get('target_consensus') != item['analyst_rating'].get('target_consensus'):
+        lines.append(_delta("Target", prior_rating.get('target_consensus'), item['analyst_rating'].get('target_consensus'), "${:.2f}"))
+    if news.get('summary') and news.get('summary') != prior_news.get('summary'):
+        lines.append(f"News: {news['summary']}")
+    else:
+        lines.append("News: nothing new since the last report")
+    return f"Changes since {since}:\n" + "\n".join(f"- {line}" for line in lines if line)
+
+def reusable_report(db, symbol: str, today: str) -> Optional[Tuple[str, dict]]:
+    """
+    (run date, prior result) when `symbol` was reported in an earlier run and
+    its reports are at most REPORT_MAX_AGE_DAYS old, otherwise None. Runs that
+    kept the symbol without reports (budget or deadline) are looked past.
+    """
+    since = (date.fromisoformat(today) - timedelta(days=config.REPORT_MAX_AGE_DAYS)).isoformat()
+    found = db.latest_payload(symbol, since=since, with_report=True)
+    if found is None:
+        return None
+    run_date, prior = found
+    reports = prior['reports']
+    # Reused reports carry their original date, so repeats can't keep a report alive forever
+    generated_on = reports.get('generated_on') or run_date
+    if (date.fromisoformat(today) - date.fromisoformat(generated_on)).days > config.REPORT_MAX_AGE_DAYS:
+        return None
+    return run_date, prior
+
+def _open_results_db():
+    if not config.DELTA_REPORTS:
+        return None
+    try:
+        from stock_scanner.storage.results_db import ResultsDB
+        return ResultsDB()
+    except Exception as e:
+        logger.warning(f"Delta reporting disabled for this run: {e}")
+        return None
+
 def reporting_node(state: GraphState) -> Dict[str, Any]:
     """
     Step 5: Generate Company & CEO Reports if news is not negative.
@@ -20,6 +81,9 @@ def reporting_node(state: GraphState) -> Dict[str, Any]:
     
     analyzed_stocks = state.get("news_analyzed_stocks", [])
     final_results = []
+    db = _open_results_db()
+    today = date.today().isoformat()
+    applied_level = 0
     
     logger.info(f"Generating reports for clean stocks...")
     
@@ -38,32 +102,66 @@ def reporting_node(state: GraphState) -> Dict[str, Any]:
             symbol = candidate_data['symbol']
             company_name = candidate_data.get('companyName')
             
-            # 1. Company Report
-            logger.info(f"Generating Company Report for {symbol}...")
-            # Prepare context
-            vol_info = f"Ratio: {item['volume_analysis']['ratio']:.2f}x, AvgVol: {item['volume_analysis']['avg_volume']}"
-            upside_info = f"Upside: {item['analyst_rating']['upside_percent']:.1f}%, Target: ${item['analyst_rating']['target_consensus']}"
-            
-            company_report = company_chain.invoke({
-                "company_name": company_name,
-                "symbol": symbol,
-                "industry": candidate_data.get('industry'),
-                "sector": candidate_data.get('sector'),
-                "volume_info": vol_info,
-                "upside_info": upside_info
-            })
-            
-            # 2. CEO Report
-            logger.info(f"Generating CEO Report for {symbol}...")
-            ceo_report = ceo_chain.invoke({
-                "company_name": company_name,
-                "symbol": symbol
-            })
+            prior = reusable_report(db, symbol, today) if db else None
+            if db:
+                metrics.record_cache("report_reuse", prior is not None)
             
-            report_content = ReportContent(
-                company_report=company_report,
-                ceo_report=ceo_report
-            )
+            if prior:
+                # Repeat candidate: keep the earlier reports, describe what moved since
+                run_date, prior_result = prior
+                logger.info(f"Reusing reports for {symbol} from {run_date}", extra={"symbol": symbol})
+                report_content = ReportContent(
+                    company_report=prior_result['reports'].get('company_report'),
+                    ceo_report=prior_result['reports'].get('ceo_report'),
+                    generated_on=prior_result['reports'].get('generated_on') or run_date,
+                    changes=what_changed(prior_result, item, run_date)
+                )
+            # Budget guard: keep the pick in the results, just without reports
+            elif usage.budget_exhausted():
+                usage.skip_for_budget(symbol)
+                report_content = None
+            elif degradation_level(state.get("deadline")) >= NO_REPORTS:
+                # Deadline guard: same, to get the results out on time
+                applied_level = max(applied_level, degradation_level(state.get("deadline")))
+                logger.info(f"Skipping reports for {symbol} to meet the deadline", extra={"symbol": symbol})
+                report_content = None
+            else:
+                # 1. Company Report
+                logger.info(f"Generating Company Report for {symbol}...", extra={"symbol": symbol})
+                # Prepare context
+                vol_info = f"Ratio: {item['volume_analysis']['ratio']:.2f}x, AvgVol: {item['volume_analysis']['avg_volume']}"
+                upside_info = f"Upside: {item['analyst_rating']['upside_percent']:.1f}%, Target: ${item['analyst_rating']['target_consensus']}"
+                if item['analyst_rating'].get('consensus_change_percent') is not None:
+                    upside_info += (f", Consensus {config.ANALYST_TREND_DAYS}d change: "
+                                    f"{item['analyst_rating']['consensus_change_percent']:+.1f}%")
+                
+                company_report = company_chain.invoke({
+                    "company_name": company_name,
+                    "symbol": symbol,
+                    "industry": candidate_data.get('industry'),
+                    "sector": candidate_data.get('sector'),
+                    "volume_info": vol_info,
+                    "upside_info": upside_info
+                }, config=llm_run_config(COMPANY_REPORT, symbol))
+                
+                # 2. CEO Report (first to go under deadline pressure)
+                level = degradation_level(state.get("deadline"))
+                if level >= NO_CEO_REPORTS:
+                    applied_level = max(applied_level, level)
+                    logger.info(f"Skipping CEO Report for {symbol} to meet the deadline", extra={"symbol": symbol})
+                    ceo_report = None
+                else:
+                    logger.info(f"Generating CEO Report for {symbol}...", extra={"symbol": symbol})
+                    ceo_report = ceo_chain.invoke({
+                        "company_name": company_name,
+                        "symbol": symbol
+                    }, config=llm_run_config(CEO_REPORT, symbol))
+                
+                report_content = ReportContent(
+                    company_report=company_report,
+                    ceo_report=ceo_report,
+                    generated_on=today
+                )
             
             # Assemble Final Result
             result = StockResult(
@@ -77,7 +175,11 @@ def reporting_node(state: GraphState) -> Dict[str, Any]:
             final_results.append(result)
             
         except Exception as e:
-            logger.error(f"Error generating report for {symbol}: {e}")
+            logger.error(f"Error generating report for {symbol}: {e}", extra={"symbol": symbol})
             continue
-            
+    
+    if db:
+        db.close()
+    if applied_level:
+        return {"results": final_results, "degradation_level": applied_level}
     return {"results": final_results}
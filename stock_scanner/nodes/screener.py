@@ -3,6 +3,8 @@ from stock_scanner.state import GraphState
 from stock_scanner.utils.api_client import FMPClient
 from stock_scanner.config import config
 from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.quota import prioritize
+from stock_scanner.utils.deadline import FILTERS_TRUNCATED, expired
 
 logger = get_logger(__name__)
 
@@ -13,6 +15,11 @@ def screener_node(state: GraphState) -> Dict[str, Any]:
     client = FMPClient()
     logger.info("Executing Screener Node")
     
+    if expired(state.get("deadline")):
+        # Nothing left but the reserve for the CSV and email
+        logger.warning("Deadline reached before the screener ran: no candidates this run")
+        return {"candidates": [], "degradation_level": FILTERS_TRUNCATED}
+    
     try:
         candidates = client.get_stock_screener(
             min_market_cap=config.DEFAULT_MIN_MARKET_CAP,
@@ -20,6 +27,8 @@ def screener_node(state: GraphState) -> Dict[str, Any]:
             min_volume=config.DEFAULT_MIN_VOLUME
         )
         logger.info(f"Found {len(candidates)} candidates.")
+        if config.PRIORITIZE_CANDIDATES and candidates and not expired(state.get("deadline")):
+            candidates = prioritize(client, candidates)
         return {"candidates": candidates}
     except Exception as e:
         logger.error(f"Screener failed: {e}")
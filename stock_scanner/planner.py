@@ -0,0 +1,110 @@
+"""
+Cost-based ordering of the independent cheap filters (volume, upside, ...).
+
+Every filter node records, per run, its wall time, FMP requests and items
+in/out (utils/metrics.py, saved in <DATA_DIR>/summaries/run_summary_*.json,
+which persists between runs like the rest of DATA_DIR). From the last
+PLANNER_HISTORY_RUNS summaries the planner estimates each filter's cost per
+item and pass rate, then orders the filters by
+
+    rank = cost per item / (1 - pass rate)
+
+which minimises expected cost for independent filters (cheap, selective
+filters first). Cost counts both wall time and FMP requests, since the daily
+call quota binds as much as the clock: seconds per item and requests per item
+are each scaled by the largest filter's, then summed. A filter without history keeps the default order, so a new
+screen is measured in its default slot before it is moved. The result set is
+the same in any order; only the I/O spent reaching it changes.
+"""
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Independent filters between the screener and the LLM stages, in default order
+FILTERS = ["volume_filter", "analyst_filter"]
+
+# Filter i reads FILTER_KEYS[i] and writes FILTER_KEYS[i + 1]
+FILTER_KEYS = ["candidates", "spiked_stocks", "analyst_picks"]
+
+def summaries_dir() -> Path:
+    """Where run summaries are kept for the planner."""
+    return config.DATA_DIR / "summaries"
+
+def load_stage_stats(summary_dir: Optional[Path] = None, runs: Optional[int] = None) -> Dict[str, Dict]:
+    """Aggregated per-filter seconds, requests and items in/out from the latest run summaries."""
+    summary_dir = Path(summary_dir or summaries_dir())
+    paths = sorted(summary_dir.glob("run_summary_*.json"))[-(runs or config.PLANNER_HISTORY_RUNS):]
+    stats: Dict[str, Dict] = {}
+    for path in paths:
+        try:
+            nodes = json.loads(path.read_text()).get("metrics", {}).get("nodes", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable run summary {path}: {e}")
+            continue
+        for name in FILTERS:
+            node = nodes.get(name)
+            if not node or not node.get("items_in"):
+                continue
+            total = stats.setdefault(name, {"runs": 0, "seconds": 0.0, "requests": 0, "items_in": 0, "items_out": 0})
+            total["runs"] += 1
+            for key in ("seconds", "requests", "items_in", "items_out"):
+                total[key] += node.get(key, 0)
+    return stats
+
+def cost_scale(stats: Dict[str, Dict]) -> Dict[str, float]:
+    """Largest seconds and requests per item across filters, to put both costs on one scale."""
+    return {key: max((stage[key] / stage["items_in"] for stage in stats.values()), default=0.0)
+            for key in ("seconds", "requests")}
+
+def rank(stage: Dict, scale: Dict[str, float]) -> float:
+    cost = sum(stage[key] / stage["items_in"] / scale[key] for key in ("seconds", "requests") if scale[key])
+    pass_rate = min(stage["items_out"] / stage["items_in"], 1.0)
+    return cost / (1 - pass_rate) if pass_rate < 1 else math.inf
+
+def plan(stats: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    {"order": [...], "source": "planner" | "default", "stages": per-filter estimates}
+    for the run summary.
+    """
+    if stats is None:
+        stats = load_stage_stats()
+    scale = cost_scale(stats)
+    stages = {}
+    for name, stage in stats.items():
+        stage_rank = rank(stage, scale)
+        stages[name] = {
+            "runs": stage["runs"],
+            "seconds_per_item": round(stage["seconds"] / stage["items_in"], 6),
+            "requests_per_item": round(stage["requests"] / stage["items_in"], 4),
+            "pass_rate": round(stage["items_out"] / stage["items_in"], 4),
+            "rank": round(stage_rank, 6) if stage_rank != math.inf else None,
+        }
+
+    if not config.PLANNER_ENABLED or any(name not in stats for name in FILTERS):
+        return {"order": list(FILTERS), "source": "default", "stages": stages}
+    # Stable sort: ties keep the default order
+    order = sorted(FILTERS, key=lambda name: rank(stats[name], scale))
+    if order != FILTERS:
+        logger.info(f"Planner reordered filters: {' -> '.join(order)}")
+    return {"order": order, "source": "planner", "stages": stages}
+
+def stage_counts(state: Dict, order: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Items left after the screener and after each filter, in run order. Labelled
+    by position: with a planned order a filter's output lands in whichever
+    FILTER_KEYS slot it ran in, not under its default-order key.
+    """
+    counts = {"screener": len(state.get(FILTER_KEYS[0]) or [])}
+    for i, name in enumerate(order or FILTERS):
+        counts[name] = len(state.get(FILTER_KEYS[i + 1]) or [])
+    return counts
+
+def pipeline(order: Optional[List[str]] = None) -> List[str]:
+    """Full node sequence for a filter order."""
+    return ["screener", *(order or FILTERS), "news_analysis", "reporter"]
@@ -0,0 +1,164 @@
+"""
+Offline what-if replay of the cheap filters over a stored run.
+
+Re-applies the volume-spike and analyst-upside thresholds to a run's stage
+snapshots (storage/snapshots.py) without any FMP or LLM call, and reports
+which symbols enter or leave the analyst picks. Spikes the original run never
+fetched a target for (they were below its spike threshold) fall back to the
+local price-target store's consensus as of the run date. Only with
+`--run-llm` are the newly admitted symbols pushed through the news/report
+stages.
+
+The VOLUME_MIN_SPIKE_DAYS persistence filter is not replayed: persistence is
+only computed for the original run's spikes. When the planner ran the upside
+filter first, only its survivors have volume metrics, so a lower `--min-gain`
+cannot admit the others; they are listed as unchecked instead.
+
+Usage:
+    python -m stock_scanner.main --replay 2026-01-18_20-06 --spike 2.0 --min-gain 30 [--run-llm]
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from stock_scanner.models import AnalystRating, VolumeAnalysis
+from stock_scanner.planner import FILTERS
+from stock_scanner.storage.runs import RunStore
+from stock_scanner.storage.snapshots import load_snapshot
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _store_targets(symbols: List[str], prices: pd.Series, as_of: pd.Timestamp) -> pd.DataFrame:
+    """Consensus targets from the local price-target store for spikes the run never priced."""
+    from stock_scanner.storage.price_targets import default_store
+
+    store = default_store()
+    rows = []
+    for symbol in symbols:
+        index = store.as_of_index(symbol)
+        consensus = index.lookup(as_of)[1] if index is not None else None
+        price = prices.get(symbol)
+        if consensus and price:
+            rows.append({"symbol": symbol, "target": consensus, "upside": (consensus - price) / price * 100,
+                         "target_source": "store"})
+    return pd.DataFrame(rows, columns=["symbol", "target", "upside", "target_source"])
+
+def evaluate(snapshot: dict, spike: float, min_gain: float, as_of: pd.Timestamp) -> pd.DataFrame:
+    """Volume rows that pass both thresholds, with their target and upside."""
+    volume = snapshot["volume"]
+    if volume.empty:
+        return pd.DataFrame(columns=["symbol", "ratio", "target", "upside", "target_source"])
+    volume = volume.drop_duplicates("symbol", keep="last") # The screener can list a symbol twice
+    spiked = volume[volume["ratio"] >= spike]
+
+    targets = snapshot["targets"]
+    targets = (targets[["symbol", "target", "upside"]].assign(target_source="run")
+               if not targets.empty else pd.DataFrame(columns=["symbol", "target", "upside", "target_source"]))
+    missing = sorted(set(spiked["symbol"]) - set(targets["symbol"]))
+    if missing:
+        fallback = _store_targets(missing, spiked.set_index("symbol")["price"], as_of)
+        targets = pd.concat([targets, fallback], ignore_index=True) if not fallback.empty else targets
+
+    picks = spiked.merge(targets, on="symbol", how="inner")
+    return picks[picks["upside"] >= min_gain].sort_values("ratio", ascending=False)
+
+def replay(run_id: str, spike: Optional[float] = None, min_gain: Optional[float] = None,
+           store: Optional[RunStore] = None) -> Dict:
+    """
+    Compares the picks under the run's own thresholds with those under
+    `spike` / `min_gain` (unset = the run's value).
+    """
+    store = store or RunStore()
+    snapshot = load_snapshot(store.run_dir(run_id))
+    if snapshot is None:
+        raise FileNotFoundError(f"No stage snapshots for run {run_id} in {store.run_dir(run_id)}")
+
+    start = time.perf_counter()
+    meta = snapshot["meta"]
+    as_of = pd.Timestamp(run_id[:10])
+    spike = meta["spike_threshold"] if spike is None else spike
+    min_gain = meta["upside_threshold"] if min_gain is None else min_gain
+
+    # Upside filter first: symbols below the run's upside bar never got a volume row
+    order = meta.get("filter_order") or list(FILTERS)
+    unchecked = []
+    if order[0] == "analyst_filter" and min_gain < meta["upside_threshold"] and not snapshot["targets"].empty:
+        targets = snapshot["targets"]
+        volume_checked = set(snapshot["volume"].get("symbol", []))
+        unchecked = sorted(set(targets[targets["upside"] >= min_gain]["symbol"]) - volume_checked)
+        if unchecked:
+            logger.warning(f"{len(unchecked)} symbols pass the lower upside bar but were never volume-checked "
+                           f"in run {run_id} (upside filter ran first)")
+
+    before = evaluate(snapshot, meta["spike_threshold"], meta["upside_threshold"], as_of)
+    after = evaluate(snapshot, spike, min_gain, as_of)
+    before_symbols, after_symbols = set(before["symbol"]), set(after["symbol"])
+    return {
+        "run_id": run_id,
+        "thresholds": {"before": {"spike": meta["spike_threshold"], "min_gain": meta["upside_threshold"]},
+                       "after": {"spike": spike, "min_gain": min_gain}},
+        "picks": after,
+        "entered": after[~after["symbol"].isin(before_symbols)],
+        "left": before[~before["symbol"].isin(after_symbols)],
+        "kept": sorted(before_symbols & after_symbols),
+        "filter_order": order,
+        "unchecked": unchecked,
+        "seconds": time.perf_counter() - start,
+    }
+
+def admitted_picks(outcome: Dict, snapshot_universe: pd.DataFrame) -> List[Dict]:
+    """Newly admitted symbols in the `analyst_picks` shape expected by the news stage."""
+    universe = (snapshot_universe.drop_duplicates("symbol", keep="last").set_index("symbol")
+                if not snapshot_universe.empty else pd.DataFrame())
+    picks = []
+    for row in outcome["entered"].itertuples(index=False):
+        candidate = {"symbol": row.symbol, "price": row.price}
+        if row.symbol in universe.index:
+            candidate = {k: (None if pd.isna(v) else v) for k, v in universe.loc[row.symbol].items()
+                         if pd.api.types.is_scalar(v)}
+            candidate["symbol"] = row.symbol
+        picks.append({
+            "candidate": candidate,
+            "volume_analysis": VolumeAnalysis(symbol=row.symbol, current_volume=int(row.volume),
+                                              avg_volume=int(row.avg_volume), ratio=float(row.ratio),
+                                              is_spike=True).model_dump(),
+            "analyst_rating": AnalystRating(symbol=row.symbol, target_consensus=float(row.target),
+                                            upside_percent=float(row.upside)).model_dump(),
+        })
+    return picks
+
+def run_replay(run_id: str, spike: Optional[float], min_gain: Optional[float], run_llm: bool = False):
+    """CLI entry point: prints the diff and optionally runs the LLM stages for new entrants."""
+    outcome = replay(run_id, spike, min_gain)
+    before, after = outcome["thresholds"]["before"], outcome["thresholds"]["after"]
+    print(f"Replay of {run_id}: spike {before['spike']}x -> {after['spike']}x, "
+          f"min gain {before['min_gain']}% -> {after['min_gain']}% ({outcome['seconds'] * 1000:.1f} ms)")
+    print(f"{len(outcome['picks'])} picks: {len(outcome['entered'])} entered, "
+          f"{len(outcome['left'])} left, {len(outcome['kept'])} unchanged")
+    for label, frame in (("+", outcome["entered"]), ("-", outcome["left"])):
+        for row in frame.itertuples(index=False):
+            print(f"  {label} {row.symbol:<6} ratio {row.ratio:.2f}x  upside {row.upside:.1f}%  "
+                  f"(target ${row.target:.2f}, {row.target_source})")
+    if outcome["unchecked"]:
+        print(f"  ! {len(outcome['unchecked'])} symbols clear the new upside bar but have no volume metrics "
+              f"(this run filtered on upside first): {', '.join(outcome['unchecked'])}")
+
+    if not run_llm or outcome["entered"].empty:
+        return
+    from stock_scanner.graph import get_app
+    from stock_scanner.main import save_results
+
+    universe = load_snapshot(RunStore().run_dir(run_id))["universe"]
+    picks = admitted_picks(outcome, universe)
+    logger.info(f"Running news/report stages for {len(picks)} newly admitted symbols")
+    final_state = get_app("news_analysis").invoke({
+        "candidates": [], "spiked_stocks": [], "analyst_picks": picks,
+        "news_analyzed_stocks": [], "results": [], "errors": [],
+    })
+    results = final_state.get("results", [])
+    if results:
+        csv_filename = save_results(results, f"replay_{run_id}_{datetime.now().strftime('%Y-%m-%d_%H-%M')}")
+        print(f"Saved {len(results)} replay results to {csv_filename}")
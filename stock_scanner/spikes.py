@@ -0,0 +1,78 @@
+"""
+Multi-day volume spike persistence over the whole candidate universe.
+
+Brings the `analyze_volume_spike` analysis of the old scripts (spikes in the
+last `recent_days` against a 60-day average) into one vectorized pass over a
+(symbols x days) volume matrix instead of one DataFrame per symbol.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from stock_scanner import indicators
+from stock_scanner.config import config
+
+PERSISTENCE_FIELDS = ['spike_days', 'max_spike_ratio', 'days_since_first_spike', 'accumulation_trend']
+
+def volume_matrix(histories: Sequence[List[dict]], days: int) -> np.ndarray:
+    """
+    FMP `historical` lists (newest first) -> (symbols x days) volumes, oldest to
+    newest. Series are aligned on their most recent session and left-padded
+    with NaN when shorter than `days`.
+    """
+    matrix = np.full((len(histories), days), np.nan)
+    for i, history in enumerate(histories):
+        volumes = [d.get('volume', np.nan) for d in history[:days]]
+        if volumes:
+            matrix[i, days - len(volumes):] = volumes[::-1]
+    return matrix
+
+def spike_persistence(volumes: np.ndarray, recent_days: int = config.SPIKE_RECENT_DAYS,
+                      ma_days: int = config.SPIKE_MA_DAYS,
+                      threshold: float = config.SPIKE_RATIO_THRESHOLD) -> Dict[str, np.ndarray]:
+    """
+    Per symbol (row), over the last `recent_days` sessions, with each day's
+    ratio taken against the average of the previous `ma_days` sessions:
+
+    - spike_days: sessions with ratio >= threshold
+    - max_spike_ratio: highest ratio
+    - days_since_first_spike: sessions since the first spike in the window (NaN if none)
+    - accumulation_trend: least-squares slope of the ratio per session
+      (> 0 means volume keeps building)
+
+    Rows without enough history get NaN everywhere.
+    """
+    volumes = np.atleast_2d(np.asarray(volumes, dtype=float))
+    ratio = volumes / indicators.shift(indicators.rolling_mean(volumes, ma_days))
+    recent = ratio[:, -recent_days:]
+    valid = ~np.isnan(recent).any(axis=1)
+
+    spike = recent >= threshold
+    spike_days = spike.sum(axis=1).astype(float)
+    first = np.argmax(spike, axis=1)
+    days_since_first = np.where(spike_days > 0, recent_days - 1 - first, np.nan)
+
+    t = np.arange(recent_days) - (recent_days - 1) / 2
+    centered = recent - recent.mean(axis=1, keepdims=True)
+    trend = (centered * t).sum(axis=1) / (t * t).sum() if recent_days > 1 else np.zeros(len(recent))
+
+    with np.errstate(invalid='ignore'):
+        max_ratio = recent.max(axis=1)
+
+    def masked(values):
+        return np.where(valid, values, np.nan)
+
+    return {
+        'spike_days': masked(spike_days),
+        'max_spike_ratio': masked(max_ratio),
+        'days_since_first_spike': masked(days_since_first),
+        'accumulation_trend': masked(trend),
+    }
+
+def persistence_rank_key(analysis: dict):
+    """Sort key: most spike days first, then the strongest spike (missing data last)."""
+    spike_days = analysis.get('spike_days')
+    max_ratio = analysis.get('max_spike_ratio')
+    return (-(spike_days if spike_days is not None else -1),
+            -(max_ratio if max_ratio is not None else 0.0),
+            -analysis.get('ratio', 0.0))
@@ -1,7 +1,10 @@
-from typing import TypedDict, List, Annotated, Dict, Any
+from typing import TypedDict, List, Annotated, Dict, Any, Optional
 from stock_scanner.models import StockResult
 import operator
 
+def _highest(current: int, update: int) -> int:
+    return max(current or 0, update or 0)
+
 class GraphState(TypedDict):
     """State for the LangGraph workflow."""
     
@@ -22,3 +25,9 @@ class GraphState(TypedDict):
     
     # Errors encountered
     errors: List[str]
+    
+    # Unix timestamp the scan must finish by (None = no deadline), see utils/deadline.py
+    deadline: Optional[float]
+    
+    # Highest degradation level any node applied to meet the deadline
+    degradation_level: Annotated[int, _highest]
@@ -0,0 +1,226 @@
+"""
+Materialized daily technical features, one row per symbol-date.
+
+Derived series that used to be recomputed ad hoc (30/60-day volume averages,
+the 60-day volume z-score, returns, ATR and the forward outcomes used by the
+backtests) are computed once per symbol with `stock_scanner.indicators` and stored as
+Parquet next to the price history:
+
+    <DATA_DIR>/history/features/<SYMBOL>.parquet
+
+Updates are incremental: only dates after the stored tail are added, plus the
+last FORWARD_HORIZONS[-1] rows whose forward outcomes were still incomplete.
+
+The backtest runner, the parameter sweep and the volume node read these
+columns (via `fresh_symbols` / `load_universe` / `volume_baseline`) instead of
+recomputing them whenever a symbol's file is at least as new as its prices.
+
+Usage:
+    python -m stock_scanner.storage.features --update [--symbols AAPL MSFT]
+"""
+import argparse
+import os
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from stock_scanner import indicators
+from stock_scanner.backtest.engine import VOLATILITY_DAYS, forward_outcome, prepare_prices, volatility
+from stock_scanner.config import config
+from stock_scanner.storage.history import HistoryStore, _atomic_write
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FORWARD_HORIZONS = (5, 10, 15)
+ATR_DAYS = 14
+ZSCORE_DAYS = 60
+
+# Rolling windows need this many earlier rows to be warm when recomputing a tail
+WARMUP_ROWS = max(60, ZSCORE_DAYS, ATR_DAYS) + 1
+
+FEATURE_COLUMNS = (
+    ['symbol', 'date', 'close', 'volume', 'vol_ma_30', 'vol_ma_60', 'vol_ratio_30', 'vol_ratio_60',
+     'vol_zscore_60', 'return_1d', 'atr_14', f'volatility_{VOLATILITY_DAYS}']
+    + [f'fwd_max_gain_{h}' for h in FORWARD_HORIZONS]
+    + [f'fwd_return_{h}' for h in FORWARD_HORIZONS]
+    + ['fwd_days']
+)
+
+def compute_daily_features(symbol: str, prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Features for every row of a prepared (date-sorted) price frame.
+
+    vol_ma_N is the average of the previous N sessions (today excluded, as in
+    the scanner and backtest); vol_zscore_60 is today's volume against the 60
+    sessions ending today; volatility_20 is the stdev (%) of daily returns.
+    Forward columns are in % over the next H sessions,
+    truncated at the end of the data (fwd_days = sessions observed, max H).
+    """
+    df = prices
+    volume = df['volume'].to_numpy(dtype=float)
+    close = df['close'].to_numpy(dtype=float)
+    high, low = df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float)
+    prev_close = indicators.shift(close)
+
+    out = pd.DataFrame({'symbol': symbol, 'date': df['date'], 'close': close, 'volume': volume})
+    out['vol_ma_30'] = indicators.shift(indicators.rolling_mean(volume, 30))
+    out['vol_ma_60'] = indicators.shift(indicators.rolling_mean(volume, 60))
+    out['vol_ratio_30'] = volume / out['vol_ma_30']
+    out['vol_ratio_60'] = volume / out['vol_ma_60']
+    out['vol_zscore_60'] = indicators.rolling_zscore(volume, ZSCORE_DAYS)
+
+    out['return_1d'] = (close / prev_close - 1) * 100
+    true_range = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    out['atr_14'] = indicators.rolling_mean(true_range, ATR_DAYS)
+    # Same definition as the backtest's position-sizing volatility
+    out[f'volatility_{VOLATILITY_DAYS}'] = volatility(pd.Series(close)).to_numpy()
+
+    entry = close
+    for h in FORWARD_HORIZONS:
+        max_price, exit_price, days = forward_outcome(df, h)
+        out[f'fwd_max_gain_{h}'] = (max_price - entry) / entry * 100
+        out[f'fwd_return_{h}'] = np.where(days > 0, (exit_price - entry) / entry * 100, np.nan)
+    out['fwd_days'] = days
+    return out[FEATURE_COLUMNS].reset_index(drop=True)
+
+def covers(holding_periods: Sequence[int], ma_days: int = 30) -> bool:
+    """True if the stored columns include these forward horizons and volume average."""
+    return ma_days == 30 and all(h in FORWARD_HORIZONS for h in holding_periods)
+
+class FeatureStore:
+    """Per-symbol feature files, updated incrementally from the price history."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or config.DATA_DIR / "history" / "features")
+
+    def path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.parquet"
+
+    def load(self, symbol: str, columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+        path = self.path(symbol)
+        return pd.read_parquet(path, columns=columns) if path.exists() else None
+
+    def load_universe(self, columns: Optional[Sequence[str]] = None, start=None,
+                      symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Reads the requested columns for all (or `symbols`) stored symbols into one frame."""
+        if columns is not None:
+            columns = list(dict.fromkeys(['symbol', 'date', *columns]))
+        if symbols is None:
+            paths = sorted(self.root.glob("*.parquet")) if self.root.exists() else []
+        else:
+            paths = [self.path(s) for s in symbols if self.path(s).exists()]
+        filters = [('date', '>=', pd.Timestamp(start))] if start is not None else None
+        frames = [pd.read_parquet(p, columns=columns, filters=filters) for p in paths]
+        if not frames:
+            return pd.DataFrame(columns=columns or FEATURE_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def fresh_symbols(self, history: HistoryStore, symbols: Sequence[str]) -> List[str]:
+        """
+        Symbols whose feature file is at least as new as their stored prices
+        and has the current columns (two stats and a footer read each).
+        """
+        fresh = []
+        for symbol in symbols:
+            try:
+                if (os.stat(self.path(symbol)).st_mtime >= os.stat(history.prices_path(symbol)).st_mtime
+                        and pq.read_schema(self.path(symbol)).names == FEATURE_COLUMNS):
+                    fresh.append(symbol)
+            except FileNotFoundError:
+                continue
+        return fresh
+
+    def volume_baseline(self, symbol: str, day: date) -> Optional[float]:
+        """
+        Average volume of the 30 sessions before `day`, as the scanner computes
+        it, when the stored features end on `day` or on the business day before
+        it; None when the symbol is not stored or its features are older.
+        """
+        df = self.load(symbol, columns=['date', 'volume', 'vol_ma_30'])
+        if df is None or df.empty:
+            return None
+        last = df['date'].iloc[-1].date()
+        if last == day:
+            value = df['vol_ma_30'].iloc[-1]
+        elif last < day and np.busday_count(last, day) == 1:
+            window = df['volume'].iloc[-30:]
+            value = window.mean() if len(window) == 30 else np.nan
+        else:
+            return None
+        return float(value) if value > 0 else None # NaN compares False
+
+    def volume_history(self, symbol: str, sessions: int) -> List[dict]:
+        """
+        The newest `sessions` stored daily volumes as an FMP `historical` list
+        (newest first), for seeding the rolling volume state without a download.
+        """
+        df = self.load(symbol, columns=['date', 'volume'])
+        if df is None or df.empty:
+            return []
+        tail = df.iloc[-sessions:]
+        return [{"date": str(d.date()), "volume": float(v)}
+                for d, v in zip(reversed(tail['date'].tolist()), reversed(tail['volume'].tolist()))]
+
+    def update(self, symbol: str, prices: pd.DataFrame) -> int:
+        """
+        Brings the stored features up to date with `prices` (full stored history).
+        Only the incomplete tail and new dates are recomputed; returns rows written.
+        """
+        if prices is None or prices.empty:
+            return 0
+        prices = prepare_prices(prices)
+        existing = self.load(symbol)
+
+        if existing is None or existing.empty or list(existing.columns) != FEATURE_COLUMNS:
+            # New symbol, or a file written before a column was added
+            fresh = compute_daily_features(symbol, prices)
+            self._save(symbol, fresh)
+            return len(fresh)
+
+        last = existing['date'].max().to_datetime64()
+        dates = prices['date'].to_numpy()
+        if dates[-1] <= last:
+            return 0 # No new bars, so nothing (forward outcomes included) can change
+        # First row to rewrite: the rows still missing forward data, then the new dates
+        first = max(int(np.searchsorted(dates, last, side='right')) - max(FORWARD_HORIZONS), 0)
+
+        window = prices.iloc[max(first - WARMUP_ROWS, 0):].reset_index(drop=True)
+        tail = compute_daily_features(symbol, window)
+        tail = tail[tail['date'] >= dates[first]]
+        kept = existing[existing['date'] < dates[first]]
+        self._save(symbol, pd.concat([kept, tail], ignore_index=True))
+        return len(tail)
+
+    def update_from_history(self, history: HistoryStore, symbols: Optional[List[str]] = None) -> int:
+        """Refreshes features for `symbols` (default: every stored symbol)."""
+        total = 0
+        for symbol in symbols or history.symbols():
+            try:
+                total += self.update(symbol, history.load_prices(symbol))
+            except Exception as e:
+                logger.error(f"Feature update failed for {symbol}: {e}", extra={"symbol": symbol})
+        return total
+
+    def _save(self, symbol: str, df: pd.DataFrame):
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_write(df, self.path(symbol))
+
+def main():
+    parser = argparse.ArgumentParser(description='Daily feature store over the local history store')
+    parser.add_argument('--update', action='store_true', help='Recompute new/incomplete rows for stored symbols')
+    parser.add_argument('--symbols', nargs='+', default=None)
+    args = parser.parse_args()
+
+    history = HistoryStore()
+    store = FeatureStore(history.root / "features")
+    if args.update:
+        rows = store.update_from_history(history, args.symbols)
+        print(f"Wrote {rows} feature rows to {store.root}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRICE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+class HistoryStore:
+    """
+    Local per-symbol store of daily prices and analyst price-target events,
+    one Parquet file per symbol:
+
+        <root>/prices/<SYMBOL>.parquet    date, open, high, low, close, volume
+        <root>/targets/<SYMBOL>.parquet   publishedDate, priceTarget, ...
+        <root>/features/<SYMBOL>.parquet  derived daily features (storage.features)
+        <root>/universe/                  memory-mapped price matrix (storage.universe)
+
+    Backtests read from here instead of re-downloading from FMP on every run.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or config.DATA_DIR / "history")
+        self.prices_dir = self.root / "prices"
+        self.targets_dir = self.root / "targets"
+
+    def prices_path(self, symbol: str) -> Path:
+        return self.prices_dir / f"{symbol}.parquet"
+
+    def targets_path(self, symbol: str) -> Path:
+        return self.targets_dir / f"{symbol}.parquet"
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored price history."""
+        if not self.prices_dir.exists():
+            return []
+        return sorted(p.stem for p in self.prices_dir.glob("*.parquet"))
+
+    def has_prices(self, symbol: str) -> bool:
+        return self.prices_path(symbol).exists()
+
+    def load_prices(self, symbol: str) -> Optional[pd.DataFrame]:
+        path = self.prices_path(symbol)
+        return pd.read_parquet(path) if path.exists() else None
+
+    def load_targets(self, symbol: str) -> Optional[pd.DataFrame]:
+        path = self.targets_path(symbol)
+        return pd.read_parquet(path) if path.exists() else None
+
+    def save_prices(self, symbol: str, df: pd.DataFrame):
+        self.prices_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(df, self.prices_path(symbol))
+
+    def save_targets(self, symbol: str, df: pd.DataFrame):
+        self.targets_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(df, self.targets_path(symbol))
+
+    def upsert_prices(self, symbol: str, history: List[dict]) -> pd.DataFrame:
+        """Merges FMP `historical` records into the stored series (newer rows win)."""
+        new = pd.DataFrame(history)
+        if new.empty:
+            return self.load_prices(symbol)
+        new = new[[c for c in PRICE_COLUMNS if c in new.columns]]
+        new['date'] = pd.to_datetime(new['date']).astype('datetime64[ns]')
+
+        existing = self.load_prices(symbol)
+        if existing is not None:
+            new = pd.concat([existing, new], ignore_index=True)
+        df = (new.drop_duplicates('date', keep='last')
+                 .sort_values('date')
+                 .reset_index(drop=True))
+        self.save_prices(symbol, df)
+        return df
+
+    def ingest(self, symbol: str, client, days: int = config.BACKTEST_HISTORY_DAYS):
+        """Downloads prices and price-target events for `symbol` into the store and refreshes its features."""
+        hist_data = client.get_historical_price(symbol, days=days)
+        history = hist_data.get('historical', []) if hist_data else []
+        if history:
+            prices = self.upsert_prices(symbol, history)
+            from stock_scanner.storage.features import FeatureStore
+            FeatureStore(self.root / "features").update(symbol, prices)
+
+        # Only events newer than the stored watermark are appended
+        from stock_scanner.storage.price_targets import PriceTargetStore
+        PriceTargetStore(self.targets_dir).update(symbol, client)
+
+def _atomic_write(df: pd.DataFrame, path: Path):
+    """Writes via a temp file + rename so readers never see a partial file."""
+    tmp = path.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(path)
@@ -0,0 +1,201 @@
+"""
+Incremental store of analyst price-target events with an as-of index.
+
+Events (publishedDate, priceTarget, analyst...) are kept per symbol in
+<DATA_DIR>/history/targets/<SYMBOL>.parquet, the same files the backtester
+reads. `update()` only appends events that are not stored yet (matched on
+date, analyst / firm and target, so late events are kept even when they are
+not past the latest stored publishedDate), and `as_of_index()` answers "latest / consensus target
+on date D" with a binary search.
+
+Usage:
+    python -m stock_scanner.storage.price_targets --update AAPL MSFT
+    python -m stock_scanner.storage.price_targets --show AAPL --as-of 2025-06-30
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from stock_scanner.config import config
+from stock_scanner.storage.history import _atomic_write
+from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+EVENT_COLUMNS = ['publishedDate', 'priceTarget', 'analystName', 'analystCompany', 'newsPublisher']
+
+# Identifies one event; re-fetched history is deduplicated on these
+EVENT_KEY = ['publishedDate', 'analystName', 'analystCompany', 'priceTarget']
+
+DateLike = Union[str, pd.Timestamp, np.datetime64]
+
+class AsOfIndex:
+    """
+    Sorted event dates plus, per event, the latest single target and a running
+    consensus (mean of each analyst's most recent target so far).
+    Lookups are O(log n) via `np.searchsorted`.
+    """
+
+    def __init__(self, events: Union[List[dict], pd.DataFrame]):
+        events = normalize_events(events).sort_values('publishedDate', kind='stable')
+        self.dates = events['publishedDate'].to_numpy().astype('datetime64[D]')
+        self.latest = events['priceTarget'].to_numpy(dtype=float)
+
+        # Running per-analyst consensus; one pass over the (small) event list
+        analyst = events['analystCompany'].fillna(events['analystName'])
+        current: Dict[str, float] = {}
+        total = 0.0
+        consensus = np.empty(len(events))
+        counts = np.empty(len(events), dtype=np.int64)
+        for i, (key, target) in enumerate(zip(analyst.to_numpy(), self.latest)):
+            key = key if isinstance(key, str) and key else f"_anon{i}"
+            total += target - current.get(key, 0.0)
+            current[key] = target
+            consensus[i] = total / len(current)
+            counts[i] = len(current)
+        self.consensus = consensus
+        self.analyst_counts = counts
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _positions(self, dates) -> np.ndarray:
+        dates = np.asarray(pd.to_datetime(dates).values).astype('datetime64[D]')
+        return np.searchsorted(self.dates, dates, side='right') - 1
+
+    def lookup(self, date: DateLike) -> Tuple[Optional[float], Optional[float], int]:
+        """(latest target, consensus, analyst count) as of `date` (inclusive)."""
+        pos = int(self._positions([date])[0])
+        if pos < 0:
+            return None, None, 0
+        return float(self.latest[pos]), float(self.consensus[pos]), int(self.analyst_counts[pos])
+
+    def latest_at(self, dates) -> np.ndarray:
+        """Vectorized latest target for each date (NaN before the first event)."""
+        pos = self._positions(dates)
+        return np.where(pos >= 0, self.latest[np.maximum(pos, 0)], np.nan) if len(self) else np.full(len(pos), np.nan)
+
+    def consensus_at(self, dates) -> np.ndarray:
+        """Vectorized running consensus for each date (NaN before the first event)."""
+        pos = self._positions(dates)
+        return np.where(pos >= 0, self.consensus[np.maximum(pos, 0)], np.nan) if len(self) else np.full(len(pos), np.nan)
+
+class PriceTargetStore:
+    """Per-symbol price-target event files with deduplicated incremental updates."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or config.DATA_DIR / "history" / "targets")
+        self._indexes: Dict[str, Tuple[float, AsOfIndex]] = {}
+
+    def path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.parquet"
+
+    def load(self, symbol: str) -> Optional[pd.DataFrame]:
+        path = self.path(symbol)
+        return pd.read_parquet(path) if path.exists() else None
+
+    def watermark(self, symbol: str) -> Optional[pd.Timestamp]:
+        """Latest stored publishedDate, or None if nothing is stored yet."""
+        df = self.load(symbol)
+        if df is None or df.empty:
+            return None
+        return df['publishedDate'].max()
+
+    def append(self, symbol: str, events: List[dict]) -> int:
+        """Adds the events not stored yet (by EVENT_KEY); returns how many were added."""
+        new = normalize_events(events)
+        existing = self.load(symbol)
+        stored = len(existing) if existing is not None else 0
+        if stored:
+            # Not a timestamp watermark: an event published late with a date at
+            # or before the latest stored one must still be added
+            new = pd.concat([existing, new], ignore_index=True)
+        new = new.drop_duplicates(EVENT_KEY)
+        if len(new) == stored:
+            return 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_write(new.sort_values('publishedDate', kind='stable').reset_index(drop=True), self.path(symbol))
+        self._indexes.pop(symbol, None)
+        return len(new) - stored
+
+    def update(self, symbol: str, client) -> int:
+        """Fetches v4/price-target for `symbol` and appends the unseen events."""
+        added = self.append(symbol, client.get_price_target_history(symbol) or [])
+        logger.info(f"{symbol}: {added} new price-target events", extra={"symbol": symbol})
+        return added
+
+    def as_of_index(self, symbol: str) -> Optional[AsOfIndex]:
+        """In-memory as-of index for `symbol`, rebuilt only when its file changes."""
+        path = self.path(symbol)
+        if not path.exists():
+            return None
+        mtime = os.stat(path).st_mtime
+        cached = self._indexes.get(symbol)
+        if cached and cached[0] == mtime:
+            metrics.record_cache("price_target_index", hit=True)
+            return cached[1]
+        metrics.record_cache("price_target_index", hit=False)
+        index = AsOfIndex(self.load(symbol))
+        self._indexes[symbol] = (mtime, index)
+        return index
+
+_default_store: Optional[PriceTargetStore] = None
+
+def default_store() -> PriceTargetStore:
+    """Process-wide store under DATA_DIR, so its in-memory indexes stay warm across scans."""
+    global _default_store
+    if _default_store is None or _default_store.root != config.DATA_DIR / "history" / "targets":
+        _default_store = PriceTargetStore()
+    return _default_store
+
+def normalize_events(events: Union[List[dict], pd.DataFrame]) -> pd.DataFrame:
+    """FMP price-target records (or a stored frame) -> typed frame with EVENT_COLUMNS (tz-naive UTC dates)."""
+    df = pd.DataFrame(events)
+    if df.empty:
+        return pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if c == 'publishedDate' else object)
+                             for c in EVENT_COLUMNS})
+    for col in EVENT_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[EVENT_COLUMNS].copy()
+    df['publishedDate'] = (pd.to_datetime(df['publishedDate'], utc=True, format='mixed')
+                           .dt.tz_localize(None).astype('datetime64[ns]'))
+    df['priceTarget'] = pd.to_numeric(df['priceTarget'], errors='coerce')
+    return df[df['priceTarget'] > 0]
+
+def main():
+    parser = argparse.ArgumentParser(description='Local analyst price-target store')
+    parser.add_argument('--update', nargs='+', metavar='SYMBOL', help='Fetch new events for these symbols')
+    parser.add_argument('--show', metavar='SYMBOL', help='Print the as-of targets for a symbol')
+    parser.add_argument('--as-of', default=None, help='Date for --show (default: today)')
+    args = parser.parse_args()
+
+    store = PriceTargetStore()
+    if args.update:
+        from stock_scanner.utils.api_client import FMPClient
+        client = FMPClient()
+        for symbol in args.update:
+            store.update(symbol.upper(), client)
+
+    if args.show:
+        symbol = args.show.upper()
+        index = store.as_of_index(symbol)
+        if index is None:
+            print(f"{symbol}: no stored price-target events.")
+            return
+        as_of = args.as_of or pd.Timestamp.now().strftime('%Y-%m-%d')
+        latest, consensus, analysts = index.lookup(as_of)
+        print(f"{symbol}: {len(index)} events, watermark {store.watermark(symbol)}")
+        if latest is None:
+            print(f"{symbol}: no target published on or before {as_of}")
+        else:
+            print(f"{symbol} as of {as_of}: latest ${latest:.2f} | consensus ${consensus:.2f} ({analysts} analysts)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Historical scan results in one indexed SQLite database.
+
+    <DATA_DIR>/results.sqlite
+        runs(run_id, run_date, source, created_at)
+        results(run_id, run_date, symbol, company, price, volume_ratio, avg_volume,
+                upside_percent, is_negative, spike_days, payload)
+
+Every scan appends its results (keyed by run id, date and symbol); the
+legacy `scan_results_*.csv` / `old/high_potential_scan_*.csv` files can be
+imported once. "Days" in the queries below are scanned days, i.e. distinct
+run dates, so weekends and missed runs do not count against a symbol.
+
+Usage:
+    python -m stock_scanner.storage.results_db --import-legacy
+    python -m stock_scanner.storage.results_db --flagged 3 5
+    python -m stock_scanner.storage.results_db --first-seen AAPL MSFT
+"""
+import argparse
+import csv
+import json
+import re
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    run_date TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    run_date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    company TEXT,
+    price REAL,
+    volume_ratio REAL,
+    avg_volume REAL,
+    upside_percent REAL,
+    is_negative INTEGER,
+    spike_days INTEGER,
+    payload TEXT,
+    PRIMARY KEY (run_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS idx_results_symbol_date ON results(symbol, run_date);
+CREATE INDEX IF NOT EXISTS idx_results_date ON results(run_date);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(run_date);
+"""
+
+_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2})")
+
+def _number(value) -> Optional[float]:
+    """Parses CSV cells such as '1.61x', '53.8%' or '390698'."""
+    if value in (None, ""):
+        return None
+    try:
+        return float(str(value).strip().rstrip("x%").replace(",", ""))
+    except ValueError:
+        return None
+
+def _row(result: dict) -> dict:
+    """Flattens a dumped StockResult into the indexed columns."""
+    candidate = result.get("candidate") or {}
+    volume = result.get("volume_analysis") or {}
+    rating = result.get("analyst_rating") or {}
+    sentiment = result.get("news_sentiment") or {}
+    return {
+        "symbol": candidate["symbol"].upper(),
+        "company": candidate.get("company_name"),
+        "price": candidate.get("price"),
+        "volume_ratio": volume.get("ratio"),
+        "avg_volume": volume.get("avg_volume"),
+        "upside_percent": rating.get("upside_percent"),
+        "is_negative": None if not sentiment else int(bool(sentiment.get("is_negative"))),
+        "spike_days": volume.get("spike_days"),
+        "payload": json.dumps(result),
+    }
+
+def _legacy_row(record: dict) -> Optional[dict]:
+    """Maps a row of either legacy CSV layout onto the indexed columns."""
+    symbol = (record.get("Symbol") or "").strip().upper()
+    if not symbol:
+        return None
+    sentiment = record.get("Sentiment")
+    spike_days = _number(record.get("Spike Days"))
+    return {
+        "symbol": symbol,
+        "company": record.get("Company") or record.get("Name"),
+        "price": _number(record.get("Price")),
+        "volume_ratio": _number(record.get("Vol Ratio")),
+        "avg_volume": _number(record.get("Avg Vol") or record.get("Avg Volume")),
+        "upside_percent": _number(record.get("Upside %")),
+        "is_negative": None if sentiment is None else int(sentiment == "Negative"),
+        "spike_days": None if spike_days is None else int(spike_days),
+        "payload": None,
+    }
+
+class ResultsDB:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or config.DATA_DIR / "results.sqlite")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _insert(self, run_id: str, run_date: str, source: str, rows: Iterable[dict]) -> int:
+        rows = [{**row, "run_id": run_id, "run_date": run_date} for row in rows if row]
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                              (run_id, run_date, source, datetime.now(timezone.utc).isoformat(timespec="seconds")))
+            self.conn.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+            # Legacy files repeat some rows; the last one wins
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (:run_id, :run_date, :symbol, :company, :price, :volume_ratio, "
+                ":avg_volume, :upside_percent, :is_negative, :spike_days, :payload)", rows)
+        return len({row["symbol"] for row in rows})
+
+    def record_run(self, run_id: str, results: list, source: str = "scan") -> int:
+        """Stores one run's results (StockResult models or dicts); re-recording a run replaces it."""
+        dumped = [r if isinstance(r, dict) else r.model_dump(mode="json") for r in results]
+        return self._insert(run_id, run_id[:10], source, (_row(r) for r in dumped))
+
+    def import_csv(self, path: Path) -> int:
+        """Imports one legacy CSV; the run id and date come from its `YYYY-MM-DD_HH-MM` file name."""
+        match = _TIMESTAMP.search(path.name)
+        if not match:
+            logger.warning(f"Skipping {path}: no timestamp in file name")
+            return 0
+        with open(path, newline="") as f:
+            rows = [_legacy_row(record) for record in csv.DictReader(f)]
+        return self._insert(match.group(0), match.group(1), f"legacy:{path.name}", rows)
+
+    def import_legacy(self, root: Optional[Path] = None) -> int:
+        """Imports every legacy results CSV under `root` (default: the repo root and old/)."""
+        root = Path(root or config.BASE_DIR)
+        paths = sorted(root.glob("scan_results_*.csv")) + sorted((root / "old").glob("high_potential_scan_*.csv"))
+        total = sum(self.import_csv(path) for path in paths)
+        logger.info(f"Imported {total} results from {len(paths)} legacy files")
+        return total
+
+    def _recent_dates(self, n: int, as_of: Optional[str] = None) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT run_date FROM runs WHERE run_date <= ? ORDER BY run_date DESC LIMIT ?",
+            (as_of or "9999-12-31", n)).fetchall()
+        return [r[0] for r in rows]
+
+    def flagged(self, k: int, n: int, as_of: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Symbols flagged on at least `k` of the last `n` scanned days, most frequent first."""
+        dates = self._recent_dates(n, as_of)
+        if not dates:
+            return []
+        rows = self.conn.execute(
+            f"SELECT symbol, COUNT(DISTINCT run_date) AS days FROM results "
+            f"WHERE run_date IN ({','.join('?' * len(dates))}) "
+            f"GROUP BY symbol HAVING days >= ? ORDER BY days DESC, symbol", (*dates, k)).fetchall()
+        return [(symbol, days) for symbol, days in rows]
+
+    def first_seen(self, symbols: Iterable[str]) -> Dict[str, str]:
+        """First run date each symbol was flagged (symbols never flagged are absent)."""
+        symbols = [s.upper() for s in symbols]
+        if not symbols:
+            return {}
+        rows = self.conn.execute(
+            f"SELECT symbol, MIN(run_date) FROM results WHERE symbol IN ({','.join('?' * len(symbols))}) "
+            f"GROUP BY symbol", symbols).fetchall()
+        return dict(rows)
+
+    def classify(self, symbols: Iterable[str], as_of: str, lookback: Optional[int] = None) -> Dict[str, str]:
+        """
+        'repeat' for symbols flagged on a scanned day before `as_of` (within the
+        last `lookback` scanned days, if given), otherwise 'new'.
+        """
+        symbols = [s.upper() for s in symbols]
+        dates = self._recent_dates(lookback or 10**6, as_of)
+        earlier = [d for d in dates if d < as_of]
+        seen = set()
+        if symbols and earlier:
+            rows = self.conn.execute(
+                f"SELECT DISTINCT symbol FROM results WHERE symbol IN ({','.join('?' * len(symbols))}) "
+                f"AND run_date >= ? AND run_date < ?", (*symbols, min(earlier), as_of)).fetchall()
+            seen = {r[0] for r in rows}
+        return {s: "repeat" if s in seen else "new" for s in symbols}
+
+    def latest_payload(self, symbol: str, before: Optional[str] = None, since: Optional[str] = None,
+                       with_report: bool = False) -> Optional[Tuple[str, dict]]:
+        """
+        (run_date, stored StockResult dict) of the symbol's latest full result
+        from a run before `before` and on or after the date `since`; with
+        `with_report`, the latest one that carries a company report.
+        """
+        report = " AND COALESCE(json_extract(payload, '$.reports.company_report'), '') != ''" if with_report else ""
+        row = self.conn.execute(
+            "SELECT run_date, payload FROM results WHERE symbol = ? AND run_id < ? AND run_date >= ? "
+            f"AND payload IS NOT NULL{report} ORDER BY run_date DESC, run_id DESC LIMIT 1",
+            (symbol.upper(), before or "~", since or "")).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Historical scan results database')
+    parser.add_argument('--import-legacy', action='store_true', help='Import scan_results_*.csv and old/high_potential_scan_*.csv')
+    parser.add_argument('--flagged', nargs=2, type=int, metavar=('K', 'N'), help='Symbols flagged on K of the last N scanned days')
+    parser.add_argument('--first-seen', nargs='+', metavar='SYMBOL', help='First date each symbol was flagged')
+    parser.add_argument('--classify', nargs='+', metavar='SYMBOL', help='New vs. repeat as of today')
+    args = parser.parse_args()
+
+    db = ResultsDB()
+    if args.import_legacy:
+        print(f"Imported {db.import_legacy()} results into {db.path}")
+    if args.flagged:
+        for symbol, days in db.flagged(*args.flagged):
+            print(f"{symbol}: {days} of the last {args.flagged[1]} scanned days")
+    if args.first_seen:
+        seen = db.first_seen(args.first_seen)
+        for symbol in args.first_seen:
+            print(f"{symbol.upper()}: {seen.get(symbol.upper(), 'never flagged')}")
+    if args.classify:
+        today = datetime.now().strftime('%Y-%m-%d')
+        for symbol, kind in db.classify(args.classify, today).items():
+            print(f"{symbol}: {kind}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Persistent per-symbol ring buffers of recent daily volumes.
+
+Each symbol owns one row of a memory-mapped (symbols x slots) array holding
+its last `window + 1` daily volumes, plus running sum / sum of squares, so a
+new bar updates the state in O(1) and the "today vs. previous `window`
+sessions" ratio and z-score need no history download:
+
+    <DATA_DIR>/state/volume_ring.npy    float64 (capacity, window + 1)
+    <DATA_DIR>/state/volume_meta.npy    float64 (capacity, 5): head, count, last_day, sum, sumsq
+    <DATA_DIR>/state/volume_symbols.json  symbol -> row, window
+
+One extra slot keeps the baseline stable when a day is scanned twice: the
+latest bar is excluded from the baseline when it is the day being scored.
+Running sums are recomputed exactly each time a ring wraps, so float drift
+stays bounded while updates stay amortized O(1). Rings only receive bars for
+days a symbol is scanned, so one that missed a session is not trusted (and
+is re-seeded from history) rather than averaged over non-consecutive days.
+"""
+import json
+import math
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HEAD, COUNT, LAST_DAY, SUM, SUMSQ = range(5)
+
+_EPOCH = date(1970, 1, 1)
+
+def session_date(now: Optional[datetime] = None) -> date:
+    """Trading date a scan at `now` refers to (weekends roll back to Friday; holidays are not modelled)."""
+    day = (now or datetime.now()).date()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+def _day_number(day) -> int:
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    elif isinstance(day, datetime):
+        day = day.date()
+    return (day - _EPOCH).days
+
+def _sessions_between(first: float, last: float) -> int:
+    """Weekday sessions strictly between two day numbers (holidays count as sessions)."""
+    return int(np.busday_count(np.datetime64(int(first) + 1, 'D'), np.datetime64(int(last), 'D')))
+
+class RollingVolumeState:
+    """Memory-mapped ring buffers of the last `window + 1` volumes for every tracked symbol."""
+
+    def __init__(self, root: Optional[Path] = None, window: int = config.BACKTEST_VOLUME_MA_DAYS,
+                 capacity: int = 1024):
+        self.root = Path(root or config.DATA_DIR / "state")
+        self.window = window
+        self.slots = window + 1
+        self._index_path = self.root / "volume_symbols.json"
+        self._ring_path = self.root / "volume_ring.npy"
+        self._meta_path = self.root / "volume_meta.npy"
+
+        self.rows: Dict[str, int] = {}
+        if self._index_path.exists():
+            stored = json.loads(self._index_path.read_text())
+            if stored.get("window") == window:
+                self.rows = stored["rows"]
+            else:
+                logger.warning(f"Volume state window changed ({stored.get('window')} -> {window}); starting fresh")
+
+        if self.rows and self._ring_path.exists() and self._meta_path.exists():
+            self.ring = np.load(self._ring_path, mmap_mode="r+")
+            self.meta = np.load(self._meta_path, mmap_mode="r+")
+        else:
+            self.rows = {}
+            self._allocate(capacity)
+
+    def _allocate(self, capacity: int, ring: Optional[np.ndarray] = None, meta: Optional[np.ndarray] = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        new_ring = np.lib.format.open_memmap(self._ring_path.with_suffix(".tmp.npy"), mode="w+",
+                                             dtype=np.float64, shape=(capacity, self.slots))
+        new_meta = np.lib.format.open_memmap(self._meta_path.with_suffix(".tmp.npy"), mode="w+",
+                                             dtype=np.float64, shape=(capacity, 5))
+        if ring is not None:
+            new_ring[:len(ring)] = ring
+            new_meta[:len(meta)] = meta
+        new_ring.flush()
+        new_meta.flush()
+        del new_ring, new_meta
+        self._ring_path.with_suffix(".tmp.npy").replace(self._ring_path)
+        self._meta_path.with_suffix(".tmp.npy").replace(self._meta_path)
+        self.ring = np.load(self._ring_path, mmap_mode="r+")
+        self.meta = np.load(self._meta_path, mmap_mode="r+")
+
+    def _row(self, symbol: str, create: bool = False) -> Optional[int]:
+        row = self.rows.get(symbol)
+        if row is None and create:
+            row = len(self.rows)
+            if row >= len(self.ring):
+                self._allocate(len(self.ring) * 2, np.array(self.ring), np.array(self.meta))
+            self.rows[symbol] = row
+            self.meta[row] = 0
+        return row
+
+    def push(self, symbol: str, day, volume: float):
+        """
+        Adds one daily bar in O(1). A bar for the latest stored day replaces it
+        (re-scans of the same day); bars older than that are ignored.
+        """
+        if not volume or volume <= 0:
+            return
+        row = self._row(symbol, create=True)
+        meta, ring = self.meta[row], self.ring[row]
+        day_num = _day_number(day)
+        count, head = int(meta[COUNT]), int(meta[HEAD])
+
+        if count and day_num < meta[LAST_DAY]:
+            return
+        if count and day_num == meta[LAST_DAY]:
+            latest = (head - 1) % self.slots
+            old = ring[latest]
+            ring[latest] = volume
+            meta[SUM] += volume - old
+            meta[SUMSQ] += volume * volume - old * old
+            return
+
+        if count == self.slots:
+            old = ring[head]
+            meta[SUM] -= old
+            meta[SUMSQ] -= old * old
+        else:
+            meta[COUNT] = count + 1
+        ring[head] = volume
+        meta[SUM] += volume
+        meta[SUMSQ] += volume * volume
+        meta[HEAD] = (head + 1) % self.slots
+        meta[LAST_DAY] = day_num
+        if meta[HEAD] == 0:
+            # Exact recompute once per wrap keeps running-sum drift bounded
+            values = ring[:int(meta[COUNT])]
+            meta[SUM] = values.sum()
+            meta[SUMSQ] = (values * values).sum()
+
+    def seed(self, symbol: str, history: List[dict]):
+        """Replaces a symbol's ring with the newest sessions of an FMP `historical` list (newest first)."""
+        row = self._row(symbol, create=True)
+        self.meta[row] = 0
+        self.ring[row] = 0
+        for bar in reversed(history[:self.slots]):
+            if bar.get('date'):
+                self.push(symbol, bar['date'], bar.get('volume', 0))
+
+    def baseline(self, symbol: str, day=None) -> Optional[Tuple[float, float]]:
+        """
+        (mean, sample std) of the `window` sessions before `day` (default: the
+        current session), or None when the symbol is unknown, has fewer than
+        `window` sessions, or a session between its latest bar and `day` is
+        missing (a missed run, or a day the screener did not list it): the ring
+        would then no longer hold consecutive sessions, so it is re-seeded
+        from history.
+        """
+        row = self.rows.get(symbol)
+        if row is None:
+            return None
+        meta, ring = self.meta[row], self.ring[row]
+        day_num = _day_number(day or session_date())
+        count, head = int(meta[COUNT]), int(meta[HEAD])
+
+        if meta[LAST_DAY] == day_num:
+            excluded = ring[(head - 1) % self.slots] # The day being scored
+            n = count - 1
+        elif day_num > meta[LAST_DAY] and _sessions_between(meta[LAST_DAY], day_num) == 0:
+            excluded = ring[head] if count == self.slots else 0.0 # Oldest, beyond the window
+            n = min(count, self.window)
+        else:
+            return None
+        if n < self.window:
+            return None
+
+        total = meta[SUM] - excluded
+        mean = total / n
+        var = (meta[SUMSQ] - excluded * excluded - total * mean) / (n - 1)
+        return mean, math.sqrt(max(var, 0.0))
+
+    def flush(self):
+        """Persists the arrays and the symbol index."""
+        self.ring.flush()
+        self.meta.flush()
+        tmp = self._index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"window": self.window, "rows": self.rows}))
+        tmp.replace(self._index_path)
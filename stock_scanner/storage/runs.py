@@ -0,0 +1,82 @@
+"""
+Per-run result snapshots.
+
+    <DATA_DIR>/runs/<run_id>/results.json    run_id, created_at, summary, results
+    <DATA_DIR>/runs/manifest.log             saved run ids, one per line, in save order
+
+Each scan (daily or intraday) writes its final `StockResult`s here as JSON,
+so local tools can read results without the CSV/markdown artifacts. Files
+are written once, atomically, and never modified. The run id is appended to
+the manifest only after results.json is in place, so readers can watch the
+manifest alone (one stat) for new runs.
+"""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INTRADAY_SUFFIX = "_intraday"
+
+def is_intraday(run_id: str) -> bool:
+    return run_id.endswith(INTRADAY_SUFFIX)
+
+class RunStore:
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or config.DATA_DIR / "runs")
+        self.manifest = self.root / "manifest.log"
+
+    def run_dir(self, run_id: str) -> Path:
+        return self.root / run_id
+
+    def save(self, run_id: str, results: list, summary: Optional[Dict] = None) -> Path:
+        """Writes `results` (StockResult models or dicts) for `run_id`; returns the file path."""
+        payload = {
+            "run_id": run_id,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "summary": summary or {},
+            "results": [r if isinstance(r, dict) else r.model_dump(mode="json") for r in results],
+        }
+        path = self.run_dir(run_id) / "results.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(payload))
+        tmp.replace(path)
+        # One small O_APPEND write, so concurrent daily/intraday saves don't clobber each other
+        with open(self.manifest, "a") as f:
+            f.write(f"{run_id}\n")
+        logger.info(f"Saved {len(payload['results'])} results for run {run_id} to {path}")
+        return path
+
+    def run_ids(self) -> List[str]:
+        """Stored run ids, oldest first (run ids are timestamps, so they sort chronologically)."""
+        if not self.root.exists():
+            return []
+        return sorted(p.parent.name for p in self.root.glob("*/results.json"))
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        path = self.run_dir(run_id) / "results.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def manifest_size(self) -> int:
+        try:
+            return self.manifest.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def saved_since(self, offset: int) -> Tuple[List[str], int]:
+        """Run ids appended to the manifest after byte `offset`, and the offset to resume from."""
+        try:
+            with open(self.manifest, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        end = data.rfind(b"\n") + 1 # A partially written line is picked up next time
+        return data[:end].decode().split(), offset + end
@@ -0,0 +1,85 @@
+"""
+Per-run stage snapshots for offline what-if replays.
+
+    <DATA_DIR>/runs/<run_id>/universe.parquet   screener candidates
+    <DATA_DIR>/runs/<run_id>/volume.parquet     volume metrics for every candidate scored, spike or not
+    <DATA_DIR>/runs/<run_id>/targets.parquet    price target and upside for every spike checked
+    <DATA_DIR>/runs/<run_id>/snapshot.json      thresholds and filter order the run used
+
+Nodes record rows into the shared `snapshots` recorder while the graph runs;
+the run saves them next to its results (see storage/runs.py).
+"""
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STAGES = ("universe", "volume", "targets")
+
+class StageSnapshots:
+    """Thread-safe per-stage row recorder (pandas is only imported to save/load)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rows: Dict[str, List[dict]] = defaultdict(list)
+
+    def record(self, stage: str, row: dict):
+        with self._lock:
+            self.rows[stage].append(row)
+
+    def extend(self, stage: str, rows: List[dict]):
+        with self._lock:
+            self.rows[stage].extend(rows)
+
+    def save(self, run_dir: Path, order: Optional[List[str]] = None) -> Path:
+        """
+        Writes every stage as Parquet plus the thresholds and filter `order`
+        this run was filtered with (a later filter only sees the earlier one's survivors).
+        """
+        from stock_scanner.planner import FILTERS
+
+        import pandas as pd
+
+        run_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            rows = {stage: list(self.rows.get(stage, [])) for stage in STAGES}
+        for stage, stage_rows in rows.items():
+            df = pd.DataFrame(stage_rows)
+            tmp = run_dir / f"{stage}.parquet.tmp"
+            df.to_parquet(tmp, index=False)
+            tmp.replace(run_dir / f"{stage}.parquet")
+        (run_dir / "snapshot.json").write_text(json.dumps({
+            "spike_threshold": config.DEFAULT_VOLUME_SPIKE_THRESHOLD,
+            "upside_threshold": config.DEFAULT_UPSIDE_THRESHOLD,
+            "filter_order": list(order or FILTERS),
+            "rows": {stage: len(stage_rows) for stage, stage_rows in rows.items()},
+        }))
+        logger.info(f"Saved stage snapshots to {run_dir} "
+                    f"({', '.join(f'{s}: {len(r)}' for s, r in rows.items())})")
+        return run_dir
+
+def load_snapshot(run_dir: Path) -> Optional[dict]:
+    """{'meta': ..., '<stage>': DataFrame} for a run, or None if it has no snapshots."""
+    import pandas as pd
+
+    meta_path = run_dir / "snapshot.json"
+    if not meta_path.exists():
+        return None
+    snapshot = {"meta": json.loads(meta_path.read_text())}
+    for stage in STAGES:
+        path = run_dir / f"{stage}.parquet"
+        snapshot[stage] = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+    return snapshot
+
+# Global recorder, reset at the start of every run
+snapshots = StageSnapshots()
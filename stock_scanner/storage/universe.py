@@ -0,0 +1,172 @@
+"""
+Date-aligned, memory-mapped price matrix for the whole history store.
+
+    <root>/universe.json               sidecar: symbols, dates, fields, version
+    <root>/prices_<version>.npy        float64 (symbols, dates, [open, high, low, close])
+    <root>/volume_<version>.npy        int64   (symbols, dates)
+
+Missing sessions are NaN prices / 0 volume. Prices keep the Parquet files'
+float64, so results match the Parquet path exactly. Worker processes attach
+the arrays read-only with `np.load(mmap_mode='r')`, so every worker shares the
+page cache's single copy instead of receiving pickled DataFrames: `frame()`
+columns are views into the mapping, and vectorized consumers (e.g.
+`stock_scanner.indicators` over all symbols at once) can work on `field()` /
+`volume` directly. A rebuild writes new versioned files and swaps the sidecar
+last, so attached readers keep a consistent snapshot.
+
+Usage:
+    python -m stock_scanner.storage.universe --build
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from stock_scanner.storage.history import HistoryStore
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRICE_FIELDS = ['open', 'high', 'low', 'close']
+
+# Per-process attachments: sidecar path -> (sidecar mtime, UniverseMatrix)
+_attached: Dict[str, tuple] = {}
+
+class UniverseMatrix:
+    """Read-only view over a built universe matrix."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        meta = json.loads((self.root / "universe.json").read_text())
+        self.version = meta["version"]
+        self.built_at = meta["built_at"]
+        self.symbols: List[str] = meta["symbols"]
+        self.dates = np.array(meta["dates"], dtype='datetime64[D]')
+        self._dates_ns = self.dates.astype('datetime64[ns]') # Shared by every frame()
+        self.fields: List[str] = meta["fields"]
+        self.index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        self.prices = np.load(self.root / f"prices_{self.version}.npy", mmap_mode="r")
+        self.volume = np.load(self.root / f"volume_{self.version}.npy", mmap_mode="r")
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def field(self, name: str) -> np.ndarray:
+        """(symbols x dates) view of one price field, no copy."""
+        return self.prices[:, :, self.fields.index(name)]
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """
+        One symbol's sessions as a price frame (same columns as the history
+        store). The columns are views into the mapping when the symbol has no
+        missing session between its first and last bar; gaps need a copy.
+        """
+        i = self.index[symbol]
+        present = ~np.isnan(self.prices[i, :, self.fields.index('close')])
+        first, last = int(np.argmax(present)), len(present) - int(np.argmax(present[::-1]))
+        rows = slice(first, last) if present.any() and present[first:last].all() else present
+        columns = {'date': self._dates_ns[rows]}
+        columns.update({name: self.prices[i, rows, j] for j, name in enumerate(self.fields)})
+        columns['volume'] = self.volume[i, rows]
+        return pd.DataFrame(columns, copy=False)
+
+def attach(root: Path) -> Optional[UniverseMatrix]:
+    """Attaches the matrix under `root` (cached per process and version), or None if not built."""
+    sidecar = Path(root) / "universe.json"
+    if not sidecar.exists():
+        return None
+    key = str(sidecar)
+    mtime = sidecar.stat().st_mtime
+    cached = _attached.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, UniverseMatrix(Path(root)))
+        _attached[key] = cached
+    return cached[1]
+
+def load_prices(store: HistoryStore, symbol: str) -> Optional[pd.DataFrame]:
+    """
+    Prices for `symbol` from the universe matrix when it is built and not
+    older than the symbol's Parquet file; otherwise from the store itself.
+    """
+    matrix = attach(store.root / "universe")
+    if matrix is not None and symbol in matrix:
+        path = store.prices_path(symbol)
+        if not path.exists() or path.stat().st_mtime <= matrix.built_at:
+            return matrix.frame(symbol)
+    return store.load_prices(symbol)
+
+def build(store: HistoryStore, symbols: Optional[List[str]] = None) -> Path:
+    """Builds (or rebuilds) the universe matrix from the store's price files."""
+    symbols = sorted(symbols or store.symbols())
+    root = store.root / "universe"
+    root.mkdir(parents=True, exist_ok=True)
+    built_at = time.time()
+
+    frames = {s: store.load_prices(s) for s in symbols}
+    frames = {s: f for s, f in frames.items() if f is not None and not f.empty}
+    symbols = list(frames)
+    all_dates = [f['date'].to_numpy().astype('datetime64[D]') for f in frames.values()]
+    dates = np.unique(np.concatenate(all_dates)) if all_dates else np.array([], dtype='datetime64[D]')
+
+    version = f"{int(built_at * 1000)}"
+    prices = np.lib.format.open_memmap(root / f"prices_{version}.npy", mode="w+", dtype=np.float64,
+                                       shape=(len(symbols), len(dates), len(PRICE_FIELDS)))
+    volume = np.lib.format.open_memmap(root / f"volume_{version}.npy", mode="w+", dtype=np.int64,
+                                       shape=(len(symbols), len(dates)))
+    prices[:] = np.nan
+    volume[:] = 0
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        cols = np.searchsorted(dates, df['date'].to_numpy().astype('datetime64[D]'))
+        prices[i, cols] = df[PRICE_FIELDS].to_numpy(dtype=np.float64)
+        volume[i, cols] = df['volume'].to_numpy(dtype=np.int64)
+    prices.flush()
+    volume.flush()
+    del prices, volume
+
+    meta = {
+        "version": version,
+        "built_at": built_at,
+        "symbols": symbols,
+        "dates": [str(d) for d in dates],
+        "fields": PRICE_FIELDS,
+    }
+    tmp = root / "universe.json.tmp"
+    tmp.write_text(json.dumps(meta))
+    previous = json.loads((root / "universe.json").read_text())["version"] if (root / "universe.json").exists() else None
+    tmp.replace(root / "universe.json")
+
+    # Readers attached to the previous version keep their open mappings
+    if previous and previous != version:
+        for name in (f"prices_{previous}.npy", f"volume_{previous}.npy"):
+            try:
+                os.remove(root / name)
+            except FileNotFoundError:
+                pass
+    logger.info(f"Built universe matrix: {len(symbols)} symbols x {len(dates)} dates in {root}")
+    return root
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory-mapped universe price matrix')
+    parser.add_argument('--build', action='store_true', help='(Re)build the matrix from the history store')
+    args = parser.parse_args()
+
+    store = HistoryStore()
+    if args.build:
+        build(store)
+    matrix = attach(store.root / "universe")
+    if matrix is None:
+        print("No universe matrix built yet (use --build).")
+        return
+    size_mb = (matrix.prices.nbytes + matrix.volume.nbytes) / 1e6
+    print(f"{len(matrix.symbols)} symbols x {len(matrix.dates)} dates "
+          f"({matrix.dates[0] if len(matrix.dates) else '-'} .. {matrix.dates[-1] if len(matrix.dates) else '-'}), "
+          f"{size_mb:.1f} MB")
+
+if __name__ == "__main__":
+    main()
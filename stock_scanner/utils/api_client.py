@@ -1,4 +1,5 @@
 import requests
+import threading
 import time
 from typing import Optional, Dict, List, Any
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
@@ -7,14 +8,43 @@ import logging
 from stock_scanner.config import config
 from stock_scanner.exceptions import APIError, RateLimitError
 from stock_scanner.utils.logger import get_logger
-from langsmith import traceable
+from stock_scanner.utils.tracing import traceable, API_BULK
+from stock_scanner.utils.metrics import metrics, endpoint_name
+from stock_scanner.utils.quota import quota
 
 logger = get_logger(__name__)
 
+_log_before_sleep = before_sleep_log(logger, logging.WARNING)
+
+def _before_sleep(retry_state):
+    """Logs the retry and counts it (and any 429) against the endpoint."""
+    _log_before_sleep(retry_state)
+    url = retry_state.args[1] if len(retry_state.args) > 1 else retry_state.kwargs.get('url', '')
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    metrics.record_retry(endpoint_name(url), rate_limited=isinstance(exc, RateLimitError))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def shared_session() -> requests.Session:
+    """
+    One pooled Session for every FMPClient in the process, so nodes (each of
+    which builds its own client) and repeat scans in the daemon reuse
+    keep-alive connections instead of re-handshaking.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
 class FMPClient:
     def __init__(self):
         self.api_key = config.FMP_API_KEY
-        self.session = requests.Session()
+        self.session = shared_session()
         
     def _handle_response(self, response: requests.Response) -> Any:
         try:
@@ -34,17 +64,25 @@ class FMPClient:
         retry=retry_if_exception_type((RateLimitError, APIError)),
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=1, max=10),
-        before_sleep=before_sleep_log(logger, logging.WARNING)
+        before_sleep=_before_sleep
     )
     def get_json(self, url: str, params: Optional[Dict] = None) -> Any:
         if params is None:
             params = {}
         params['apikey'] = self.api_key
         
-        response = self.session.get(url, params=params, timeout=15)
+        endpoint = endpoint_name(url)
+        start = time.perf_counter()
+        quota.record() # Every attempt counts against the plan's daily limit
+        try:
+            response = self.session.get(url, params=params, timeout=15)
+        except requests.exceptions.RequestException:
+            metrics.record_request(endpoint, time.perf_counter() - start, "error")
+            raise
+        metrics.record_request(endpoint, time.perf_counter() - start, response.status_code)
         return self._handle_response(response)
 
-    @traceable(name="fmp_api_screener")
+    @traceable(name="fmp_api_screener", category=API_BULK)
     def get_stock_screener(self, min_market_cap: int, max_market_cap: int, min_volume: int) -> List[Dict]:
         url = f"{config.FMP_BASE_URL_V3}/stock-screener"
         params = {
@@ -65,6 +103,18 @@ class FMPClient:
         params = {'timeseries': days}
         return self.get_json(url, params)
 
+    @traceable(name="fmp_api_historical_prices", category=API_BULK)
+    def get_historical_prices(self, symbols: List[str], days: int = 40, batch_size: int = 5) -> Dict[str, List[Dict]]:
+        """Daily `historical` lists (newest first) keyed by symbol, several symbols per request."""
+        histories = {}
+        for i in range(0, len(symbols), batch_size):
+            batch = ",".join(symbols[i:i + batch_size])
+            data = self.get_json(f"{config.FMP_BASE_URL_V3}/historical-price-full/{batch}", {'timeseries': days}) or {}
+            # A batch of one comes back unwrapped
+            for item in data.get('historicalStockList', [data] if 'historical' in data else []):
+                histories[item['symbol']] = item.get('historical', [])
+        return histories
+
     @traceable(name="fmp_api_price_target")
     def get_price_target(self, symbol: str) -> List[Dict]:
         url = f"{config.FMP_BASE_URL_V4}/price-target-summary"
@@ -76,3 +126,36 @@ class FMPClient:
         url = f"{config.FMP_BASE_URL_V3}/stock_news"
         params = {'tickers': symbol, 'limit': limit}
         return self.get_json(url, params)
+
+    @traceable(name="fmp_api_price_target_history")
+    def get_price_target_history(self, symbol: str) -> List[Dict]:
+        """Individual analyst price-target events (publishedDate, priceTarget, analyst...)."""
+        url = f"{config.FMP_BASE_URL_V4}/price-target"
+        params = {'symbol': symbol}
+        return self.get_json(url, params)
+
+    @traceable(name="fmp_api_profiles", category=API_BULK)
+    def get_profiles(self, symbols: List[str], batch_size: int = 50) -> Dict[str, Dict]:
+        """Company profiles (sector, industry...) keyed by symbol, fetched in batches."""
+        profiles = {}
+        for i in range(0, len(symbols), batch_size):
+            batch = ",".join(symbols[i:i + batch_size])
+            for item in self.get_json(f"{config.FMP_BASE_URL_V3}/profile/{batch}") or []:
+                profiles[item['symbol']] = item
+        return profiles
+
+    @traceable(name="fmp_api_quotes", category=API_BULK)
+    def get_quotes(self, symbols: List[str], batch_size: int = 200) -> Dict[str, Dict]:
+        """Real-time quotes (price, cumulative day volume, timestamp) keyed by symbol, fetched in batches."""
+        quotes = {}
+        for i in range(0, len(symbols), batch_size):
+            batch = ",".join(symbols[i:i + batch_size])
+            for item in self.get_json(f"{config.FMP_BASE_URL_V3}/quote/{batch}") or []:
+                quotes[item['symbol']] = item
+        return quotes
+
+    @traceable(name="fmp_api_intraday_chart")
+    def get_intraday_chart(self, symbol: str, interval: str = "5min") -> List[Dict]:
+        """Intraday bars (date, open, high, low, close, volume), newest first."""
+        url = f"{config.FMP_BASE_URL_V3}/historical-chart/{interval}/{symbol}"
+        return self.get_json(url)
@@ -0,0 +1,98 @@
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Degradation steps, applied as the deadline approaches (each level includes the ones before).
+# The last one is only set by the cheap filters, when the deadline passes before they finish.
+FULL, NO_CEO_REPORTS, NO_REPORTS, RULES_SENTIMENT, FILTERS_TRUNCATED = range(5)
+LEVEL_NAMES = {
+    FULL: "full",
+    NO_CEO_REPORTS: "CEO reports skipped",
+    NO_REPORTS: "company and CEO reports skipped",
+    RULES_SENTIMENT: "reports skipped, rules-only news sentiment",
+    FILTERS_TRUNCATED: "filters stopped early (remaining candidates unscored), reports skipped, rules-only news sentiment",
+}
+
+_DURATION = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+
+def parse_deadline(value: str, now: Optional[datetime] = None) -> float:
+    """
+    Deadline as a Unix timestamp from a duration ("45m", "1h30m", "90s", or
+    plain minutes "40"), a local wall-clock time ("22:30", tomorrow if that
+    time has already passed today), or an ISO datetime ("2026-01-18T22:30").
+    """
+    now = now or datetime.now()
+    value = value.strip()
+    if value.isdigit():
+        return (now + timedelta(minutes=int(value))).timestamp()
+    match = _DURATION.match(value)
+    if match and any(match.groups()):
+        hours, minutes, seconds = (int(g or 0) for g in match.groups())
+        return (now + timedelta(hours=hours, minutes=minutes, seconds=seconds)).timestamp()
+    if re.match(r"^\d{1,2}:\d{2}$", value):
+        hour, minute = (int(part) for part in value.split(":"))
+        at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if at <= now:
+            at += timedelta(days=1) # e.g. --deadline 00:30 given at 23:50
+        return at.timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Unrecognised deadline {value!r} (use e.g. 45m, 1h30m, 22:30 or 2026-01-18T22:30)")
+
+def remaining_seconds(deadline: Optional[float], now: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the deadline, after reserving time for the CSV and email (None = no deadline)."""
+    if deadline is None:
+        return None
+    now = datetime.now().timestamp() if now is None else now
+    return deadline - now - config.DEADLINE_RESERVE_SECONDS
+
+def degradation_level(deadline: Optional[float], now: Optional[float] = None) -> int:
+    """
+    0 (full scan) .. 3 (rules-only sentiment) from the time left and
+    DEADLINE_LEVEL_SECONDS; FILTERS_TRUNCATED is reported by the filters themselves.
+    """
+    remaining = remaining_seconds(deadline, now)
+    if remaining is None:
+        return FULL
+    level = FULL
+    for threshold in config.DEADLINE_LEVEL_SECONDS:
+        if remaining < threshold:
+            level += 1
+    # DEADLINE_LEVEL_SECONDS may list more thresholds than there are levels
+    return min(level, RULES_SENTIMENT)
+
+def expired(deadline: Optional[float], now: Optional[float] = None) -> bool:
+    """True once only the reserved time for writing and sending results is left."""
+    remaining = remaining_seconds(deadline, now)
+    return remaining is not None and remaining <= 0
+
+# Rules-only sentiment: the prompt's red-flag categories as headline/summary keywords
+NEGATIVE_PATTERNS = [
+    r"lawsuit", r"class action", r"fraud", r"investigation", r"subpoena", r"\bsec charges",
+    r"misses", r"missed estimates", r"guidance cut", r"cuts guidance",
+    r"resign", r"steps down", r"scandal",
+    r"bankruptcy", r"chapter 11", r"going concern", r"delist",
+    r"recall", r"trial (?:fail|halt)", r"clinical hold", r"complete response letter", r"fda rejects",
+    r"dilut", r"public offering",
+]
+_NEGATIVE = re.compile("|".join(NEGATIVE_PATTERNS), re.IGNORECASE)
+
+def rules_sentiment(news: List[dict]) -> dict:
+    """Keyword screen over FMP news items, in the SentimentAnalysis shape (no LLM call)."""
+    hits = []
+    for item in news:
+        text = f"{item.get('title') or ''} {item.get('text') or ''}"
+        match = _NEGATIVE.search(text)
+        if match:
+            hits.append(f"'{match.group(0)}' in \"{item.get('title')}\"")
+    if hits:
+        return {"is_negative": True, "reasoning": f"Rules-only check (deadline): {'; '.join(hits[:3])}",
+                "summary": "Red-flag keywords in recent news."}
+    return {"is_negative": False, "reasoning": "Rules-only check (deadline): no red-flag keywords found.",
+            "summary": "No red-flag keywords in recent news." if news else "No news."}
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import List
 from stock_scanner.config import config
 from stock_scanner.models import StockResult
+from stock_scanner.utils.deadline import LEVEL_NAMES
 from stock_scanner.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,16 +16,12 @@ class EmailClient:
         self.sender_password = config.EMAIL_PASSWORD
         self.recipient_email = config.EMAIL_RECIPIENT
 
-    def send_report(self, results: List[StockResult], csv_filename: str):
-        """Sends an HTML report of the scan results."""
+    def send_report(self, results: List[StockResult], csv_filename: str, degradation_level: int = 0):
+        """Sends an HTML report of the scan results (a short "no candidates" note when empty)."""
         if not all([self.sender_email, self.sender_password, self.recipient_email]):
             logger.warning("Email credentials or recipient not set. Skipping email.")
             return
 
-        if not results:
-            logger.info("No results to email.")
-            return
-
         # Prepare HTML table and detailed reports
         table_rows = ""
         detailed_reports_html = ""
@@ -38,7 +35,7 @@ class EmailClient:
                 <td><b>{r.candidate.symbol}</b></td>
                 <td>${r.candidate.price}</td>
                 <td>{r.volume_analysis.ratio:.2f}x</td>
-                <td>{r.analyst_rating.upside_percent:.1f}%</td>
+                <td>{f"{r.analyst_rating.upside_percent:.1f}%" if r.analyst_rating.upside_percent is not None else "n/a"}</td>
                 <td style="color: {sentiment_color};">{sentiment_label}</td>
             </tr>
             """
@@ -51,6 +48,15 @@ class EmailClient:
                     <p><b>Analyst Reasoning:</b> {r.news_sentiment.summary}</p>
                 """
                 
+                if r.reports.changes:
+                    changes_clean = r.reports.changes.replace('\n', '<br>')
+                    report_section += f"""
+                    <div class="report-content">
+                        <h4>What Changed (reports from {r.reports.generated_on})</h4>
+                        <p>{changes_clean}</p>
+                    </div>
+                    """
+                    
                 if r.reports.company_report:
                     # Basic markdown conversion (line breaks to <br>)
                     company_clean = r.reports.company_report.replace('\n', '<br>')
@@ -74,6 +80,8 @@ class EmailClient:
                 detailed_reports_html += report_section
 
         subject = f"🚀 Stock Scan Results (v2) - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        if degradation_level:
+            subject += " (degraded)"
         
         body = f"""
         <html>
@@ -93,7 +101,8 @@ class EmailClient:
           </head>
           <body>
             <h2>High Potential Candidates (LangGraph)</h2>
-            <p>Found {len(results)} stocks matching criteria.</p>
+            <p>{f"Found {len(results)} stocks matching criteria." if results else "No stocks matched the criteria in this scan."}</p>
+            {f'<p><b>Degraded to meet the deadline (level {degradation_level}):</b> {LEVEL_NAMES[degradation_level]}</p>' if degradation_level else ""}
             
             <table>
                 <thead>
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from stock_scanner.config import config
+from stock_scanner.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Prompt type labels used in run configs and the run summary
+SENTIMENT = "sentiment"
+COMPANY_REPORT = "company_report"
+CEO_REPORT = "ceo_report"
+
+def _empty_bucket() -> Dict[str, float]:
+    return {"calls": 0, "errors": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0,
+            "seconds": 0.0, "cost_usd": 0.0}
+
+def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost from the configured per-million-token prices."""
+    return (input_tokens * config.LLM_INPUT_COST_PER_1M + output_tokens * config.LLM_OUTPUT_COST_PER_1M) / 1_000_000
+
+class LLMUsage:
+    """
+    Aggregates LLM tokens, latency, retries and estimated cost per prompt type
+    and per symbol, and enforces the per-run budget (LLM_RUN_BUDGET_USD).
+
+    Kept free of langchain imports; the callback handler that feeds it is
+    built lazily by `get_usage_callback()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.by_prompt: Dict[str, Dict[str, float]] = defaultdict(_empty_bucket)
+            self.by_symbol: Dict[str, Dict[str, float]] = defaultdict(_empty_bucket)
+            self.skipped_for_budget: List[str] = []
+            self._budget_warned = False
+
+    def record_call(self, prompt_type: str, symbol: Optional[str], seconds: float,
+                    input_tokens: int = 0, output_tokens: int = 0, error: bool = False):
+        cost = estimate_cost(input_tokens, output_tokens)
+        with self._lock:
+            for bucket in self._buckets(prompt_type, symbol):
+                bucket["calls"] += 1
+                bucket["errors"] += int(error)
+                bucket["input_tokens"] += input_tokens
+                bucket["output_tokens"] += output_tokens
+                bucket["seconds"] += seconds
+                bucket["cost_usd"] += cost
+
+    def record_retry(self, prompt_type: str, symbol: Optional[str]):
+        with self._lock:
+            for bucket in self._buckets(prompt_type, symbol):
+                bucket["retries"] += 1
+
+    def _buckets(self, prompt_type: str, symbol: Optional[str]):
+        yield self.by_prompt[prompt_type or "unknown"]
+        if symbol:
+            yield self.by_symbol[symbol]
+
+    @property
+    def total_cost(self) -> float:
+        with self._lock:
+            return sum(b["cost_usd"] for b in self.by_prompt.values())
+
+    def budget_exhausted(self) -> bool:
+        """True once the estimated spend reaches LLM_RUN_BUDGET_USD (0 = unlimited)."""
+        budget = config.LLM_RUN_BUDGET_USD
+        if not budget or self.total_cost < budget:
+            return False
+        if not self._budget_warned:
+            logger.warning(f"LLM budget of ${budget:.2f} reached (spent ${self.total_cost:.4f}). "
+                           f"Skipping remaining report generation.")
+            self._budget_warned = True
+        return True
+
+    def skip_for_budget(self, symbol: str):
+        with self._lock:
+            self.skipped_for_budget.append(symbol)
+
+    def snapshot(self) -> Dict[str, Any]:
+        def _round(bucket):
+            out = dict(bucket)
+            out["seconds"] = round(out["seconds"], 3)
+            out["cost_usd"] = round(out["cost_usd"], 6)
+            out["avg_latency_s"] = round(bucket["seconds"] / bucket["calls"], 3) if bucket["calls"] else 0.0
+            return out
+
+        with self._lock:
+            totals = _empty_bucket()
+            for bucket in self.by_prompt.values():
+                for key in totals:
+                    totals[key] += bucket[key]
+            return {
+                "budget_usd": config.LLM_RUN_BUDGET_USD or None,
+                "totals": _round(totals),
+                "by_prompt": {k: _round(v) for k, v in self.by_prompt.items()},
+                "by_symbol": {k: _round(v) for k, v in self.by_symbol.items()},
+                "skipped_for_budget": list(self.skipped_for_budget),
+            }
+
+usage = LLMUsage()
+
+def _token_usage(response) -> Dict[str, int]:
+    """Extracts prompt/completion token counts from an LLMResult."""
+    for generations in response.generations or []:
+        for gen in generations:
+            meta = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if meta:
+                return {"input": meta.get("input_tokens", 0), "output": meta.get("output_tokens", 0)}
+    token_usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata") or {}
+    return {
+        "input": token_usage.get("prompt_tokens") or token_usage.get("input_tokens") or 0,
+        "output": token_usage.get("completion_tokens") or token_usage.get("output_tokens") or 0,
+    }
+
+_callback = None
+
+def get_usage_callback():
+    """Returns the shared langchain callback handler that feeds `usage`."""
+    global _callback
+    if _callback is not None:
+        return _callback
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageCallbackHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._runs: Dict[Any, Dict[str, Any]] = {}
+            self._lock = threading.Lock()
+
+        def _start(self, run_id, metadata, tags):
+            metadata = metadata or {}
+            with self._lock:
+                self._runs[run_id] = {
+                    "prompt_type": metadata.get("prompt_type"),
+                    "symbol": metadata.get("symbol"),
+                    "start": time.perf_counter(),
+                }
+            # RunnableRetry tags each re-attempt's direct child with "retry:attempt:N"
+            if metadata.get("prompt_type") and any(t.startswith("retry:attempt:") for t in tags or []):
+                usage.record_retry(metadata.get("prompt_type"), metadata.get("symbol"))
+
+        def _finish(self, run_id):
+            with self._lock:
+                return self._runs.pop(run_id, None)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, metadata=None, **kwargs):
+            self._start(run_id, metadata, tags)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, tags=None, metadata=None, **kwargs):
+            self._start(run_id, metadata, tags)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            run = self._finish(run_id)
+            if run:
+                tokens = _token_usage(response)
+                usage.record_call(run["prompt_type"], run["symbol"], time.perf_counter() - run["start"],
+                                  tokens["input"], tokens["output"])
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            run = self._finish(run_id)
+            if run:
+                usage.record_call(run["prompt_type"], run["symbol"], time.perf_counter() - run["start"], error=True)
+
+        def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+            # Only needed to spot retry attempts of non-LLM children
+            if any(t.startswith("retry:attempt:") for t in tags or []):
+                metadata = metadata or {}
+                usage.record_retry(metadata.get("prompt_type"), metadata.get("symbol"))
+
+    _callback = UsageCallbackHandler()
+    return _callback
+
+def llm_run_config(prompt_type: str, symbol: Optional[str] = None) -> Dict[str, Any]:
+    """RunnableConfig that attaches usage accounting to a chain invocation."""
+    return {
+        "callbacks": [get_usage_callback()],
+        "metadata": {"prompt_type": prompt_type, "symbol": symbol},
+        "tags": [f"prompt:{prompt_type}"],
+    }
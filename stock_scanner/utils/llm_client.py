@@ -1,14 +1,26 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from stock_scanner.config import config
 
+_llm = None
+
 def get_llm():
-    """Returns the configured Gemini Flash LLM instance."""
+    """Returns the configured Gemini Flash LLM instance (built once per process)."""
+    global _llm
     if not config.GOOGLE_API_KEY:
         raise ValueError("GOOGLE_API_KEY not set")
+    if _llm is not None:
+        return _llm
+    
+    # Imported here so data-only commands don't pay for langchain at startup
+    from langchain_google_genai import ChatGoogleGenerativeAI
         
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
+    llm = ChatGoogleGenerativeAI(
+        model=config.LLM_MODEL,
         temperature=0.0, # Low temperature for factual tasks
         google_api_key=config.GOOGLE_API_KEY,
-        max_retries=3
+        max_retries=1 # Single attempt in the SDK; retries happen below so they're visible to callbacks
     )
+    
+    # Retrying at the runnable level tags each attempt (retry:attempt:N), which
+    # the usage accounting (utils/llm_accounting) counts per prompt and symbol.
+    _llm = llm.with_retry(stop_after_attempt=config.LLM_MAX_ATTEMPTS, wait_exponential_jitter=True)
+    return _llm
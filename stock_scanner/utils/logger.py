@@ -1,34 +1,130 @@
+import atexit
+import contextvars
+import json
 import logging
+import queue
 import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 from stock_scanner.config import config
+from stock_scanner.utils.tracing import current_node
+
+# Structured context attached to every record (run id, graph node, symbol)
+current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_run_id", default=None)
+current_symbol: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_symbol", default=None)
+
+_listener: Optional[QueueListener] = None
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps run_id / node / symbol onto the record. Runs on the QueueHandler,
+    i.e. in the calling thread, so the context variables are still visible.
+    An explicit `extra={"symbol": ...}` wins over the context.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "run_id", None) is None:
+            record.run_id = current_run_id.get()
+        if getattr(record, "node", None) is None:
+            record.node = current_node.get()
+        if getattr(record, "symbol", None) is None:
+            record.symbol = current_symbol.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for machine parsing of the log."""
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "run_id": getattr(record, "run_id", None),
+            "node": getattr(record, "node", None),
+            "symbol": getattr(record, "symbol", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+def _level(name: str) -> int:
+    return getattr(logging, name.strip().upper(), logging.INFO)
+
+def _apply_level_overrides():
+    """LOG_LEVELS="stock_scanner.utils.api_client=WARNING,stock_scanner.nodes.volume=DEBUG" """
+    for part in config.LOG_LEVELS.split(","):
+        if "=" in part:
+            module, level = part.split("=", 1)
+            logging.getLogger(module.strip()).setLevel(_level(level))
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop() # Drains the queue before returning
+        _listener = None
 
 def get_logger(name: str) -> logging.Logger:
     """
-    Returns a logger with the given name. 
+    Returns a logger with the given name.
     Configures the base 'stock_scanner' logger if it hasn't been configured yet.
+
+    Records are put on an in-memory queue by a QueueHandler and written to
+    stdout / the log file by a background QueueListener thread, so hot loops
+    never block on I/O.
     """
+    global _listener
     # We configure the 'stock_scanner' base logger so all sub-loggers inherit its handlers.
     base_logger = logging.getLogger("stock_scanner")
-    
+
     if not base_logger.handlers:
-        base_logger.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        
+        base_logger.setLevel(_level(config.LOG_LEVEL))
+
+        if config.LOG_FORMAT.lower() == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+
         # Console Handler
         ch = logging.StreamHandler(sys.stdout)
         ch.setFormatter(formatter)
-        base_logger.addHandler(ch)
-        
+        handlers = [ch]
+
         # File Handler
         try:
-            fh = logging.FileHandler(config.LOG_FILE)
+            fh = logging.FileHandler(config.LOG_FILE, delay=True) # Opened on the first record
             fh.setFormatter(formatter)
-            base_logger.addHandler(fh)
+            handlers.append(fh)
         except Exception as e:
             # Fallback to console if file handler fails, but still log the error
             print(f"CRITICAL: Failed to initialize FileHandler at {config.LOG_FILE}: {e}")
-            
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        qh = QueueHandler(log_queue)
+        qh.addFilter(ContextFilter())
+        base_logger.addHandler(qh)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+
+        _apply_level_overrides()
+
     return logging.getLogger(name)
+
+@contextmanager
+def log_context(run_id: Optional[str] = None, symbol: Optional[str] = None):
+    """Temporarily sets the run id and/or symbol stamped onto log records."""
+    tokens = []
+    if run_id is not None:
+        tokens.append((current_run_id, current_run_id.set(run_id)))
+    if symbol is not None:
+        tokens.append((current_symbol, current_symbol.set(symbol)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
@@ -0,0 +1,194 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.tracing import current_node, flush_node_summary
+
+logger = get_logger(__name__)
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def endpoint_name(url: str) -> str:
+    """Maps an FMP URL to a stable endpoint label, e.g. 'v3/historical-price-full'."""
+    parts = [p for p in urlparse(url).path.split('/') if p]
+    # /api/v3/<endpoint>/<symbol?>
+    if len(parts) >= 3 and parts[0] == 'api':
+        return f"{parts[1]}/{parts[2]}"
+    return '/'.join(parts[:2]) or url
+
+class Metrics:
+    """
+    Process-wide, thread-safe collector for run performance data:
+    per-node wall time and throughput, per-endpoint latency and status codes,
+    retry / rate-limit counts and cache hit ratios.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.nodes: Dict[str, Dict[str, float]] = defaultdict(
+                lambda: {"calls": 0, "seconds": 0.0, "items_in": 0, "items_out": 0, "requests": 0}
+            )
+            self.latencies: Dict[str, List[float]] = defaultdict(list)
+            self.status_codes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            self.retries: Dict[str, int] = defaultdict(int)
+            self.rate_limited: Dict[str, int] = defaultdict(int)
+            self.caches: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record_node(self, name: str, seconds: float, items_in: int, items_out: int):
+        with self._lock:
+            node = self.nodes[name]
+            node["calls"] += 1
+            node["seconds"] += seconds
+            node["items_in"] += items_in
+            node["items_out"] += items_out
+
+    def record_request(self, endpoint: str, seconds: float, status: Any):
+        node = current_node.get()
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.status_codes[endpoint][str(status)] += 1
+            if node:
+                # Per-stage I/O cost, read back by the filter planner
+                self.nodes[node]["requests"] += 1
+
+    def record_retry(self, endpoint: str, rate_limited: bool = False):
+        with self._lock:
+            self.retries[endpoint] += 1
+            if rate_limited:
+                self.rate_limited[endpoint] += 1
+
+    def record_cache(self, name: str, hit: bool):
+        with self._lock:
+            self.caches[name]["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a JSON-serialisable view of everything recorded so far."""
+        with self._lock:
+            nodes = {}
+            for name, n in self.nodes.items():
+                nodes[name] = dict(n)
+                nodes[name]["seconds"] = round(n["seconds"], 4)
+                nodes[name]["items_per_second"] = round(n["items_in"] / n["seconds"], 2) if n["seconds"] else 0.0
+                nodes[name]["pass_rate"] = round(n["items_out"] / n["items_in"], 4) if n["items_in"] else None
+
+            endpoints = {}
+            for name in set(self.latencies) | set(self.retries):
+                values = sorted(self.latencies.get(name, []))
+                endpoints[name] = {
+                    "requests": len(values),
+                    "total_seconds": round(sum(values), 4),
+                    "p50_ms": round(percentile(values, 50) * 1000, 1),
+                    "p95_ms": round(percentile(values, 95) * 1000, 1),
+                    "p99_ms": round(percentile(values, 99) * 1000, 1),
+                    "max_ms": round(values[-1] * 1000, 1) if values else 0.0,
+                    "status_codes": dict(self.status_codes.get(name, {})),
+                    "retries": self.retries.get(name, 0),
+                    "rate_limited": self.rate_limited.get(name, 0),
+                }
+
+            caches = {}
+            for name, c in self.caches.items():
+                total = c["hits"] + c["misses"]
+                caches[name] = dict(c, hit_ratio=round(c["hits"] / total, 4) if total else None)
+
+            return {
+                "wall_seconds": round(time.time() - self.started_at, 3),
+                "nodes": nodes,
+                "endpoints": endpoints,
+                "caches": caches,
+            }
+
+    def to_prometheus(self, prefix: str = "stock_scanner") -> str:
+        """Renders the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_run_wall_seconds gauge",
+            f"{prefix}_run_wall_seconds {snap['wall_seconds']}",
+        ]
+        for metric, key in [("node_seconds", "seconds"), ("node_items_in", "items_in"), ("node_items_out", "items_out"),
+                            ("node_requests", "requests")]:
+            lines.append(f"# TYPE {prefix}_{metric} gauge")
+            for name, n in snap["nodes"].items():
+                lines.append(f'{prefix}_{metric}{{node="{name}"}} {n[key]}')
+
+        lines.append(f"# TYPE {prefix}_endpoint_latency_ms gauge")
+        for name, e in snap["endpoints"].items():
+            for q in ("p50", "p95", "p99"):
+                lines.append(f'{prefix}_endpoint_latency_ms{{endpoint="{name}",quantile="{q}"}} {e[q + "_ms"]}')
+        for metric, key in [("endpoint_requests_total", "requests"), ("endpoint_retries_total", "retries"),
+                            ("endpoint_rate_limited_total", "rate_limited")]:
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, e in snap["endpoints"].items():
+                lines.append(f'{prefix}_{metric}{{endpoint="{name}"}} {e[key]}')
+        lines.append(f"# TYPE {prefix}_endpoint_responses_total counter")
+        for name, e in snap["endpoints"].items():
+            for code, count in e["status_codes"].items():
+                lines.append(f'{prefix}_endpoint_responses_total{{endpoint="{name}",code="{code}"}} {count}')
+
+        lines.append(f"# TYPE {prefix}_cache_hit_ratio gauge")
+        for name, c in snap["caches"].items():
+            if c["hit_ratio"] is not None:
+                lines.append(f'{prefix}_cache_hit_ratio{{cache="{name}"}} {c["hit_ratio"]}')
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+def _count(value: Any) -> int:
+    return len(value) if isinstance(value, (list, tuple, dict)) else 0
+
+def instrument_node(name: str, func: Callable, in_key: Optional[str], out_key: str) -> Callable:
+    """
+    Wraps a graph node so its wall time and items in/out are recorded.
+    `in_key` / `out_key` are the GraphState lists the node consumes / produces.
+    """
+    @wraps(func)
+    def wrapper(state, *args, **kwargs):
+        items_in = _count(state.get(in_key)) if in_key else 0
+        token = current_node.set(name)
+        start = time.perf_counter()
+        try:
+            result = func(state, *args, **kwargs)
+        finally:
+            current_node.reset(token)
+            flush_node_summary(name)
+        elapsed = time.perf_counter() - start
+        items_out = _count(result.get(out_key)) if isinstance(result, dict) else 0
+        metrics.record_node(name, elapsed, items_in, items_out)
+        logger.info(f"Node {name} finished in {elapsed:.2f}s ({items_in} in, {items_out} out)")
+        return result
+
+    return wrapper
+
+def write_run_summary(path: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Writes the metrics snapshot (plus any extra run info) as JSON."""
+    summary = dict(extra or {})
+    summary["metrics"] = metrics.snapshot()
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+    logger.info(f"Saved run summary to {path}")
+    return summary
+
+def write_prometheus_textfile(path: str):
+    """Writes metrics for the node_exporter textfile collector (atomic rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(metrics.to_prometheus())
+    os.replace(tmp_path, path)
+    logger.info(f"Saved Prometheus metrics to {path}")
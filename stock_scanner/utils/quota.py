@@ -0,0 +1,144 @@
+import json
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from stock_scanner.config import config
+from stock_scanner.planner import FILTERS
+from stock_scanner.utils.logger import get_logger
+from stock_scanner.utils.tracing import current_node
+
+logger = get_logger(__name__)
+
+# Share of the calls left today that each per-symbol stage may use in one run.
+# Filters get theirs by position in the planned order (the first one sees the
+# whole screener universe); the LLM-side stages keep a fixed share.
+FILTER_SHARES = [0.6, 0.25]
+STAGE_SHARES = {"news_analysis": 0.15}
+
+def stage_shares(order: Optional[List[str]] = None) -> Dict[str, float]:
+    """Per-stage shares for a filter order (default: FILTERS)."""
+    return {**dict(zip(order or FILTERS, FILTER_SHARES)), **STAGE_SHARES}
+
+KEEP_DAYS = 30
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+class QuotaManager:
+    """
+    Counts FMP calls per UTC day across runs (persisted to
+    DATA_DIR/state/fmp_quota.json) and splits what is left of
+    FMP_DAILY_CALL_LIMIT into per-stage budgets at the start of a run.
+    Stages check `budget_exhausted(stage)` before each symbol's calls, so a
+    run that hits the budget has already covered its highest-priority symbols.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.path: Optional[Path] = None
+        self.days: Dict[str, Dict[str, Any]] = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.budgets: Dict[str, int] = {}
+            self.run_calls: Dict[str, int] = defaultdict(int)
+            self.skipped: Dict[str, List[str]] = defaultdict(list)
+            self._warned = set()
+
+    def _load(self, path: Path):
+        self.path = path
+        try:
+            self.days = json.loads(path.read_text()).get("days", {}) if path.exists() else {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable quota file {path} ({e}); starting today's count at 0")
+            self.days = {}
+
+    def _day(self) -> Dict[str, Any]:
+        if self.path is None:
+            self._load(config.DATA_DIR / "state" / "fmp_quota.json")
+        return self.days.setdefault(_today(), {"calls": 0, "by_stage": {}})
+
+    def used_today(self) -> int:
+        with self._lock:
+            return self._day()["calls"]
+
+    def start_run(self, path: Optional[Path] = None, order: Optional[List[str]] = None):
+        """Reloads today's count and allocates this run's stage budgets for the filter `order`."""
+        self.reset()
+        with self._lock:
+            self._load(path or config.DATA_DIR / "state" / "fmp_quota.json")
+            limit = config.FMP_DAILY_CALL_LIMIT
+            if limit:
+                remaining = max(limit - self._day()["calls"], 0)
+                self.budgets = {stage: math.floor(remaining * share) for stage, share in stage_shares(order).items()}
+                logger.info(f"FMP quota: {remaining}/{limit} calls left today; stage budgets {self.budgets}")
+
+    def record(self, stage: Optional[str] = None):
+        """Counts one FMP request against today and the current stage."""
+        stage = stage or current_node.get() or "other"
+        with self._lock:
+            day = self._day()
+            day["calls"] += 1
+            day["by_stage"][stage] = day["by_stage"].get(stage, 0) + 1
+            self.run_calls[stage] += 1
+
+    def budget_exhausted(self, stage: str) -> bool:
+        """True once `stage` has used its budget for this run (stages without one are unlimited)."""
+        with self._lock:
+            budget = self.budgets.get(stage)
+            if budget is None or self.run_calls[stage] < budget:
+                return False
+            if stage not in self._warned:
+                logger.warning(f"FMP call budget for {stage} ({budget} calls) reached; skipping remaining symbols")
+                self._warned.add(stage)
+            return True
+
+    def skip_for_budget(self, stage: str, symbol: str):
+        with self._lock:
+            self.skipped[stage].append(symbol)
+
+    def flush(self):
+        """Persists the per-day counts (last KEEP_DAYS days)."""
+        with self._lock:
+            if self.path is None:
+                return
+            days = dict(sorted(self.days.items())[-KEEP_DAYS:])
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps({"days": days}, indent=2))
+            tmp.replace(self.path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "daily_limit": config.FMP_DAILY_CALL_LIMIT or None,
+                "used_today": self._day()["calls"],
+                "budgets": dict(self.budgets),
+                "run_calls": dict(self.run_calls),
+                "skipped_for_budget": {stage: list(symbols) for stage, symbols in self.skipped.items()},
+            }
+
+def prioritize(client, candidates: List[dict]) -> List[dict]:
+    """
+    Orders screener candidates by today's volume / average volume from
+    batched quotes (one call per 200 symbols), highest first, so budgeted
+    stages reach the most promising symbols before their budget runs out.
+    """
+    def ratio(candidate):
+        quote = quotes.get(candidate['symbol']) or {}
+        volume, average = quote.get('volume'), quote.get('avgVolume')
+        return volume / average if volume and average else 0.0
+
+    try:
+        quotes = client.get_quotes([c['symbol'] for c in candidates])
+        return sorted(candidates, key=ratio, reverse=True)
+    except Exception as e:
+        logger.warning(f"Quote prefilter failed ({e}); keeping screener order")
+        return candidates
+
+quota = QuotaManager()
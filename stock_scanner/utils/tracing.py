@@ -0,0 +1,144 @@
+import contextvars
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+from stock_scanner.config import config
+
+# Span categories. "api" covers the per-symbol FMP calls on the hot loop;
+# "api_bulk" (one-off universe calls), "llm" and "node" are low-volume and
+# traced in full by default.
+API = "api"
+API_BULK = "api_bulk"
+LLM = "llm"
+NODE = "node"
+
+# Node currently executing, set by metrics.instrument_node so sampled-out API
+# spans can be rolled up into one summary span per node.
+current_node: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_node", default=None)
+
+def tracing_enabled() -> bool:
+    """Mirrors langsmith's env switches without importing langsmith."""
+    for var in ("LANGSMITH_TRACING_V2", "LANGCHAIN_TRACING_V2", "LANGSMITH_TRACING", "LANGCHAIN_TRACING"):
+        if os.environ.get(var, "").lower() == "true":
+            return True
+    return False
+
+@functools.lru_cache(maxsize=8)
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {API: 0.0, API_BULK: 1.0, LLM: 1.0, NODE: 1.0}
+    for part in spec.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            try:
+                rates[key.strip()] = max(0.0, min(1.0, float(value)))
+            except ValueError:
+                pass
+    return rates
+
+def sample_rate(category: str) -> float:
+    """Sampling rate for a span category from TRACE_SAMPLE_RATES (e.g. "api=0.02,llm=1")."""
+    return _parse_rates(config.TRACE_SAMPLE_RATES).get(category, 1.0)
+
+class _SpanAggregator:
+    """Per-node rollup of API calls that were not traced individually."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Optional[str], Dict[str, Dict[str, float]]] = defaultdict(
+            lambda: defaultdict(lambda: {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        )
+
+    def record(self, node: Optional[str], name: str, seconds: float, error: bool):
+        ms = seconds * 1000
+        with self._lock:
+            s = self._stats[node][name]
+            s["calls"] += 1
+            s["errors"] += int(error)
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+
+    def pop(self, node: Optional[str]) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stats = self._stats.pop(node, {})
+        return {name: dict(s, avg_ms=round(s["total_ms"] / s["calls"], 2), total_ms=round(s["total_ms"], 2),
+                           max_ms=round(s["max_ms"], 2))
+                for name, s in stats.items()}
+
+_aggregator = _SpanAggregator()
+
+def traceable(name: str, category: str = API) -> Callable:
+    """
+    Lazy, sampled drop-in for ``langsmith.traceable``.
+
+    - With tracing disabled the wrapped function is called directly and
+      langsmith is never imported.
+    - Otherwise each call is traced with the category's sample rate; calls
+      that are not sampled are rolled up and emitted as a single summary span
+      when the enclosing node finishes (see `flush_node_summary`).
+
+    langsmith exports runs from its own background thread, so tracing never
+    blocks the caller on network I/O.
+    """
+    def decorator(func: Callable) -> Callable:
+        traced = None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal traced
+            if not tracing_enabled():
+                return func(*args, **kwargs)
+
+            rate = sample_rate(category)
+            if rate >= 1.0 or (rate > 0.0 and random.random() < rate):
+                if traced is None:
+                    from langsmith import traceable as ls_traceable
+                    traced = ls_traceable(name=name, run_type="tool", metadata={"category": category})(func)
+                return traced(*args, **kwargs)
+
+            start = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                _aggregator.record(current_node.get(), name, time.perf_counter() - start, error)
+
+        return wrapper
+
+    return decorator
+
+def flush_node_summary(node: Optional[str]):
+    """Emits one summary span with the rolled-up, unsampled API calls of `node`."""
+    stats = _aggregator.pop(node)
+    if not stats or not tracing_enabled():
+        return
+
+    from langsmith import traceable as ls_traceable
+
+    @ls_traceable(name=f"{node or 'unknown'}_api_summary", run_type="chain",
+                  metadata={"category": API, "sample_rate": sample_rate(API)})
+    def _api_summary(spans: Dict[str, Any]) -> Dict[str, Any]:
+        return {"total_calls": sum(s["calls"] for s in spans.values())}
+
+    try:
+        _api_summary(stats)
+    except Exception:
+        pass # Tracing must never break a scan
+
+def flush_traces():
+    """Waits for queued spans to be exported; call once at the end of a run."""
+    if not tracing_enabled() or "langsmith" not in sys.modules:
+        return
+    try:
+        from langsmith.run_trees import get_cached_client
+        get_cached_client().flush()
+    except Exception:
+        pass
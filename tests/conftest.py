@@ -0,0 +1,21 @@
+import logging
+
+import pytest
+
+from stock_scanner.config import config
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path, monkeypatch):
+    """Points the scanner's log file at tmp_path so test runs never append to the repo-root daily_scan.log."""
+    from stock_scanner.utils import logger as scanner_logger
+
+    path = tmp_path / "daily_scan.log"
+    monkeypatch.setattr(config, "LOG_FILE", str(path))
+    scanner_logger.get_logger("stock_scanner")
+    handlers = [h for h in scanner_logger._listener.handlers if isinstance(h, logging.FileHandler)]
+    for handler in handlers:
+        handler.baseFilename = str(path)
+        handler.close() # Reopened lazily at the new path on the next record
+    yield path
+    for handler in handlers:
+        handler.close()
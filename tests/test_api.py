@@ -0,0 +1,78 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from stock_scanner.api import create_server
+from stock_scanner.models import AnalystRating, StockCandidate, StockResult, VolumeAnalysis
+from stock_scanner.storage.runs import RunStore
+
+def _result(symbol, ratio):
+    return StockResult(
+        candidate=StockCandidate(symbol=symbol, companyName=f"{symbol} Inc", price=10.0),
+        volume_analysis=VolumeAnalysis(symbol=symbol, current_volume=300, avg_volume=100, ratio=ratio, is_spike=True),
+        analyst_rating=AnalystRating(symbol=symbol, target_consensus=15.0, upside_percent=50.0),
+    )
+
+@pytest.fixture
+def api(tmp_path):
+    store = RunStore(tmp_path / "runs")
+    store.save("2024-03-04_22-00", [_result("AAA", 2.5)])
+    server = create_server("127.0.0.1", 0, store.root)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield store, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def _get(url, etag=None):
+    request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["ETag"], json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["ETag"], None
+
+def test_symbol_lookup_and_conditional_get(api):
+    store, base = api
+    status, etag, body = _get(f"{base}/symbols/aaa")
+    assert status == 200
+    assert body["run_id"] == "2024-03-04_22-00"
+    assert body["volume_analysis"]["ratio"] == 2.5
+
+    assert _get(f"{base}/symbols/AAA", etag)[0] == 304
+    assert _get(f"{base}/symbols/ZZZ")[0] == 404
+
+    # A new run is picked up and changes the representation
+    store.save("2024-03-05_22-00", [_result("AAA", 4.0), _result("BBB", 3.0)])
+    status, new_etag, body = _get(f"{base}/symbols/AAA", etag)
+    assert status == 200 and new_etag != etag
+    assert body["volume_analysis"]["ratio"] == 4.0
+    assert [h["run_id"] for h in _get(f"{base}/symbols/AAA/history")[2]] == ["2024-03-05_22-00", "2024-03-04_22-00"]
+    assert _get(f"{base}/results/latest")[2]["run_id"] == "2024-03-05_22-00"
+    assert [r["run_id"] for r in _get(f"{base}/runs")[2]] == ["2024-03-05_22-00", "2024-03-04_22-00"]
+
+def test_index_reloads_only_new_runs(tmp_path, monkeypatch):
+    from stock_scanner.api import ResultIndex
+
+    store = RunStore(tmp_path / "runs")
+    store.save("2024-03-04_22-00", [_result("AAA", 2.5)])
+    index = ResultIndex(store)
+    loaded = []
+    load = store.load
+    monkeypatch.setattr(store, "load", lambda run_id: loaded.append(run_id) or load(run_id))
+    index.refresh()
+    assert loaded == ["2024-03-04_22-00"]
+
+    # Stage snapshots written after results.json don't trigger a reload
+    (store.run_dir("2024-03-04_22-00") / "volume.parquet").write_bytes(b"x")
+    index.refresh()
+    assert loaded == ["2024-03-04_22-00"]
+
+    # An intraday run is loaded on its own and only served as latest when asked for
+    store.save("2024-03-05_15-00_intraday", [_result("BBB", 3.0)])
+    assert json.loads(index.get("/results/latest")[0])["run_id"] == "2024-03-04_22-00"
+    assert json.loads(index.get("/results/latest?intraday=1")[0])["run_id"] == "2024-03-05_15-00_intraday"
+    assert loaded == ["2024-03-04_22-00", "2024-03-05_15-00_intraday"]
+    assert index.get("/symbols/AAA") is not None and index.get("/symbols/BBB") is not None
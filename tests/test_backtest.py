@@ -0,0 +1,277 @@
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_scanner.backtest.engine import backtest_symbol
+
+OLD_BACKTEST = Path(__file__).resolve().parent.parent / "old" / "backtest_scanner.py"
+
+def _load_reference():
+    spec = importlib.util.spec_from_file_location("old_backtest_scanner", OLD_BACKTEST)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _synthetic_history(seed=0, days=320):
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(datetime.now().date())
+    dates = pd.bdate_range(end=end, periods=days)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    volume = rng.integers(60_000, 120_000, days)
+    spikes = rng.choice(days, size=40, replace=False)
+    volume[spikes] *= 3
+    prices = [
+        {"date": d.strftime("%Y-%m-%d"), "open": c, "high": c * (1 + rng.uniform(0, 0.05)),
+         "low": c * 0.97, "close": c, "volume": int(v)}
+        for d, c, v in zip(dates, close, volume)
+    ]
+    # Newest first, like FMP
+    prices.reverse()
+    target_days = sorted(rng.choice(days, size=12, replace=False))
+    targets = [
+        {"publishedDate": f"{dates[i].strftime('%Y-%m-%d')}T{rng.integers(0, 23):02d}:15:00.000Z",
+         "priceTarget": float(round(close[i] * rng.uniform(1.0, 1.6), 2))}
+        for i in target_days
+    ]
+    return prices, targets
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorized_backtest_matches_reference_loop(seed):
+    reference = _load_reference()
+    prices, targets = _synthetic_history(seed)
+    
+    expected = pd.DataFrame(reference.backtest_symbol("TST", prices, targets))
+    actual = backtest_symbol("TST", prices, targets)
+    
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(
+        actual[expected.columns].reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False
+    )
+
+def test_no_targets_means_no_signals():
+    prices, _ = _synthetic_history(3)
+    assert backtest_symbol("TST", prices, []).empty
+
+def test_parallel_runner_matches_serial(tmp_path):
+    from stock_scanner.storage.history import HistoryStore
+    from stock_scanner.backtest.runner import run_backtest
+    
+    store = HistoryStore(tmp_path)
+    expected = []
+    for i in range(6):
+        symbol = f"S{i}"
+        prices, targets = _synthetic_history(seed=10 + i)
+        store.upsert_prices(symbol, prices)
+        store.save_targets(symbol, pd.DataFrame(targets))
+        expected.append(backtest_symbol(symbol, prices, targets))
+    expected = pd.concat(expected).sort_values(['Date', 'Symbol'], kind='stable').reset_index(drop=True)
+    
+    parallel = run_backtest(store.symbols(), store, workers=2, chunk_size=2)
+    serial = run_backtest(store.symbols(), store, workers=1, chunk_size=4)
+    
+    pd.testing.assert_frame_equal(parallel, serial)
+    pd.testing.assert_frame_equal(parallel, expected, check_dtype=False)
+
+def test_sweep_cells_match_individual_backtests():
+    from stock_scanner.backtest.sweep import compute_features, sweep
+    
+    histories = {f"S{i}": _synthetic_history(seed=20 + i) for i in range(4)}
+    features = pd.concat([compute_features(s, p, t, [5, 15]) for s, (p, t) in histories.items()])
+    cube = sweep(features, [1.5, 2.5], [10.0, 20.0], [5, 15], [50_000])
+    assert len(cube) == 2 * 2 * 2
+    
+    for spike, upside, hold in [(1.5, 20.0, 15), (2.5, 10.0, 5)]:
+        signals = pd.concat([backtest_symbol(s, p, t, volume_spike_threshold=spike, upside_threshold=upside,
+                                             holding_period=hold) for s, (p, t) in histories.items()])
+        cell = cube[(cube.spike_threshold == spike) & (cube.upside_threshold == upside)
+                    & (cube.holding_period == hold)].iloc[0]
+        assert cell.signals == len(signals)
+        assert cell.mean_max_gain == pytest.approx(signals['Max Gain %'].mean(), abs=0.01)
+        assert cell.mean_final_return == pytest.approx(signals['Final Return %'].mean(), abs=0.01)
+        assert cell.win_rate == pytest.approx((signals['Max Gain %'] > 5.0).mean() * 100)
+
+def test_portfolio_respects_slots_and_costs():
+    from stock_scanner.backtest.portfolio import simulate_portfolio
+    
+    signals = pd.DataFrame([
+        # Two overlapping signals on day 1, one slot -> only the higher Vol Ratio is taken
+        {"Symbol": "A", "Date": "2025-01-02", "Exit Date": "2025-01-10", "Entry Price": 10.0,
+         "Final Return %": 10.0, "Vol Ratio": 3.0, "Volatility %": 2.0},
+        {"Symbol": "B", "Date": "2025-01-02", "Exit Date": "2025-01-10", "Entry Price": 20.0,
+         "Final Return %": 50.0, "Vol Ratio": 2.0, "Volatility %": 2.0},
+        # Slot is free again after A exits
+        {"Symbol": "C", "Date": "2025-01-10", "Exit Date": "2025-01-20", "Entry Price": 5.0,
+         "Final Return %": -20.0, "Vol Ratio": 2.0, "Volatility %": 2.0},
+    ])
+    
+    result = simulate_portfolio(signals, initial_capital=10_000, slots=1, slippage_bps=0, commission=0)
+    
+    assert list(result.trades['Symbol']) == ["A", "C"]
+    assert result.stats['skipped_signals'] == 1
+    # +10% on 10k then -20% on 11k
+    assert result.stats['final_equity'] == pytest.approx(8_800, abs=1)
+    assert result.stats['max_drawdown_pct'] == pytest.approx(-20.0, abs=0.01)
+    
+    with_costs = simulate_portfolio(signals, initial_capital=10_000, slots=1, slippage_bps=50, commission=5)
+    assert with_costs.stats['final_equity'] < result.stats['final_equity']
+
+def test_volatility_sizing_scales_down_volatile_names():
+    from stock_scanner.backtest.portfolio import simulate_portfolio
+    
+    signals = pd.DataFrame([{"Symbol": "V", "Date": "2025-01-02", "Exit Date": "2025-01-10", "Entry Price": 10.0,
+                             "Final Return %": 0.0, "Vol Ratio": 2.0, "Volatility %": 6.0}])
+    
+    result = simulate_portfolio(signals, initial_capital=10_000, slots=1, sizing="volatility",
+                                target_volatility_pct=3.0, slippage_bps=0, commission=0)
+    
+    assert result.trades['Cost'].iloc[0] == pytest.approx(5_000, abs=10)
+
+def test_bootstrap_intervals_cover_estimate():
+    from stock_scanner.backtest.stats import bootstrap_ci, block_bootstrap_ci, ci_by_group
+    
+    rng = np.random.default_rng(0)
+    n = 5_000
+    df = pd.DataFrame({
+        "Date": pd.bdate_range("2024-01-01", periods=250).strftime("%Y-%m-%d")[rng.integers(0, 250, n)],
+        "Max Gain %": rng.normal(8, 6, n),
+        "Final Return %": rng.normal(1, 10, n),
+        "Sector": rng.choice(["Healthcare", "Technology"], n),
+    })
+    
+    iid = bootstrap_ci(df, n_resamples=2_000, seed=1).set_index("metric")
+    block = block_bootstrap_ci(df, block_days=5, n_resamples=2_000, seed=1).set_index("metric")
+    
+    for res in (iid, block):
+        assert (res["ci_low"] <= res["estimate"]).all()
+        assert (res["estimate"] <= res["ci_high"]).all()
+    # Standard error of the mean max gain ~ 6 / sqrt(5000)
+    width = iid.loc["avg_max_gain", "ci_high"] - iid.loc["avg_max_gain", "ci_low"]
+    assert width == pytest.approx(2 * 1.96 * 6 / np.sqrt(n), rel=0.15)
+    
+    by_sector = ci_by_group(df, "Sector", n_resamples=500, seed=1)
+    assert set(by_sector["Sector"]) == {"Healthcare", "Technology"}
+
+def test_price_target_store_incremental_and_as_of(tmp_path):
+    from stock_scanner.storage.price_targets import PriceTargetStore
+    
+    events = [
+        {"publishedDate": "2024-01-10T14:00:00.000Z", "priceTarget": 10.0, "analystCompany": "A"},
+        {"publishedDate": "2024-02-01T09:30:00.000Z", "priceTarget": 20.0, "analystCompany": "B"},
+        {"publishedDate": "2024-03-05T16:00:00.000Z", "priceTarget": 16.0, "analystCompany": "A"},
+    ]
+    store = PriceTargetStore(tmp_path)
+    assert store.append("TST", events[:2]) == 2
+    # Re-fetching the full history only adds the events not stored yet
+    assert store.append("TST", events) == 1
+    assert store.append("TST", events) == 0
+    assert store.watermark("TST") == pd.Timestamp("2024-03-05 16:00")
+    
+    index = store.as_of_index("TST")
+    assert index.lookup("2024-01-09") == (None, None, 0)
+    assert index.lookup("2024-01-10") == (10.0, 10.0, 1)
+    assert index.lookup("2024-02-15") == (20.0, 15.0, 2)
+    assert index.lookup("2024-12-31") == (16.0, 18.0, 2)
+    assert store.as_of_index("TST") is index # Cached until the file changes
+    
+    # A late event stamped at the watermark is still added, once
+    late = {"publishedDate": "2024-03-05T16:00:00.000Z", "priceTarget": 30.0, "analystCompany": "C"}
+    assert store.append("TST", events + [late]) == 1
+    assert store.append("TST", events + [late]) == 0
+    assert store.as_of_index("TST").lookup("2024-12-31") == (30.0, 22.0, 3)
+    
+    # Same as-of semantics as the engine's merge_asof path
+    prices, targets = _synthetic_history(seed=5)
+    store.append("SYN", targets)
+    pd.testing.assert_frame_equal(backtest_symbol("SYN", prices, store.as_of_index("SYN")),
+                                  backtest_symbol("SYN", prices, targets))
+
+def test_feature_store_incremental_matches_full_recompute(tmp_path):
+    from stock_scanner.storage.features import FeatureStore, compute_daily_features
+    from stock_scanner.backtest.engine import prepare_prices
+    
+    prices = prepare_prices(_synthetic_history(seed=7, days=200)[0])
+    store = FeatureStore(tmp_path)
+    store.update("TST", prices.iloc[:150])
+    assert store.update("TST", prices.iloc[:150]) == 0
+    # 15 incomplete forward rows + 50 new dates are rewritten
+    assert store.update("TST", prices) == 65
+    
+    full = compute_daily_features("TST", prices)
+    pd.testing.assert_frame_equal(store.load("TST"), full)
+    
+    # 60-day z-score matches the old rolling().apply() definition
+    ref = prices['volume'].rolling(window=60).apply(lambda x: (x.iloc[-1] - x.mean()) / x.std())
+    np.testing.assert_allclose(full['vol_zscore_60'], ref)
+    
+    universe = store.load_universe(['vol_ratio_30'], start=prices['date'].iloc[-10])
+    assert list(universe.columns) == ['symbol', 'date', 'vol_ratio_30'] and len(universe) == 10
+
+def test_backtest_and_sweep_read_the_feature_store(tmp_path):
+    import os
+    from stock_scanner.storage.features import FeatureStore
+    from stock_scanner.storage.history import HistoryStore
+    from stock_scanner.storage.price_targets import PriceTargetStore
+    from stock_scanner.backtest.runner import run_backtest
+    from stock_scanner.backtest.sweep import build_features, compute_features
+    
+    store = HistoryStore(tmp_path)
+    features = FeatureStore(tmp_path / "features")
+    targets = PriceTargetStore(store.targets_dir)
+    expected, expected_features = [], []
+    for i in range(3):
+        symbol = f"F{i}"
+        prices, events = _synthetic_history(seed=30 + i)
+        features.update(symbol, store.upsert_prices(symbol, prices))
+        store.save_targets(symbol, pd.DataFrame(events))
+        expected.append(backtest_symbol(symbol, prices, events))
+        expected_features.append(compute_features(symbol, prices, targets.as_of_index(symbol), [5, 15]))
+    assert features.fresh_symbols(store, store.symbols()) == store.symbols()
+    expected = pd.concat(expected).sort_values(['Date', 'Symbol'], kind='stable').reset_index(drop=True)
+    
+    # Read from the stored features: same signals and sweep rows as recomputing from prices
+    from_store = run_backtest(store.symbols(), store, workers=1)
+    assert len(from_store) > 0
+    pd.testing.assert_frame_equal(from_store, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(build_features(store.symbols(), [5, 15], store, workers=1),
+                                  pd.concat(expected_features, ignore_index=True), check_dtype=False)
+    
+    # Prices newer than the features: that symbol is recomputed from prices
+    stamp = os.stat(features.path("F0")).st_mtime + 10
+    os.utime(store.prices_path("F0"), (stamp, stamp))
+    assert features.fresh_symbols(store, store.symbols()) == ["F1", "F2"]
+    pd.testing.assert_frame_equal(run_backtest(store.symbols(), store, workers=1), expected, check_dtype=False)
+
+def test_universe_matrix_feeds_workers(tmp_path):
+    from stock_scanner.storage import universe
+    from stock_scanner.storage.history import HistoryStore
+    from stock_scanner.backtest.runner import run_backtest
+    
+    store = HistoryStore(tmp_path)
+    for i in range(4):
+        prices, targets = _synthetic_history(seed=20 + i, days=200 + 20 * i)
+        store.upsert_prices(f"U{i}", prices)
+        store.save_targets(f"U{i}", pd.DataFrame(targets))
+    from_parquet = run_backtest(store.symbols(), store, workers=1)
+    
+    universe.build(store)
+    matrix = universe.attach(store.root / "universe")
+    assert matrix.prices.shape == (4, 260, 4) and not matrix.prices.flags.writeable
+    frame = universe.load_prices(store, "U0")
+    # float64, no rounding (copied: the memmap column type itself differs from an ndarray)
+    pd.testing.assert_frame_equal(frame.copy(), store.load_prices("U0"))
+    # Zero-copy: the frame's columns are views into the shared mapping
+    assert np.shares_memory(frame['close'].to_numpy(), matrix.prices)
+    assert np.shares_memory(frame['volume'].to_numpy(), matrix.volume)
+    
+    from_matrix = run_backtest(store.symbols(), store, workers=2, chunk_size=2)
+    pd.testing.assert_frame_equal(from_matrix, from_parquet)
+    
+    # A symbol updated after the build falls back to its Parquet file
+    store.upsert_prices("U0", _synthetic_history(seed=99, days=50)[0])
+    pd.testing.assert_frame_equal(universe.load_prices(store, "U0"), store.load_prices("U0"))
@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime, timezone
+
+import stock_scanner.main as scanner_main
+from stock_scanner.daemon import ScannerDaemon, next_scheduled, send_command
+
+def test_next_scheduled_skips_weekends():
+    friday_evening = datetime(2024, 3, 8, 23, 0, tzinfo=timezone.utc)
+    assert next_scheduled(friday_evening, "22:00") == datetime(2024, 3, 11, 22, 0, tzinfo=timezone.utc)
+
+    monday_morning = datetime(2024, 3, 11, 9, 0, tzinfo=timezone.utc)
+    assert next_scheduled(monday_morning, "22:00") == datetime(2024, 3, 11, 22, 0, tzinfo=timezone.utc)
+    assert next_scheduled(monday_morning, every_minutes=30) == datetime(2024, 3, 11, 9, 30, tzinfo=timezone.utc)
+
+def test_control_socket_scan_status_stop(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(scanner_main, "run_scan", lambda send_email: calls.append(send_email) or {"run_id": "r1", "results": 2})
+
+    daemon = ScannerDaemon(at="22:00", email=False)
+    socket_path = tmp_path / "d.sock"
+    worker = threading.Thread(target=daemon.serve, args=(socket_path,))
+    worker.start()
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            threading.Event().wait(0.01)
+
+        assert send_command(socket_path, "scan")["ok"]
+        for _ in range(200):
+            if daemon.cycles:
+                break
+            threading.Event().wait(0.01)
+        status = send_command(socket_path, "status")
+        assert status["cycles"][0]["trigger"] == "manual"
+        assert status["cycles"][0]["ok"] and status["cycles"][0]["results"] == 2
+        assert calls == [False]
+        assert not send_command(socket_path, "bogus")["ok"]
+    finally:
+        send_command(socket_path, "stop")
+        worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert not socket_path.exists()
+
+def test_warm_compiles_the_planned_order(monkeypatch):
+    import stock_scanner.graph as graph
+    import stock_scanner.planner as planner
+    from stock_scanner.config import config
+
+    monkeypatch.setattr(config, "GOOGLE_API_KEY", None)
+    monkeypatch.setattr(planner, "plan", lambda: {"order": ["analyst_filter", "volume_filter"]})
+    monkeypatch.setattr(graph, "_apps", {})
+    ScannerDaemon(at="22:00", email=False).warm()
+    assert list(graph._apps) == [("screener", ("analyst_filter", "volume_filter"))]
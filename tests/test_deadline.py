@@ -0,0 +1,137 @@
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from stock_scanner.config import config
+from stock_scanner.utils.deadline import (
+    FILTERS_TRUNCATED, FULL, LEVEL_NAMES, NO_CEO_REPORTS, NO_REPORTS, RULES_SENTIMENT, degradation_level, expired,
+    parse_deadline, rules_sentiment)
+
+NOW = datetime(2026, 1, 18, 21, 0)
+
+@pytest.fixture(autouse=True)
+def local_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "DEADLINE_RESERVE_SECONDS", 120)
+    monkeypatch.setattr(config, "DEADLINE_LEVEL_SECONDS", (900, 600, 300))
+    return tmp_path
+
+def test_parse_deadline_forms():
+    now = NOW.timestamp()
+    assert parse_deadline("45m", NOW) == now + 45 * 60
+    assert parse_deadline("1h30m", NOW) == now + 90 * 60
+    assert parse_deadline("90s", NOW) == now + 90
+    assert parse_deadline("40", NOW) == now + 40 * 60
+    assert parse_deadline("22:30", NOW) == datetime(2026, 1, 18, 22, 30).timestamp()
+    # A wall-clock time already past today means tomorrow
+    assert parse_deadline("00:30", NOW) == datetime(2026, 1, 19, 0, 30).timestamp()
+    assert parse_deadline("2026-01-18T23:00", NOW) == datetime(2026, 1, 18, 23, 0).timestamp()
+    with pytest.raises(ValueError):
+        parse_deadline("soon", NOW)
+
+def test_degradation_levels_follow_time_left():
+    now = NOW.timestamp()
+    # Time left is measured after the 120 s reserve
+    assert degradation_level(None) == FULL
+    assert degradation_level(now + 120 + 1000, now) == FULL
+    assert degradation_level(now + 120 + 800, now) == NO_CEO_REPORTS
+    assert degradation_level(now + 120 + 400, now) == NO_REPORTS
+    assert degradation_level(now + 120 + 100, now) == RULES_SENTIMENT
+    assert not expired(now + 121, now) and expired(now + 120, now)
+
+def test_degradation_level_is_capped(monkeypatch):
+    now = NOW.timestamp()
+    monkeypatch.setattr(config, "DEADLINE_LEVEL_SECONDS", (1200, 900, 600, 300))
+    assert degradation_level(now + 120 + 100, now) == RULES_SENTIMENT
+
+def test_rules_sentiment_flags_red_flag_keywords():
+    flagged = rules_sentiment([{"title": "Acme announces $50M public offering", "text": ""},
+                               {"title": "Acme wins contract"}])
+    assert flagged["is_negative"] and "public offering" in flagged["reasoning"]
+    assert not rules_sentiment([{"title": "Acme wins contract", "text": "Record revenue"}])["is_negative"]
+    assert rules_sentiment([])["summary"] == "No news."
+
+def test_tight_deadline_degrades_llm_stages():
+    from langchain_core.runnables import RunnableLambda
+    from stock_scanner.nodes.news import news_node
+    from stock_scanner.nodes.reporting import reporting_node
+
+    pick = {
+        "candidate": {"symbol": "ACME", "companyName": "Acme Inc", "price": 10.0},
+        "volume_analysis": {"symbol": "ACME", "current_volume": 300, "avg_volume": 100, "ratio": 3.0, "is_spike": True},
+        "analyst_rating": {"symbol": "ACME", "target_consensus": 20.0, "upside_percent": 100.0},
+    }
+    calls = []
+    fake_llm = RunnableLambda(lambda prompt: calls.append(prompt) or "report")
+    now = datetime.now().timestamp()
+
+    # Under 300 s left: rules-only sentiment, no reports, no LLM calls at all
+    with patch("stock_scanner.nodes.news.FMPClient") as client, \
+         patch("stock_scanner.nodes.news.get_llm", return_value=fake_llm):
+        client.return_value.get_stock_news.return_value = [{"title": "Acme wins contract", "text": ""}]
+        news = news_node({"analyst_picks": [pick], "deadline": now + 120 + 100})
+    assert news["degradation_level"] == RULES_SENTIMENT
+    assert news["news_analyzed_stocks"][0]["news_sentiment"]["reasoning"].startswith("Rules-only")
+    with patch("stock_scanner.nodes.reporting.get_llm", return_value=fake_llm):
+        tight = reporting_node({**news, "deadline": now + 120 + 100})
+    assert tight["results"][0].reports is None and tight["degradation_level"] == RULES_SENTIMENT
+    assert calls == []
+
+    # 10-15 minutes left: company report only
+    with patch("stock_scanner.nodes.reporting.get_llm", return_value=fake_llm):
+        relaxed = reporting_node({**news, "deadline": now + 120 + 800})
+    reports = relaxed["results"][0].reports
+    assert reports.company_report == "report" and reports.ceo_report is None
+    assert relaxed["degradation_level"] == NO_CEO_REPORTS and len(calls) == 1
+
+def test_deadline_inside_the_filters_still_delivers_csv_and_email(tmp_path, monkeypatch):
+    import pandas as pd
+    import stock_scanner.utils.deadline as deadline_module
+    from langchain_core.runnables import RunnableLambda
+    from stock_scanner.main import run_scan
+
+    monkeypatch.setattr(config, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(config, "PRIORITIZE_CANDIDATES", False)
+    for name, value in (("EMAIL_ADDRESS", "scanner@example.com"), ("EMAIL_PASSWORD", "x"), ("EMAIL_RECIPIENT", "me@example.com")):
+        monkeypatch.setattr(config, name, value)
+
+    # The deadline passes while the first history download is in flight
+    clock = [NOW.timestamp()]
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock[0], tz)
+    monkeypatch.setattr(deadline_module, "datetime", Clock)
+    def history(symbol, **kwargs):
+        clock[0] += 3600
+        return {'historical': [{'volume': 1000}] * 36}
+
+    candidates = [{"symbol": s, "companyName": f"{s} Inc", "price": 10.0, "marketCap": 1e9, "volume": 3000}
+                  for s in ("FIRST", "SECOND", "THIRD")]
+    with patch("stock_scanner.nodes.screener.FMPClient") as screener, \
+         patch("stock_scanner.nodes.volume.FMPClient") as volume, \
+         patch("stock_scanner.nodes.analyst.FMPClient") as analyst, \
+         patch("stock_scanner.nodes.news.FMPClient") as news, \
+         patch("stock_scanner.nodes.news.get_llm", return_value=RunnableLambda(lambda p: "{}")), \
+         patch("stock_scanner.nodes.reporting.get_llm", return_value=RunnableLambda(lambda p: "report")), \
+         patch("stock_scanner.utils.email_client.smtplib.SMTP_SSL") as smtp:
+        screener.return_value.get_stock_screener.return_value = candidates
+        volume.return_value.get_historical_price.side_effect = history
+        news.return_value.get_stock_news.return_value = []
+        summary = run_scan(send_email=True, deadline=NOW.timestamp() + 120 + 1800)
+
+    # The volume survivor is kept (unrated: no stored target), the rest were never scored
+    assert summary["degradation_level"] == FILTERS_TRUNCATED
+    csv = pd.read_csv(summary["csv"], keep_default_na=False)
+    assert list(csv["Symbol"]) == ["FIRST"] and list(csv["Upside %"]) == ["n/a"]
+    assert LEVEL_NAMES[FILTERS_TRUNCATED] in (tmp_path / f"scan_report_{summary['run_id']}.md").read_text()
+    analyst.return_value.get_price_target.assert_not_called()
+    assert smtp.return_value.__enter__.return_value.send_message.call_count == 1
+
+    # Nothing at all by the deadline: still an empty CSV with headers, and the email
+    with patch("stock_scanner.nodes.screener.FMPClient") as screener, \
+         patch("stock_scanner.nodes.news.get_llm"), patch("stock_scanner.nodes.reporting.get_llm"), \
+         patch("stock_scanner.utils.email_client.smtplib.SMTP_SSL") as smtp:
+        summary = run_scan(send_email=True, deadline=clock[0])
+    screener.return_value.get_stock_screener.assert_not_called()
+    assert pd.read_csv(summary["csv"]).empty and list(pd.read_csv(summary["csv"]).columns)[0] == "Symbol"
+    assert smtp.return_value.__enter__.return_value.send_message.call_count == 1
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_scanner import indicators
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(0)
+    x = rng.integers(100_000, 5_000_000, size=(20, 250)).astype(float)
+    x[3, 100] = np.nan # Missing bar
+    x[5, :] = 7.0 # Flat series
+    return x
+
+@pytest.mark.parametrize("window", [5, 30, 60])
+def test_indicators_match_pandas(universe, window):
+    rolling = pd.DataFrame(universe.T).rolling(window)
+    
+    np.testing.assert_allclose(indicators.rolling_mean(universe, window), rolling.mean().to_numpy().T, rtol=1e-9)
+    np.testing.assert_allclose(indicators.rolling_std(universe, window), rolling.std().to_numpy().T,
+                               rtol=1e-7, atol=1e-6)
+    np.testing.assert_allclose(indicators.rolling_max(universe, window), rolling.max().to_numpy().T)
+    np.testing.assert_allclose(indicators.rolling_percentile_rank(universe, window),
+                               rolling.rank(method='max', pct=True).to_numpy().T)
+    
+    # The old analyze_volume_spike z-score
+    expected = rolling.apply(lambda s: (s.iloc[-1] - s.mean()) / s.std() if s.std() > 0 else 0).to_numpy().T
+    np.testing.assert_allclose(indicators.rolling_zscore(universe, window), expected, rtol=1e-7, atol=1e-9)
+
+def test_short_series_and_shift():
+    x = np.array([1.0, 2.0, 3.0])
+    assert np.isnan(indicators.rolling_mean(x, 5)).all()
+    np.testing.assert_array_equal(indicators.shift(x), [np.nan, 1.0, 2.0])
+    np.testing.assert_array_equal(indicators.shift(x, -1), [2.0, 3.0, np.nan])
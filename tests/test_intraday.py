@@ -0,0 +1,128 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from stock_scanner.intraday import IntradayScanner, VolumeCurve, minute_of_session, MARKET_TZ
+
+def _bars(day, volumes):
+    """5-minute bars from 09:30 ET, newest first like FMP."""
+    bars = []
+    for i, volume in enumerate(volumes):
+        minute = 9 * 60 + 30 + 5 * i
+        bars.append({"date": f"{day} {minute // 60:02d}:{minute % 60:02d}:00", "volume": volume})
+    return bars[::-1]
+
+def test_volume_curve_from_bars():
+    # 78 bars per session, heavier at the open and close
+    volumes = [300] * 6 + [100] * 66 + [300] * 6
+    curve = VolumeCurve.from_bars({"A": _bars("2024-03-04", volumes), "B": _bars("2024-03-05", volumes)})
+    
+    total = sum(volumes)
+    assert curve.fraction(0) == 0.0
+    assert curve.fraction(30) == pytest.approx(1800 / total)
+    assert curve.fraction(195) == pytest.approx(0.5)
+    assert curve.fraction(390) == 1.0
+    assert np.all(np.diff(curve.cumulative) >= 0)
+
+def test_scanner_flags_each_crossing_once():
+    candidates = [{"symbol": s, "price": 10.0} for s in ("FAST", "SLOW", "NOQUOTE")]
+    scanner = IntradayScanner(candidates, [1_000_000, 1_000_000, 1_000_000], VolumeCurve.linear(), threshold=2.0)
+    client = MagicMock()
+    client.get_quotes.return_value = {"FAST": {"volume": 1_100_000, "price": 11.0}, "SLOW": {"volume": 400_000}}
+    
+    # Halfway through the session: 500k expected, FAST is at 2.2x
+    spiked = scanner.poll(client, 195)
+    assert [s["candidate"]["symbol"] for s in spiked] == ["FAST"]
+    assert spiked[0]["volume_analysis"]["ratio"] == pytest.approx(2.2)
+    assert spiked[0]["candidate"]["price"] == 11.0
+    client.get_quotes.assert_called_once_with(["FAST", "SLOW", "NOQUOTE"])
+    
+    # Already pushed into the pipeline: not flagged again
+    assert scanner.poll(client, 200) == []
+    # Too early in the session to judge
+    assert scanner.evaluate(np.array([1e9, 1e9, 1e9]), 5)[0].size == 0
+
+def test_minute_of_session():
+    assert minute_of_session(datetime(2024, 3, 4, 9, 30, tzinfo=MARKET_TZ)) == 0
+    assert minute_of_session(datetime(2024, 3, 4, 16, 0, tzinfo=MARKET_TZ)) == 390
+
+def test_closed_days_are_detected():
+    from stock_scanner.intraday import traded_today
+    
+    monday = datetime(2024, 3, 4, 10, 0, tzinfo=MARKET_TZ)
+    friday_close = datetime(2024, 3, 1, 16, 0, tzinfo=MARKET_TZ).timestamp()
+    assert traded_today({"A": {"timestamp": monday.timestamp()}, "B": {"timestamp": friday_close}}, monday.date())
+    # Holiday: every last trade is from the previous session
+    assert not traded_today({"A": {"timestamp": friday_close}, "B": {}}, monday.date())
+
+def test_run_intraday_skips_weekends(monkeypatch):
+    import stock_scanner.intraday as intraday
+    
+    class Saturday(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 3, 2, 10, 0, tzinfo=MARKET_TZ)
+    monkeypatch.setattr(intraday, "datetime", Saturday)
+    client = MagicMock()
+    monkeypatch.setattr("stock_scanner.utils.api_client.FMPClient", client)
+    intraday.run_intraday(once=True)
+    client.assert_not_called()
+
+def test_baseline_volumes_fetch_missing_history_in_batches(tmp_path, monkeypatch):
+    from datetime import timedelta
+    from stock_scanner.config import config
+    from stock_scanner.intraday import baseline_volumes
+    from stock_scanner.storage.rolling_state import session_date
+    from stock_scanner.utils.api_client import FMPClient
+    
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    today = session_date()
+    days = [today - timedelta(days=i) for i in range(1, 80) if (today - timedelta(days=i)).weekday() < 5][:40]
+    history = lambda volume: [{"date": str(d), "volume": volume} for d in days]
+    
+    # FMP wraps multi-symbol responses in historicalStockList; a batch of one is unwrapped
+    client = FMPClient()
+    responses = [{"historicalStockList": [{"symbol": f"S{i}", "historical": history(1000 * (i + 1))} for i in range(5)]},
+                 {"symbol": "S5", "historical": history(6000)}]
+    monkeypatch.setattr(client, "get_json", MagicMock(side_effect=responses))
+    averages = baseline_volumes(client, [f"S{i}" for i in range(6)])
+    assert client.get_json.call_count == 2
+    np.testing.assert_allclose(averages, [1000, 2000, 3000, 4000, 5000, 6000])
+    
+    # Seeded into the rolling state: the next start needs no history at all
+    client.get_json.reset_mock()
+    np.testing.assert_allclose(baseline_volumes(client, ["S0", "S5"]), [1000, 6000])
+    client.get_json.assert_not_called()
+
+def test_each_pipeline_cycle_records_only_its_own_symbols(tmp_path, monkeypatch):
+    from unittest.mock import patch
+    from langchain_core.runnables import RunnableLambda
+    from stock_scanner.config import config
+    from stock_scanner.intraday import run_pipeline
+    from stock_scanner.storage.runs import RunStore
+    from stock_scanner.storage.snapshots import load_snapshot
+    from stock_scanner.utils.metrics import metrics
+
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "BASE_DIR", tmp_path)
+    def spike(symbol):
+        return {"candidate": {"symbol": symbol, "companyName": f"{symbol} Inc", "price": 10.0, "marketCap": 1e9},
+                "volume_analysis": {"symbol": symbol, "current_volume": 3000, "avg_volume": 1000, "ratio": 3.0,
+                                    "is_spike": True}}
+
+    with patch("stock_scanner.nodes.analyst.FMPClient") as analyst, \
+         patch("stock_scanner.nodes.news.FMPClient") as news, \
+         patch("stock_scanner.nodes.news.get_llm",
+               return_value=RunnableLambda(lambda p: '{"is_negative": false, "reasoning": "ok", "summary": "ok"}')), \
+         patch("stock_scanner.nodes.reporting.get_llm", return_value=RunnableLambda(lambda p: "report")):
+        analyst.return_value.get_price_target.return_value = [{"targetConsensus": 20.0}]
+        news.return_value.get_stock_news.return_value = []
+        run_pipeline([spike("FIRST")], email=False)
+        run_pipeline([spike("SECOND")], email=False)
+
+    store = RunStore()
+    latest = store.run_ids()[-1]
+    assert list(load_snapshot(store.run_dir(latest))["targets"]["symbol"]) == ["SECOND"]
+    assert metrics.snapshot()["nodes"]["analyst_filter"]["items_in"] == 1
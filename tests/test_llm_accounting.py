@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import patch
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from stock_scanner.prompts import CEO_REPORT_PROMPT
+from stock_scanner.utils.llm_accounting import usage, llm_run_config, CEO_REPORT
+from stock_scanner.config import config
+
+def _fake_llm(n=1):
+    messages = [AIMessage(content="report", usage_metadata={"input_tokens": 1000, "output_tokens": 500, "total_tokens": 1500})
+                for _ in range(n)]
+    return GenericFakeChatModel(messages=iter(messages))
+
+def test_chain_usage_is_aggregated_per_prompt_and_symbol():
+    usage.reset()
+    chain = CEO_REPORT_PROMPT | _fake_llm() | StrOutputParser()
+    
+    chain.invoke({"company_name": "Test Co", "symbol": "TST"}, config=llm_run_config(CEO_REPORT, "TST"))
+    
+    snap = usage.snapshot()
+    prompt = snap["by_prompt"][CEO_REPORT]
+    assert prompt["calls"] == 1
+    assert prompt["input_tokens"] == 1000
+    assert prompt["output_tokens"] == 500
+    assert snap["by_symbol"]["TST"]["calls"] == 1
+    expected = (1000 * config.LLM_INPUT_COST_PER_1M + 500 * config.LLM_OUTPUT_COST_PER_1M) / 1_000_000
+    assert prompt["cost_usd"] == pytest.approx(expected)
+
+def test_retries_are_counted():
+    usage.reset()
+    attempts = {"n": 0}
+    
+    def flaky(_):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise RuntimeError("transient")
+        return "ok"
+    
+    from langchain_core.runnables import RunnableLambda
+    chain = RunnableLambda(flaky).with_retry(stop_after_attempt=3, wait_exponential_jitter=False)
+    chain.invoke({}, config=llm_run_config(CEO_REPORT, "TST"))
+    
+    assert usage.snapshot()["by_prompt"][CEO_REPORT]["retries"] == 1
+
+def test_budget_guard():
+    usage.reset()
+    with patch.object(config, "LLM_RUN_BUDGET_USD", 0.001):
+        assert not usage.budget_exhausted()
+        usage.record_call(CEO_REPORT, "TST", 1.0, input_tokens=10_000, output_tokens=10_000)
+        assert usage.budget_exhausted()
+    with patch.object(config, "LLM_RUN_BUDGET_USD", 0):
+        assert not usage.budget_exhausted()
@@ -0,0 +1,36 @@
+import json
+import logging
+from stock_scanner.utils.logger import get_logger, JsonFormatter, ContextFilter, log_context
+from stock_scanner.utils.tracing import current_node
+
+def _record(msg="hello", **extra):
+    record = logging.LogRecord("stock_scanner.test", logging.INFO, __file__, 1, msg, None, None)
+    for k, v in extra.items():
+        setattr(record, k, v)
+    return record
+
+def test_context_filter_stamps_run_node_and_symbol():
+    token = current_node.set("volume_filter")
+    try:
+        with log_context(run_id="2026-01-18_20-06", symbol="TST"):
+            record = _record()
+            ContextFilter().filter(record)
+    finally:
+        current_node.reset(token)
+    
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["run_id"] == "2026-01-18_20-06"
+    assert payload["node"] == "volume_filter"
+    assert payload["symbol"] == "TST"
+    assert payload["message"] == "hello"
+
+def test_explicit_symbol_extra_wins():
+    with log_context(symbol="CTX"):
+        record = _record(symbol="EXTRA")
+        ContextFilter().filter(record)
+    assert record.symbol == "EXTRA"
+
+def test_base_logger_uses_queue_handler():
+    get_logger("stock_scanner.test")
+    handlers = logging.getLogger("stock_scanner").handlers
+    assert any(isinstance(h, logging.handlers.QueueHandler) for h in handlers)
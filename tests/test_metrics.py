@@ -0,0 +1,64 @@
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from stock_scanner.utils.metrics import Metrics, percentile, endpoint_name, instrument_node, metrics
+from stock_scanner.utils.api_client import FMPClient
+
+def test_percentile_nearest_rank():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+def test_endpoint_name_strips_symbol():
+    url = "https://financialmodelingprep.com/api/v3/historical-price-full/AAPL"
+    assert endpoint_name(url) == "v3/historical-price-full"
+
+def test_snapshot_and_prometheus():
+    m = Metrics()
+    m.record_node("volume_filter", 2.0, 100, 5)
+    for i in range(10):
+        m.record_request("v3/quote", 0.1 * (i + 1), 200)
+    m.record_request("v3/quote", 0.5, 429)
+    m.record_retry("v3/quote", rate_limited=True)
+    m.record_cache("price_targets", hit=True)
+    m.record_cache("price_targets", hit=False)
+    
+    snap = m.snapshot()
+    assert snap["nodes"]["volume_filter"]["pass_rate"] == 0.05
+    assert snap["endpoints"]["v3/quote"]["requests"] == 11
+    assert snap["endpoints"]["v3/quote"]["status_codes"] == {"200": 10, "429": 1}
+    assert snap["endpoints"]["v3/quote"]["rate_limited"] == 1
+    assert snap["caches"]["price_targets"]["hit_ratio"] == 0.5
+    
+    text = m.to_prometheus()
+    assert 'stock_scanner_endpoint_rate_limited_total{endpoint="v3/quote"} 1' in text
+
+def test_instrument_node_records_items():
+    metrics.reset()
+    node = instrument_node("volume_filter", lambda state: {"spiked_stocks": [1]}, "candidates", "spiked_stocks")
+    node({"candidates": [1, 2, 3]})
+    
+    recorded = metrics.snapshot()["nodes"]["volume_filter"]
+    assert recorded["items_in"] == 3
+    assert recorded["items_out"] == 1
+
+def test_get_json_records_retries_and_status_codes():
+    metrics.reset()
+    client = FMPClient()
+    rate_limited = MagicMock(status_code=429)
+    rate_limited.raise_for_status.side_effect = requests.exceptions.HTTPError("429")
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"ok": True}
+    client.session = MagicMock()
+    client.session.get.side_effect = [rate_limited, ok]
+    
+    # Skip the real backoff wait
+    with patch.object(FMPClient.get_json.retry, "sleep", lambda _: None):
+        assert client.get_json("https://financialmodelingprep.com/api/v3/quote/AAPL") == {"ok": True}
+    
+    endpoint = metrics.snapshot()["endpoints"]["v3/quote"]
+    assert endpoint["status_codes"] == {"429": 1, "200": 1}
+    assert endpoint["retries"] == 1
+    assert endpoint["rate_limited"] == 1
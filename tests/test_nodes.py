@@ -6,6 +6,12 @@ from stock_scanner.nodes.analyst import analyst_node
 from stock_scanner.state import GraphState
 from stock_scanner.config import config
 
+@pytest.fixture(autouse=True)
+def local_data_dir(tmp_path, monkeypatch):
+    # Keep node-local stores (volume state, price targets) out of the real DATA_DIR
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    return tmp_path
+
 @pytest.fixture
 def mock_fmp_client():
     with patch('stock_scanner.nodes.screener.FMPClient') as MockClient:
@@ -48,6 +54,21 @@ def test_volume_node_spike(mock_volume_client):
     assert result["spiked_stocks"][0]['candidate']['symbol'] == "TEST"
     assert result["spiked_stocks"][0]['volume_analysis']['is_spike'] == True
 
+def test_volume_node_ranks_persistent_spikes(mock_volume_client):
+    state = {"candidates": [{"symbol": "ONEDAY", "volume": 5000}, {"symbol": "BUILDING", "volume": 3000}]}
+    
+    # Newest first: ONEDAY spikes only today, BUILDING has spiked for the last 3 sessions
+    one_day = [{'volume': 5000}] + [{'volume': 1000} for _ in range(70)]
+    building = [{'volume': 3000}, {'volume': 2600}, {'volume': 2200}] + [{'volume': 1000} for _ in range(68)]
+    mock_volume_client.get_historical_price.side_effect = [{'historical': one_day}, {'historical': building}]
+    
+    result = volume_node(state)
+    
+    first, second = (item['volume_analysis'] for item in result["spiked_stocks"])
+    assert first['symbol'] == "BUILDING" and first['spike_days'] == 3 and first['days_since_first_spike'] == 2
+    assert first['accumulation_trend'] > 0
+    assert second['symbol'] == "ONEDAY" and second['spike_days'] == 1 and second['max_spike_ratio'] == 5.0
+
 def test_volume_node_no_spike(mock_volume_client):
     state = {"candidates": [{"symbol": "DUD", "volume": 1000}]}
     
@@ -90,3 +111,219 @@ def test_analyst_node_no_upside(mock_analyst_client):
     
     assert "analyst_picks" in result
     assert len(result["analyst_picks"]) == 0
+
+def test_rolling_volume_state_matches_window_stats(tmp_path):
+    from datetime import date, timedelta
+    import numpy as np
+    from stock_scanner.storage.rolling_state import RollingVolumeState
+    
+    rng = np.random.default_rng(0)
+    volumes = rng.integers(100_000, 5_000_000, 100).astype(float)
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(100)]
+    
+    state = RollingVolumeState(tmp_path, window=30, capacity=1)
+    state.push("FILLER", days[0], 1.0) # Forces the memmap to grow for the next symbol
+    for day, volume in zip(days, volumes):
+        state.push("SYM", day, volume * 3)
+        state.push("SYM", day, volume) # Same-day re-scan replaces the bar
+    state.flush()
+    
+    # Reloaded from disk: scoring the last stored day excludes it from the baseline
+    reloaded = RollingVolumeState(tmp_path, window=30)
+    mean, std = reloaded.baseline("SYM", days[-1])
+    assert mean == pytest.approx(volumes[-31:-1].mean())
+    assert std == pytest.approx(volumes[-31:-1].std(ddof=1))
+    # Next day: the previous 30 sessions, including the last stored one
+    mean, _ = reloaded.baseline("SYM", days[-1] + timedelta(days=1))
+    assert mean == pytest.approx(volumes[-30:].mean())
+    # Stale state isn't trusted
+    assert reloaded.baseline("SYM", days[-1] + timedelta(days=30)) is None
+
+def test_volume_node_warm_path_skips_history_for_non_spikes(mock_volume_client):
+    from datetime import timedelta
+    from stock_scanner.storage.rolling_state import session_date
+    
+    today = session_date()
+    history = [{'date': str(today - timedelta(days=i)), 'volume': 1000} for i in range(1, 40)]
+    mock_volume_client.get_historical_price.return_value = {'historical': history}
+    
+    # Cold: history is downloaded and seeds the state
+    assert volume_node({"candidates": [{"symbol": "WARM", "volume": 1100}]})["spiked_stocks"] == []
+    assert mock_volume_client.get_historical_price.call_count == 1
+    
+    # Warm: a non-spike is scored from the state alone, a spike still fetches history
+    assert volume_node({"candidates": [{"symbol": "WARM", "volume": 1200}]})["spiked_stocks"] == []
+    assert mock_volume_client.get_historical_price.call_count == 1
+    spiked = volume_node({"candidates": [{"symbol": "WARM", "volume": 3000}]})["spiked_stocks"]
+    assert mock_volume_client.get_historical_price.call_count == 2
+    assert spiked[0]['volume_analysis']['ratio'] == 3.0
+
+def test_volume_node_reseeds_after_a_skipped_session(mock_volume_client, monkeypatch):
+    from datetime import date, timedelta
+    from stock_scanner.nodes.volume import average_volume
+    from stock_scanner.storage import rolling_state
+
+    monday, wednesday = date(2026, 1, 12), date(2026, 1, 14)
+    days = [monday - timedelta(days=i) for i in range(1, 60) if (monday - timedelta(days=i)).weekday() < 5][:40]
+    bars = [{'date': str(d), 'volume': 1000} for d in days] # Newest first
+    tuesday = {'date': str(monday + timedelta(days=1)), 'volume': 100} # Too quiet for the screener
+    
+    # Monday: cold, seeds the ring
+    monkeypatch.setattr(rolling_state, "session_date", lambda: monday)
+    mock_volume_client.get_historical_price.return_value = {'historical': [{'date': str(monday), 'volume': 1000}] + bars}
+    volume_node({"candidates": [{"symbol": "GAP", "volume": 1000}]})
+    
+    # Wednesday, Tuesday never pushed: the gapped ring must not score the day
+    monkeypatch.setattr(rolling_state, "session_date", lambda: wednesday)
+    history = [{'date': str(wednesday), 'volume': 1470}, tuesday, {'date': str(monday), 'volume': 1000}] + bars
+    mock_volume_client.get_historical_price.return_value = {'historical': history}
+    assert rolling_state.RollingVolumeState().baseline("GAP", wednesday) is None
+    spiked = volume_node({"candidates": [{"symbol": "GAP", "volume": 1470}]})["spiked_stocks"]
+    
+    # Cold path average (Tuesday included): 1470 / 970 = 1.52x is a spike; the gapped ring gave 1.47x
+    assert mock_volume_client.get_historical_price.call_count == 2
+    assert spiked[0]['volume_analysis']['ratio'] == pytest.approx(1470 / average_volume(history))
+    mean, _ = rolling_state.RollingVolumeState().baseline("GAP", wednesday)
+    assert mean == pytest.approx(average_volume(history))
+
+def test_volume_node_uses_fresh_feature_store(mock_volume_client, monkeypatch):
+    from datetime import timedelta
+    import pandas as pd
+    from stock_scanner.nodes.volume import average_volume
+    from stock_scanner.storage.features import FeatureStore
+    from stock_scanner.storage.rolling_state import session_date
+
+    monkeypatch.setattr(config, "VOLUME_STATE_ENABLED", False)
+    today = session_date()
+    dates = pd.bdate_range(end=today - timedelta(days=1), periods=40)
+    bars = [{"date": d, "open": 10, "high": 10, "low": 10, "close": 10, "volume": 1000 + 10 * i}
+            for i, d in enumerate(dates)]
+    FeatureStore().update("FEAT", pd.DataFrame(bars)) # Ends on the session before today
+    history = [{"date": str(today), "volume": 3000}] + [{**b, "date": str(b["date"].date())} for b in reversed(bars)]
+    mock_volume_client.get_historical_price.return_value = {'historical': history}
+
+    # Non-spike: scored from the stored average, no history download
+    assert volume_node({"candidates": [{"symbol": "FEAT", "volume": 1200}]})["spiked_stocks"] == []
+    assert mock_volume_client.get_historical_price.call_count == 0
+    # Spike: history is still fetched (persistence), with the same average as the cold path
+    spiked = volume_node({"candidates": [{"symbol": "FEAT", "volume": 3000}]})["spiked_stocks"]
+    assert mock_volume_client.get_historical_price.call_count == 1
+    assert spiked[0]['volume_analysis']['ratio'] == pytest.approx(3000 / average_volume(history))
+
+def test_volume_node_keeps_the_ring_current_on_the_feature_store_path(mock_volume_client, monkeypatch):
+    from datetime import timedelta
+    import pandas as pd
+    from stock_scanner.storage.features import FeatureStore
+    from stock_scanner.storage.rolling_state import RollingVolumeState, session_date
+    from stock_scanner.storage.snapshots import snapshots
+
+    monkeypatch.setattr(config, "VOLUME_STATE_ENABLED", True)
+    today = session_date()
+    dates = pd.bdate_range(end=today - timedelta(days=1), periods=40)
+    bars = [{"date": d, "open": 10, "high": 10, "low": 10, "close": 10, "volume": 1000 + 10 * i}
+            for i, d in enumerate(dates)]
+    FeatureStore().update("FEAT", pd.DataFrame(bars))
+
+    # Empty ring: scored from the features, and the ring is seeded from them plus today's bar
+    snapshots.reset()
+    assert volume_node({"candidates": [{"symbol": "FEAT", "volume": 1200}]})["spiked_stocks"] == []
+    assert snapshots.rows["volume"][0]["source"] == "features"
+    assert mock_volume_client.get_historical_price.call_count == 0
+
+    # The next session is scored from the ring, with no history download
+    next_session = (pd.Timestamp(today) + pd.offsets.BDay(1)).date()
+    ring = RollingVolumeState()
+    mean, _ = ring.baseline("FEAT", next_session)
+    assert mean == pytest.approx((sum(b["volume"] for b in bars[-29:]) + 1200) / 30)
+
+def test_reporting_node_reuses_recent_reports_for_repeats():
+    from datetime import date, timedelta
+    from langchain_core.runnables import RunnableLambda
+    from stock_scanner.nodes.reporting import reporting_node
+    from stock_scanner.storage.results_db import ResultsDB
+
+    def item(symbol, price, summary):
+        return {
+            "candidate": {"symbol": symbol, "companyName": f"{symbol} Inc", "price": price},
+            "volume_analysis": {"symbol": symbol, "current_volume": 300, "avg_volume": 100, "ratio": 3.0, "is_spike": True},
+            "analyst_rating": {"symbol": symbol, "target_consensus": 20.0, "upside_percent": 100.0},
+            "news_sentiment": {"is_negative": False, "reasoning": "ok", "summary": summary},
+        }
+
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    stale = (date.today() - timedelta(days=config.REPORT_MAX_AGE_DAYS + 1)).isoformat()
+    db = ResultsDB()
+    prior = {**item("REPEAT", 8.0, "Old news"), "reports": {"company_report": "old company", "ceo_report": "old ceo", "generated_on": None}}
+    db.record_run(f"{yesterday}_22-00", [prior])
+    # A later run kept REPEAT without reports (budget or deadline): look past it
+    db.record_run(f"{yesterday}_23-00", [{**item("REPEAT", 9.0, "Old news"), "reports": None}])
+    db.record_run(f"{stale}_22-00", [{**item("STALE", 8.0, "x"), "reports": {"company_report": "ancient"}}])
+    db.close()
+
+    calls = []
+    fake_llm = RunnableLambda(lambda prompt: calls.append(prompt) or "fresh report")
+    with patch("stock_scanner.nodes.reporting.get_llm", return_value=fake_llm):
+        results = reporting_node({"news_analyzed_stocks": [
+            item("REPEAT", 10.0, "New contract"), item("NEW", 5.0, "x"), item("STALE", 5.0, "x")]})["results"]
+
+    by_symbol = {r.candidate.symbol: r.reports for r in results}
+    assert by_symbol["REPEAT"].company_report == "old company"
+    assert by_symbol["REPEAT"].generated_on == yesterday
+    assert "Price: $8.00 -> $10.00 (+25.0%)" in by_symbol["REPEAT"].changes
+    assert "News: New contract" in by_symbol["REPEAT"].changes
+    assert by_symbol["NEW"].company_report == "fresh report" and by_symbol["NEW"].changes is None
+    assert by_symbol["STALE"].company_report == "fresh report"
+    assert len(calls) == 4 # Company + CEO report for NEW and STALE only
+
+def test_filter_order_does_not_change_picks(mock_volume_client, mock_analyst_client):
+    candidates = [{"symbol": s, "volume": v, "price": 100} for s, v in (("BOTH", 3000), ("VOLONLY", 3000), ("UPONLY", 1000))]
+    mock_volume_client.get_historical_price.side_effect = lambda symbol, **kw: {
+        'historical': [{'volume': next(c['volume'] for c in candidates if c['symbol'] == symbol)}] + [{'volume': 1000}] * 35}
+    targets = {"BOTH": 150, "VOLONLY": 105, "UPONLY": 150}
+    mock_analyst_client.get_price_target.side_effect = lambda symbol: [{'targetConsensus': targets[symbol]}]
+
+    volume_first = analyst_node(volume_node({"candidates": candidates}))["analyst_picks"]
+    upside_first = analyst_node({"candidates": candidates}, in_key="candidates", out_key="spiked_stocks")
+    upside_first = volume_node(upside_first, in_key="spiked_stocks", out_key="analyst_picks")["analyst_picks"]
+
+    assert [p['candidate']['symbol'] for p in upside_first] == [p['candidate']['symbol'] for p in volume_first] == ["BOTH"]
+    assert set(upside_first[0]) == set(volume_first[0]) == {"candidate", "volume_analysis", "analyst_rating"}
+
+def test_quota_budget_skips_lowest_priority_candidates(mock_volume_client, monkeypatch):
+    from stock_scanner.utils.quota import QuotaManager, prioritize, quota
+
+    # Persisted across runs: 90 of 100 calls already used today
+    manager = QuotaManager()
+    monkeypatch.setattr(config, "FMP_DAILY_CALL_LIMIT", 100)
+    manager.start_run()
+    for _ in range(90):
+        manager.record("other")
+    manager.flush()
+    quota.start_run()
+    assert quota.used_today() == 90
+    assert quota.budgets["volume_filter"] == 6
+
+    client = MagicMock()
+    client.get_quotes.return_value = {f"S{i}": {"volume": i * 100, "avgVolume": 100} for i in range(10)}
+    ordered = prioritize(client, [{"symbol": f"S{i}", "volume": i * 100} for i in range(10)])
+    assert [c['symbol'] for c in ordered][:3] == ["S9", "S8", "S7"]
+
+    def history(symbol, **kwargs):
+        quota.record("volume_filter")
+        return {'historical': [{'volume': 1000}] * 36}
+    mock_volume_client.get_historical_price.side_effect = history
+    volume_node({"candidates": ordered})
+
+    assert mock_volume_client.get_historical_price.call_count == 6
+    assert quota.snapshot()["skipped_for_budget"]["volume_filter"] == ["S3", "S2", "S1", "S0"]
+    quota.reset()
+
+def test_quota_budgets_follow_the_planned_filter_order(tmp_path, monkeypatch):
+    from stock_scanner.utils.quota import QuotaManager
+
+    monkeypatch.setattr(config, "FMP_DAILY_CALL_LIMIT", 1000)
+    manager = QuotaManager()
+    manager.start_run(tmp_path / "quota.json", order=["analyst_filter", "volume_filter"])
+    assert manager.budgets == {"analyst_filter": 600, "volume_filter": 250, "news_analysis": 150}
+    manager.start_run(tmp_path / "quota.json")
+    assert manager.budgets["volume_filter"] == 600
@@ -0,0 +1,62 @@
+import json
+
+from stock_scanner.config import config
+from stock_scanner.planner import load_stage_stats, plan
+
+def _summary(path, volume, analyst):
+    nodes = {name: {"seconds": s, "requests": r, "items_in": i, "items_out": o}
+             for name, (s, r, i, o) in (("volume_filter", volume), ("analyst_filter", analyst))}
+    path.write_text(json.dumps({"metrics": {"nodes": nodes}}))
+
+def test_planner_puts_cheap_selective_filter_first(tmp_path):
+    # Volume: 0.5s/item, passes 10%. Upside: 0.01s/item, passes 20% -> upside first
+    for day in range(3):
+        _summary(tmp_path / f"run_summary_2024-03-0{day + 1}_22-00.json", (50.0, 100, 100, 10), (0.1, 10, 10, 2))
+    stats = load_stage_stats(tmp_path)
+    assert stats["volume_filter"]["runs"] == 3
+
+    chosen = plan(stats)
+    assert chosen["source"] == "planner"
+    assert chosen["order"] == ["analyst_filter", "volume_filter"]
+    assert chosen["stages"]["analyst_filter"]["pass_rate"] == 0.2
+    assert chosen["stages"]["volume_filter"]["requests_per_item"] == 1.0
+
+def test_planner_defaults_without_history(tmp_path, monkeypatch):
+    _summary(tmp_path / "run_summary_2024-03-01_22-00.json", (50.0, 100, 100, 10), (0.0, 0, 0, 0))
+    chosen = plan(load_stage_stats(tmp_path))
+    assert (chosen["order"], chosen["source"]) == (["volume_filter", "analyst_filter"], "default")
+    monkeypatch.setattr(config, "PLANNER_ENABLED", False)
+    assert plan({})["order"] == ["volume_filter", "analyst_filter"]
+
+def test_graph_compiles_for_planned_order():
+    from stock_scanner.graph import get_app
+
+    app = get_app(order=["analyst_filter", "volume_filter"])
+    assert app is get_app(order=["analyst_filter", "volume_filter"])
+    assert app is not get_app()
+    assert "volume_filter" not in get_app("analyst_filter").get_graph().nodes
+
+def test_run_summaries_are_kept_under_data_dir(tmp_path, monkeypatch):
+    from stock_scanner.main import save_run_summary
+
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    save_run_summary("2024-03-01_22-00", {})
+    assert (tmp_path / "summaries" / "run_summary_2024-03-01_22-00.json").exists()
+    _summary(tmp_path / "summaries" / "run_summary_2024-03-02_22-00.json", (50.0, 100, 100, 10), (0.1, 10, 10, 2))
+    assert load_stage_stats()["volume_filter"]["runs"] == 1
+
+def test_stage_counts_follow_the_run_order():
+    from stock_scanner.planner import stage_counts
+
+    # Upside ran first: its survivors sit in the first filter slot
+    state = {"candidates": [1] * 10, "spiked_stocks": [1] * 4, "analyst_picks": [1]}
+    assert stage_counts(state, ["analyst_filter", "volume_filter"]) == {
+        "screener": 10, "analyst_filter": 4, "volume_filter": 1}
+    assert list(stage_counts(state)) == ["screener", "volume_filter", "analyst_filter"]
+
+def test_planner_counts_fmp_requests_as_cost(tmp_path):
+    # Volume is faster per item but needs a request per item; upside is served from cache
+    _summary(tmp_path / "run_summary_2024-03-01_22-00.json", (10.0, 100, 100, 50), (20.0, 0, 100, 50))
+    chosen = plan(load_stage_stats(tmp_path))
+    assert chosen["order"] == ["analyst_filter", "volume_filter"]
+    assert chosen["stages"]["analyst_filter"]["rank"] == 2.0 and chosen["stages"]["volume_filter"]["rank"] == 3.0
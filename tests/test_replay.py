@@ -0,0 +1,51 @@
+from stock_scanner.config import config
+from stock_scanner.replay import admitted_picks, replay
+from stock_scanner.storage.runs import RunStore
+from stock_scanner.storage.snapshots import StageSnapshots, load_snapshot
+
+def test_replay_from_stage_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "DEFAULT_VOLUME_SPIKE_THRESHOLD", 1.5)
+    monkeypatch.setattr(config, "DEFAULT_UPSIDE_THRESHOLD", 40)
+    recorder = StageSnapshots()
+    recorder.extend("universe", [{"symbol": s, "companyName": f"{s} Inc", "price": 10.0} for s in ("A", "B", "C", "D")])
+    for symbol, ratio in (("A", 3.0), ("B", 1.6), ("C", 1.2), ("D", 2.0)):
+        recorder.record("volume", {"symbol": symbol, "price": 10.0, "volume": ratio * 1000, "avg_volume": 1000.0,
+                                   "ratio": ratio, "source": "history"})
+    for symbol, upside in (("A", 50.0), ("B", 45.0), ("D", 35.0)):
+        recorder.record("targets", {"symbol": symbol, "price": 10.0, "target": 10 + upside / 10, "upside": upside})
+    store = RunStore()
+    recorder.save(store.run_dir("2024-03-04_22-00"))
+    assert len(load_snapshot(store.run_dir("2024-03-04_22-00"))["volume"]) == 4
+
+    # Original picks: A, B. Stricter spike drops B; a lower gain bar admits D
+    outcome = replay("2024-03-04_22-00", spike=1.8, min_gain=30)
+    assert list(outcome["picks"]["symbol"]) == ["A", "D"]
+    assert list(outcome["entered"]["symbol"]) == ["D"]
+    assert list(outcome["left"]["symbol"]) == ["B"]
+    assert outcome["kept"] == ["A"]
+
+    # C never had a target fetched and the local store has none: it can't be admitted
+    assert "C" not in set(replay("2024-03-04_22-00", spike=1.0, min_gain=0)["picks"]["symbol"])
+
+    picks = admitted_picks(outcome, load_snapshot(store.run_dir("2024-03-04_22-00"))["universe"])
+    assert picks[0]["candidate"]["companyName"] == "D Inc"
+    assert picks[0]["analyst_rating"]["upside_percent"] == 35.0
+
+def test_replay_flags_symbols_the_upside_first_run_never_volume_checked(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "DEFAULT_VOLUME_SPIKE_THRESHOLD", 1.5)
+    monkeypatch.setattr(config, "DEFAULT_UPSIDE_THRESHOLD", 40)
+    # Upside ran first: every symbol has a target, only its survivor (A) reached the volume filter
+    recorder = StageSnapshots()
+    for symbol, upside in (("A", 50.0), ("B", 35.0), ("C", 10.0)):
+        recorder.record("targets", {"symbol": symbol, "price": 10.0, "target": 10 + upside / 10, "upside": upside})
+    recorder.record("volume", {"symbol": "A", "price": 10.0, "volume": 3000, "avg_volume": 1000.0,
+                               "ratio": 3.0, "source": "history"})
+    store = RunStore()
+    recorder.save(store.run_dir("2024-03-04_22-00"), ["analyst_filter", "volume_filter"])
+
+    outcome = replay("2024-03-04_22-00", min_gain=30)
+    assert outcome["filter_order"] == ["analyst_filter", "volume_filter"]
+    assert outcome["unchecked"] == ["B"]
+    assert replay("2024-03-04_22-00", spike=1.0)["unchecked"] == []
@@ -0,0 +1,50 @@
+from stock_scanner.storage.results_db import ResultsDB
+
+def test_results_db_queries_and_legacy_import(tmp_path):
+    def result(symbol):
+        return {"candidate": {"symbol": symbol}, "volume_analysis": {"ratio": 2.5, "avg_volume": 100}}
+
+    db = ResultsDB(tmp_path / "results.sqlite")
+    (tmp_path / "old").mkdir()
+    (tmp_path / "scan_results_2024-03-01_22-00.csv").write_text(
+        "Symbol,Company,Price,Vol Ratio,Avg Vol,Upside %,Sentiment\nAAA,A Inc,10,1.61x,390698,53.8%,Neutral/Positive\n")
+    (tmp_path / "old" / "high_potential_scan_2024-02-28_22-00.csv").write_text(
+        "Symbol,Name,Sector,Industry,Price,Market Cap ($M),Volume,Avg Volume,Vol Ratio,Target Price,Upside %\n"
+        "CCC,C Inc,Tech,Software,5,900,1000,300,3.33,8,60\nCCC,C Inc,Tech,Software,5,900,1000,300,3.33,8,60\n")
+    assert db.import_legacy(tmp_path) == 2
+
+    db.record_run("2024-03-04_22-00", [result("AAA"), result("BBB")])
+    db.record_run("2024-03-05_22-00", [result("AAA")])
+    db.record_run("2024-03-06_22-00", [])
+
+    assert db.flagged(2, 3) == [("AAA", 2)]
+    assert db.flagged(3, 5) == [("AAA", 3)]
+    assert db.first_seen(["aaa", "BBB", "ZZZ"]) == {"AAA": "2024-03-01", "BBB": "2024-03-04"}
+    assert db.classify(["AAA", "CCC", "NEW"], "2024-03-06", lookback=3) == {"AAA": "repeat", "CCC": "new", "NEW": "new"}
+    assert db.classify(["CCC"], "2024-03-06") == {"CCC": "repeat"}
+    assert db.latest_payload("AAA", "2024-03-06")[0] == "2024-03-05"
+    assert db.conn.execute("SELECT volume_ratio, upside_percent FROM results WHERE symbol='AAA' AND run_date='2024-03-01'").fetchone() == (1.61, 53.8)
+    db.close()
+
+def test_csv_first_seen_before_the_run_is_recorded(tmp_path, monkeypatch):
+    import pandas as pd
+    from stock_scanner.config import config
+    from stock_scanner.main import save_results
+    from stock_scanner.models import AnalystRating, SentimentAnalysis, StockCandidate, StockResult, VolumeAnalysis
+
+    def result(symbol):
+        return StockResult(
+            candidate=StockCandidate(symbol=symbol, companyName=f"{symbol} Inc", price=10.0, marketCap=1e9),
+            volume_analysis=VolumeAnalysis(symbol=symbol, current_volume=300, avg_volume=100, ratio=3.0, is_spike=True),
+            analyst_rating=AnalystRating(symbol=symbol, target_consensus=15.0, upside_percent=50.0),
+            news_sentiment=SentimentAnalysis(is_negative=False, reasoning="ok", summary="ok"),
+        )
+
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "BASE_DIR", tmp_path)
+    db = ResultsDB()
+    db.record_run("2024-03-04_22-00", [{"candidate": {"symbol": "OLD"}}])
+    db.close()
+    # The CSV is written before this run lands in the database
+    csv = pd.read_csv(save_results([result("OLD"), result("NEW")], "2024-03-05_22-00"))
+    assert list(csv["First Seen"]) == ["2024-03-04", "2024-03-05"]
@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import patch
+from stock_scanner.utils import tracing
+from stock_scanner.config import config
+
+@pytest.fixture
+def tracing_on(monkeypatch):
+    monkeypatch.setenv("LANGCHAIN_TRACING_V2", "true")
+    monkeypatch.setenv("LANGCHAIN_API_KEY", "test")
+
+def test_sample_rate_parsing():
+    with patch.object(config, "TRACE_SAMPLE_RATES", "api=0.25, llm=1, bogus=x"):
+        assert tracing.sample_rate(tracing.API) == 0.25
+        assert tracing.sample_rate(tracing.LLM) == 1.0
+        assert tracing.sample_rate(tracing.API_BULK) == 1.0
+
+def test_disabled_tracing_calls_through(monkeypatch):
+    monkeypatch.delenv("LANGCHAIN_TRACING_V2", raising=False)
+    monkeypatch.delenv("LANGSMITH_TRACING", raising=False)
+    
+    @tracing.traceable(name="fmp_api_test")
+    def call(x):
+        return x * 2
+    
+    assert call(21) == 42
+    assert tracing._aggregator.pop(None) == {}
+
+def test_unsampled_api_calls_roll_up_per_node(tracing_on):
+    @tracing.traceable(name="fmp_api_test")
+    def call(x):
+        return x
+    
+    with patch.object(config, "TRACE_SAMPLE_RATES", "api=0"):
+        token = tracing.current_node.set("volume_filter")
+        try:
+            for i in range(5):
+                call(i)
+        finally:
+            tracing.current_node.reset(token)
+    
+    stats = tracing._aggregator.pop("volume_filter")
+    assert stats["fmp_api_test"]["calls"] == 5
+    assert stats["fmp_api_test"]["errors"] == 0